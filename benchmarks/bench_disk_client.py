@@ -0,0 +1,93 @@
+"""Загрузка файлов на мок-сервер Яндекс Диска: новая сессия против общей.
+
+Запуск из корня проекта:
+
+    python benchmarks/bench_disk_client.py [запросы] [файлов_в_запросе]
+
+Мок-сервер из tests/yandex_disk_mock_server.py работает в отдельном
+потоке. Каждый запрос к приложению имитируется вызовом asyncio.run,
+как это делает Flask для асинхронных view-функций. Создание коротких
+ссылок в БД не измеряется.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+
+from io import BytesIO
+from pathlib import Path
+
+import aiohttp
+from aiohttp import web
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+os.environ.setdefault('DATABASE_URI', 'sqlite:///:memory:')
+os.environ.setdefault('DISK_TOKEN', 'benchmark')
+
+from werkzeug.datastructures import FileStorage  # noqa: E402
+
+from tests.yandex_disk_mock_server import (  # noqa: E402
+    REQUEST_UPLOAD_URL, create_mock_app
+)
+from yacut import utils  # noqa: E402
+from yacut.http_client import disk_client  # noqa: E402
+
+
+def start_mock_server() -> str:
+    """Запуск мок-сервера в фоновом потоке; возвращает его адрес."""
+    loop = asyncio.new_event_loop()
+    runner = web.AppRunner(create_mock_app()[0], access_log=None)
+    loop.run_until_complete(runner.setup())
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    loop.run_until_complete(site.start())
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    host, port = runner.addresses[0][:2]
+    return f'http://{host}:{port}'
+
+
+def make_files(count: int):
+    """Набор небольших файлов для одного запроса."""
+    return [
+        FileStorage(BytesIO(b'x' * 1024), f'file{number}.bin')
+        for number in range(count)
+    ]
+
+
+async def upload_with_new_session(files):
+    """Прежний способ: отдельная сессия на каждый запрос."""
+    async with aiohttp.ClientSession() as session:
+        return await utils.upload_files(session, files)
+
+
+async def upload_with_shared_client(files):
+    """Загрузка через общий клиент приложения."""
+    return await disk_client.run(utils.upload_files, files)
+
+
+def measure(upload, requests: int, files: int) -> float:
+    """Среднее время одного запроса в миллисекундах."""
+    started = time.perf_counter()
+    for _ in range(requests):
+        results = asyncio.run(upload(make_files(files)))
+        assert all(result['link'] for result in results), results
+    return (time.perf_counter() - started) / requests * 1000
+
+
+def main(requests: int = 300, files: int = 3):
+    """Замер обоих способов на одном мок-сервере."""
+    base = start_mock_server()
+    # Файлы одинаковые: без отключения дедупликации загрузится только первый.
+    utils.app.config['UPLOAD_DEDUP'] = False
+    utils.REQUEST_UPLOAD_URL = base + REQUEST_UPLOAD_URL
+    for name, upload in (('новая сессия', upload_with_new_session),
+                         ('общий клиент', upload_with_shared_client)):
+        measure(upload, 10, files)
+        print(f'{name}: {measure(upload, requests, files):.2f} мс/запрос')
+    disk_client.close()
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:3]))
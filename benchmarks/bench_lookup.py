@@ -0,0 +1,57 @@
+"""Сравнение поиска исходной ссылки через ORM и через SQLAlchemy Core.
+
+Запуск из корня проекта:
+
+    python benchmarks/bench_lookup.py [количество_ссылок] [повторы]
+
+Кэш и фильтр коротких ссылок не участвуют: измеряется только стоимость
+одного обращения к БД для каждого из способов.
+"""
+
+import os
+import random
+import sys
+import timeit
+
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+os.environ.setdefault('DATABASE_URI', 'sqlite:///:memory:')
+
+from yacut import app, db  # noqa: E402
+from yacut.lookup import fetch_target  # noqa: E402
+from yacut.models import URLMap  # noqa: E402
+
+
+def orm_lookup(short_id: str) -> str:
+    """Прежний способ: загрузка полного объекта модели."""
+    return URLMap.query.filter_by(short=short_id).first().original
+
+
+def main(links: int = 10000, repeats: int = 20000):
+    """Заполнение БД и замер среднего времени одного поиска."""
+    with app.app_context():
+        db.create_all()
+        db.session.execute(
+            URLMap.__table__.insert(),
+            [
+                {'original': f'https://example.com/{number}',
+                 'short': f'id{number}'}
+                for number in range(links)
+            ]
+        )
+        db.session.commit()
+        short_ids = [f'id{random.randrange(links)}' for _ in range(repeats)]
+
+        for name, lookup in (('URLMap.query', orm_lookup),
+                             ('fetch_target', fetch_target)):
+            ids = iter(short_ids)
+            seconds = timeit.timeit(lambda: lookup(next(ids)), number=repeats)
+            db.session.rollback()
+            print(f'{name:>15}: {seconds / repeats * 1e6:8.1f} мкс/запрос')
+        db.drop_all()
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:3]))
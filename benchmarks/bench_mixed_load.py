@@ -0,0 +1,104 @@
+"""Смешанная нагрузка на SQLite: перенаправления и создание ссылок.
+
+Запуск из корня проекта:
+
+    python benchmarks/bench_mixed_load.py [читатели] [писатели] [секунды]
+
+Для сравнения с настройками SQLite по умолчанию:
+
+    SQLITE_JOURNAL_MODE=DELETE SQLITE_SYNCHRONOUS=FULL SQLITE_BUSY_TIMEOUT=0 \
+        python benchmarks/bench_mixed_load.py
+
+БД создается во временном файле. Читатели ищут ссылки напрямую
+в БД (fetch_target, без кэша), писатели создают новые ссылки.
+Выводится пропускная способность и число ошибок записи и чтения.
+"""
+
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+from collections import Counter
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+_tmp_dir = tempfile.TemporaryDirectory()
+os.environ['DATABASE_URI'] = f'sqlite:///{_tmp_dir.name}/bench.db'
+
+from sqlalchemy.exc import OperationalError  # noqa: E402
+
+from yacut import app, db  # noqa: E402
+from yacut.error_handlers import ErrorInDBSave  # noqa: E402
+from yacut.lookup import fetch_target  # noqa: E402
+from yacut.models import URLMap  # noqa: E402
+from yacut.utils import insert_link  # noqa: E402
+
+PRELOADED_LINKS = 10000
+
+
+def reader(deadline: float, counters: Counter):
+    """Поиск случайных ссылок до окончания замера."""
+    with app.app_context():
+        while time.monotonic() < deadline:
+            try:
+                fetch_target(f'id{random.randrange(PRELOADED_LINKS)}')
+                db.session.rollback()
+                counters['reads'] += 1
+            except OperationalError:
+                db.session.rollback()
+                counters['read_errors'] += 1
+
+
+def writer(deadline: float, counters: Counter):
+    """Создание новых ссылок до окончания замера."""
+    with app.app_context():
+        while time.monotonic() < deadline:
+            try:
+                insert_link('https://example.com/new')
+                counters['writes'] += 1
+            except ErrorInDBSave:
+                counters['write_errors'] += 1
+
+
+def main(readers: int = 8, writers: int = 2, seconds: float = 5):
+    """Заполнение БД и запуск потоков читателей и писателей."""
+    with app.app_context():
+        db.create_all()
+        db.session.execute(
+            URLMap.__table__.insert(),
+            [
+                {'original': f'https://example.com/{number}',
+                 'short': f'id{number}'}
+                for number in range(PRELOADED_LINKS)
+            ]
+        )
+        db.session.commit()
+
+    deadline = time.monotonic() + seconds
+    workers = [(reader, Counter()) for _ in range(readers)]
+    workers += [(writer, Counter()) for _ in range(writers)]
+    threads = [
+        threading.Thread(target=target, args=(deadline, counters))
+        for target, counters in workers
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    counters = sum((counters for _, counters in workers), Counter())
+
+    journal = app.config['SQLITE_JOURNAL_MODE']
+    print(f'journal_mode={journal}, читателей {readers}, '
+          f'писателей {writers}, {seconds} с')
+    print(f'  чтение: {counters["reads"] / seconds:8.0f} оп/с, '
+          f'ошибок {counters["read_errors"]}')
+    print(f'  запись: {counters["writes"] / seconds:8.0f} оп/с, '
+          f'ошибок {counters["write_errors"]}')
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:3]), *map(float, sys.argv[3:4]))
@@ -0,0 +1,39 @@
+"""Add uploaded_file for upload deduplication
+
+Revision ID: 335309b9de0f
+Revises: f2d6c8a4b913
+Create Date: 2026-10-18 04:50:07.686820
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '335309b9de0f'
+down_revision = 'f2d6c8a4b913'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('uploaded_file',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('digest', sa.String(length=64), nullable=False),
+    sa.Column('size', sa.BigInteger(), nullable=False),
+    sa.Column('prefix', sa.String(length=64), nullable=False),
+    sa.Column('location', sa.String(length=2048), nullable=False),
+    sa.Column('short', sa.String(length=16), nullable=False),
+    sa.Column('timestamp', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('digest', 'size')
+    )
+    with op.batch_alter_table('uploaded_file', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_uploaded_file_prefix'), ['prefix'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('uploaded_file', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_uploaded_file_prefix'))
+
+    op.drop_table('uploaded_file')
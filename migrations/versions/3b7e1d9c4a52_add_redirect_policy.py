@@ -0,0 +1,26 @@
+"""Add redirect policy to URLMap
+
+Revision ID: 3b7e1d9c4a52
+Revises: f89b827348c9
+Create Date: 2026-10-18 10:12:41.503218
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b7e1d9c4a52'
+down_revision = 'f89b827348c9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('url_map', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('permanent', sa.Boolean(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('url_map', schema=None) as batch_op:
+        batch_op.drop_column('permanent')
@@ -0,0 +1,72 @@
+"""Index URLMap.original by a fixed-width digest
+
+Revision ID: 5d9a2c7e1f34
+Revises: 8c2f6a0d5e17
+Create Date: 2026-10-18 11:48:03.271945
+
+"""
+from hashlib import blake2b
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d9a2c7e1f34'
+down_revision = '8c2f6a0d5e17'
+branch_labels = None
+depends_on = None
+
+DIGEST_SIZE = 16
+BATCH_SIZE = 1000
+
+url_map = sa.table(
+    'url_map',
+    sa.column('id', sa.Integer),
+    sa.column('original', sa.String),
+    sa.column('original_hash', sa.LargeBinary),
+)
+
+
+def upgrade():
+    with op.batch_alter_table('url_map', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('original_hash', sa.LargeBinary(length=DIGEST_SIZE), nullable=True))
+
+    connection = op.get_bind()
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.select(url_map.c.id, url_map.c.original)
+            .where(url_map.c.id > last_id)
+            .order_by(url_map.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        connection.execute(
+            url_map.update()
+            .where(url_map.c.id == sa.bindparam('row_id'))
+            .values(original_hash=sa.bindparam('digest')),
+            [
+                {
+                    'row_id': row_id,
+                    'digest': blake2b(
+                        original.encode(), digest_size=DIGEST_SIZE
+                    ).digest(),
+                }
+                for row_id, original in rows
+            ]
+        )
+        last_id = rows[-1][0]
+
+    with op.batch_alter_table('url_map', schema=None) as batch_op:
+        batch_op.alter_column('original_hash', existing_type=sa.LargeBinary(length=DIGEST_SIZE), nullable=False)
+        batch_op.drop_index('ix_url_map_original')
+        batch_op.create_index(batch_op.f('ix_url_map_original_hash'), ['original_hash'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('url_map', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_url_map_original_hash'))
+        batch_op.create_index('ix_url_map_original', ['original'], unique=False)
+        batch_op.drop_column('original_hash')
@@ -0,0 +1,31 @@
+"""Index click rollup buckets
+
+Revision ID: 6ee2cce0b7a0
+Revises: c4d1e8f05a27
+Create Date: 2026-10-18 13:05:12.381904
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '6ee2cce0b7a0'
+down_revision = 'c4d1e8f05a27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('click_daily', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_click_daily_bucket'), ['bucket'], unique=False)
+
+    with op.batch_alter_table('click_hourly', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_click_hourly_bucket'), ['bucket'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('click_hourly', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_click_hourly_bucket'))
+
+    with op.batch_alter_table('click_daily', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_click_daily_bucket'))
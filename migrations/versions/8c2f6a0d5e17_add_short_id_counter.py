@@ -0,0 +1,28 @@
+"""Add short ID counter
+
+Revision ID: 8c2f6a0d5e17
+Revises: 3b7e1d9c4a52
+Create Date: 2026-10-18 11:04:27.918364
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c2f6a0d5e17'
+down_revision = '3b7e1d9c4a52'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('short_id_counter',
+    sa.Column('name', sa.String(length=16), nullable=False),
+    sa.Column('value', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade():
+    op.drop_table('short_id_counter')
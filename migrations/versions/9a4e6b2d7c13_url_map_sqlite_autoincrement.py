@@ -0,0 +1,44 @@
+"""Use AUTOINCREMENT for url_map ids on SQLite
+
+Revision ID: 9a4e6b2d7c13
+Revises: 335309b9de0f
+Create Date: 2026-10-18 09:12:41.204518
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '9a4e6b2d7c13'
+down_revision = '335309b9de0f'
+branch_labels = None
+depends_on = None
+
+# Счетчик продолжается с наибольшего id, в том числе из архива.
+SEED_SEQUENCE = """
+INSERT INTO sqlite_sequence (name, seq)
+SELECT 'url_map', max(
+    coalesce((SELECT max(id) FROM url_map), 0),
+    coalesce((SELECT max(id) FROM url_map_archive), 0)
+)
+"""
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    with op.batch_alter_table(
+        'url_map',
+        recreate='always',
+        table_kwargs={'sqlite_autoincrement': True}
+    ):
+        pass
+    op.execute("DELETE FROM sqlite_sequence WHERE name = 'url_map'")
+    op.execute(SEED_SEQUENCE)
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    with op.batch_alter_table('url_map', recreate='always'):
+        pass
@@ -0,0 +1,38 @@
+"""Add hourly and daily click rollup tables
+
+Revision ID: a7c3e5f19b42
+Revises: e41b7a3c9d20
+Create Date: 2026-10-18 15:21:09.604117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7c3e5f19b42'
+down_revision = 'e41b7a3c9d20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('click_daily',
+    sa.Column('link_id', sa.Integer(), nullable=False),
+    sa.Column('bucket', sa.DateTime(), nullable=False),
+    sa.Column('clicks', sa.BigInteger(), nullable=False),
+    sa.ForeignKeyConstraint(['link_id'], ['url_map.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('link_id', 'bucket')
+    )
+    op.create_table('click_hourly',
+    sa.Column('link_id', sa.Integer(), nullable=False),
+    sa.Column('bucket', sa.DateTime(), nullable=False),
+    sa.Column('clicks', sa.BigInteger(), nullable=False),
+    sa.ForeignKeyConstraint(['link_id'], ['url_map.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('link_id', 'bucket')
+    )
+
+
+def downgrade():
+    op.drop_table('click_hourly')
+    op.drop_table('click_daily')
@@ -0,0 +1,48 @@
+"""Add disk_location for links to uploaded files
+
+Revision ID: c4d1e8f05a27
+Revises: 9a4e6b2d7c13
+Create Date: 2026-10-18 11:27:53.418062
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4d1e8f05a27'
+down_revision = '9a4e6b2d7c13'
+branch_labels = None
+depends_on = None
+
+# Файлами считаются только ссылки, записанные сервером при загрузке:
+# исходная ссылка с префиксом disk: могла прийти от пользователя.
+BACKFILL = """
+UPDATE url_map SET disk_location = (
+    SELECT uploaded_file.location FROM uploaded_file
+    WHERE uploaded_file.short = url_map.short
+)
+WHERE url_map.original LIKE 'disk:%' AND url_map.short IN (
+    SELECT short FROM uploaded_file
+)
+"""
+
+
+def upgrade():
+    for table in ('url_map', 'url_map_archive'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(
+                sa.Column('disk_location', sa.String(length=2048),
+                          nullable=True)
+            )
+    op.execute(BACKFILL)
+
+
+def downgrade():
+    with op.batch_alter_table('url_map_archive', schema=None) as batch_op:
+        batch_op.drop_column('disk_location')
+    # Пересоздание таблицы на SQLite не должно терять AUTOINCREMENT.
+    with op.batch_alter_table(
+        'url_map', schema=None, table_kwargs={'sqlite_autoincrement': True}
+    ) as batch_op:
+        batch_op.drop_column('disk_location')
@@ -0,0 +1,28 @@
+"""Add optional link expiry
+
+Revision ID: c5f8b1d3e607
+Revises: a7c3e5f19b42
+Create Date: 2026-10-18 16:40:52.913376
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5f8b1d3e607'
+down_revision = 'a7c3e5f19b42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('url_map', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('expires_at', sa.DateTime(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_url_map_expires_at'), ['expires_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('url_map', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_url_map_expires_at'))
+        batch_op.drop_column('expires_at')
@@ -0,0 +1,29 @@
+"""Add click_stats table for write-behind click counting
+
+Revision ID: e41b7a3c9d20
+Revises: 5d9a2c7e1f34
+Create Date: 2026-10-18 14:02:37.518204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e41b7a3c9d20'
+down_revision = '5d9a2c7e1f34'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('click_stats',
+    sa.Column('short', sa.String(length=16), nullable=False),
+    sa.Column('clicks', sa.BigInteger(), nullable=False),
+    sa.Column('last_click', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('short')
+    )
+
+
+def downgrade():
+    op.drop_table('click_stats')
@@ -0,0 +1,56 @@
+"""Add url_map_archive and detach click rollups from url_map
+
+Revision ID: f2d6c8a4b913
+Revises: c5f8b1d3e607
+Create Date: 2026-10-18 17:55:14.208361
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2d6c8a4b913'
+down_revision = 'c5f8b1d3e607'
+branch_labels = None
+depends_on = None
+
+ROLLUP_TABLES = ('click_hourly', 'click_daily')
+# Имена для безымянных внешних ключей SQLite в режиме batch.
+NAMING_CONVENTION = {
+    'fk': 'fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s',
+}
+
+
+def rollup_fk_name(table):
+    for foreign_key in sa.inspect(op.get_bind()).get_foreign_keys(table):
+        if foreign_key['referred_table'] == 'url_map':
+            return foreign_key['name'] or f'fk_{table}_link_id_url_map'
+    return None
+
+
+def upgrade():
+    op.create_table('url_map_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('original', sa.String(length=2048), nullable=False),
+    sa.Column('short', sa.String(length=16), nullable=False),
+    sa.Column('permanent', sa.Boolean(), nullable=True),
+    sa.Column('timestamp', sa.DateTime(), nullable=True),
+    sa.Column('expires_at', sa.DateTime(), nullable=True),
+    sa.Column('archived_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('short')
+    )
+    for table in ROLLUP_TABLES:
+        name = rollup_fk_name(table)
+        if name is None:
+            continue
+        with op.batch_alter_table(table, schema=None, naming_convention=NAMING_CONVENTION) as batch_op:
+            batch_op.drop_constraint(name, type_='foreignkey')
+
+
+def downgrade():
+    for table in ROLLUP_TABLES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.create_foreign_key(f'fk_{table}_link_id_url_map', 'url_map', ['link_id'], ['id'], ondelete='CASCADE')
+    op.drop_table('url_map_archive')
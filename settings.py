@@ -11,4 +11,87 @@ class Config(object):
     """Задание настроект для Flask."""
 
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URI')
+    ASYNC_DATABASE_URI = os.getenv('ASYNC_DATABASE_URI')
+    DATABASE_READ_URIS = [
+        uri for uri in os.getenv('DATABASE_READ_URIS', '').split(',') if uri
+    ]
+    REPLICA_STICKINESS = float(os.getenv('REPLICA_STICKINESS', 5))
+    DATABASE_POOL_SIZE = int(os.getenv('DATABASE_POOL_SIZE', 5))
+    DATABASE_MAX_OVERFLOW = int(os.getenv('DATABASE_MAX_OVERFLOW', 10))
+    DATABASE_POOL_TIMEOUT = float(os.getenv('DATABASE_POOL_TIMEOUT', 30))
+    DATABASE_POOL_RECYCLE = int(os.getenv('DATABASE_POOL_RECYCLE', 3600))
+    SQLITE_JOURNAL_MODE = os.getenv('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_BUSY_TIMEOUT = os.getenv('SQLITE_BUSY_TIMEOUT', '5000')
+    SQLITE_CACHE_SIZE = os.getenv('SQLITE_CACHE_SIZE', '-64000')
+    SQLITE_MMAP_SIZE = os.getenv('SQLITE_MMAP_SIZE', '268435456')
     SECRET_KEY = os.getenv('SECRET_KEY', 'default_value')
+    SHORT_ID_CACHE_SIZE = int(os.getenv('SHORT_ID_CACHE_SIZE', 10000))
+    SHORT_ID_CACHE_TTL = float(os.getenv('SHORT_ID_CACHE_TTL', 300))
+    SHORT_ID_FILTER_CAPACITY = int(
+        os.getenv('SHORT_ID_FILTER_CAPACITY', 1_000_000)
+    )
+    SHORT_ID_FILTER_ERROR_RATE = float(
+        os.getenv('SHORT_ID_FILTER_ERROR_RATE', 0.001)
+    )
+    SHORT_ID_ALLOCATOR = os.getenv('SHORT_ID_ALLOCATOR', 'random')
+    SHORT_ID_BLOCK_SIZE = int(os.getenv('SHORT_ID_BLOCK_SIZE', 1000))
+    SHORT_ID_MULTIPLIER = int(os.getenv('SHORT_ID_MULTIPLIER', 15485863))
+    SHORT_ID_OFFSET = int(os.getenv('SHORT_ID_OFFSET', 1234567890))
+    SHORT_ID_POOL_SIZE = int(os.getenv('SHORT_ID_POOL_SIZE', 0))
+    SHORT_ID_POOL_LOW_WATER = int(os.getenv('SHORT_ID_POOL_LOW_WATER', 0))
+    BULK_MAX_ITEMS = int(os.getenv('BULK_MAX_ITEMS', 10000))
+    REUSE_EXISTING_LINKS = os.getenv('REUSE_EXISTING_LINKS', '') == 'True'
+    REDIRECT_PERMANENT = os.getenv('REDIRECT_PERMANENT', '') == 'True'
+    REDIRECT_MAX_AGE = int(os.getenv('REDIRECT_MAX_AGE', 0))
+    SHORT_ID_FILTER_REFRESH = float(os.getenv('SHORT_ID_FILTER_REFRESH', 5))
+    SHORT_ID_FILTER_LOOKBACK = int(
+        os.getenv('SHORT_ID_FILTER_LOOKBACK', 1000)
+    )
+    SHORT_ID_FILTER_CONFIRM_INTERVAL = float(
+        os.getenv('SHORT_ID_FILTER_CONFIRM_INTERVAL', 1)
+    )
+    SHORT_ID_FILTER_BACKGROUND = (
+        os.getenv('SHORT_ID_FILTER_BACKGROUND', 'True') == 'True'
+    )
+    CLICK_FLUSH_INTERVAL = float(os.getenv('CLICK_FLUSH_INTERVAL', 5))
+    CLICK_BUFFER_LIMIT = int(os.getenv('CLICK_BUFFER_LIMIT', 10000))
+    CLICK_HOURLY_RETENTION_DAYS = int(
+        os.getenv('CLICK_HOURLY_RETENTION_DAYS', 30)
+    )
+    CLICK_DAILY_RETENTION_DAYS = int(
+        os.getenv('CLICK_DAILY_RETENTION_DAYS', 0)
+    )
+    ARCHIVE_IDLE_DAYS = int(os.getenv('ARCHIVE_IDLE_DAYS', 30))
+    DISK_POOL_LIMIT = int(os.getenv('DISK_POOL_LIMIT', 100))
+    DISK_POOL_LIMIT_PER_HOST = int(os.getenv('DISK_POOL_LIMIT_PER_HOST', 20))
+    DISK_KEEPALIVE_TIMEOUT = float(os.getenv('DISK_KEEPALIVE_TIMEOUT', 30))
+    DISK_DNS_CACHE_TTL = int(os.getenv('DISK_DNS_CACHE_TTL', 300))
+    DISK_MAX_CONCURRENCY = int(os.getenv('DISK_MAX_CONCURRENCY', 32))
+    DISK_UPLOAD_URL_CONCURRENCY = int(
+        os.getenv('DISK_UPLOAD_URL_CONCURRENCY', 8)
+    )
+    DISK_STREAM_CHUNK_SIZE = int(os.getenv('DISK_STREAM_CHUNK_SIZE', 65536))
+    DISK_STREAM_MEMORY_LIMIT = int(
+        os.getenv('DISK_STREAM_MEMORY_LIMIT', 1048576)
+    )
+    DISK_API_TIMEOUT = float(os.getenv('DISK_API_TIMEOUT', 10))
+    DISK_UPLOAD_TIMEOUT = float(os.getenv('DISK_UPLOAD_TIMEOUT', 60))
+    DISK_RETRY_ATTEMPTS = int(os.getenv('DISK_RETRY_ATTEMPTS', 3))
+    DISK_RETRY_BASE_DELAY = float(os.getenv('DISK_RETRY_BASE_DELAY', 0.2))
+    DISK_RETRY_MAX_DELAY = float(os.getenv('DISK_RETRY_MAX_DELAY', 5))
+    DISK_BREAKER_THRESHOLD = int(os.getenv('DISK_BREAKER_THRESHOLD', 5))
+    DISK_BREAKER_RESET = float(os.getenv('DISK_BREAKER_RESET', 30))
+    DISK_LINK_CACHE_SIZE = int(os.getenv('DISK_LINK_CACHE_SIZE', 10000))
+    DISK_LINK_TTL = float(os.getenv('DISK_LINK_TTL', 1800))
+    DISK_LINK_REFRESH_AHEAD = float(os.getenv('DISK_LINK_REFRESH_AHEAD', 0.8))
+    UPLOAD_DEDUP = os.getenv('UPLOAD_DEDUP', 'True') == 'True'
+    DEDUP_PREFIX_SIZE = int(os.getenv('DEDUP_PREFIX_SIZE', 65536))
+    DISK_UPLOAD_CONCURRENCY = int(os.getenv('DISK_UPLOAD_CONCURRENCY', 4))
+    DISK_STREAM_UPLOADS = os.getenv('DISK_STREAM_UPLOADS', 'True') == 'True'
+    DISK_STREAM_UPLOAD_CONCURRENCY = int(
+        os.getenv('DISK_STREAM_UPLOAD_CONCURRENCY', 32)
+    )
+    DISK_DOWNLOAD_URL_CONCURRENCY = int(
+        os.getenv('DISK_DOWNLOAD_URL_CONCURRENCY', 8)
+    )
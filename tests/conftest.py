@@ -16,6 +16,8 @@ sys.path.append(str(BASE_DIR))
 _user_environment = os.environ.copy()
 _tmp_db_uri = 'sqlite:///:memory:'
 os.environ['DATABASE_URI'] = _tmp_db_uri
+os.environ['CLICK_FLUSH_INTERVAL'] = '0'
+os.environ['SHORT_ID_FILTER_BACKGROUND'] = 'False'
 os.environ['DISK_TOKEN'] = 'y0_nbfoiu3445tno35_fd09v854bn2_cs0e8hrb4k'
 
 PY_URL = 'https://www.python.org'
@@ -27,7 +29,12 @@ pytest_plugins = [
 
 try:
     from yacut import app, db
+    from yacut.allocators import reset_allocators
+    from yacut.clicks import click_counter
+    from yacut.http_client import disk_client
+    from yacut.lookup import clear_caches
     from yacut.models import URLMap  # noqa
+    from yacut.resilience import disk_api
 except NameError as exc:
     raise AssertionError(
         'При попытке импорта объекта приложения вознакло исключение: '
@@ -70,6 +77,11 @@ def _app():
         yield app
         db.drop_all()
         db.session.close()
+        clear_caches()
+        reset_allocators()
+        click_counter.clear()
+        disk_client.close()
+        disk_api.clear()
 
 
 @pytest.fixture
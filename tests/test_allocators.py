@@ -0,0 +1,115 @@
+import pytest
+
+from tests.conftest import PY_URL
+from yacut import db
+from yacut.allocators import (
+    PooledAllocator, RandomAllocator, SequenceAllocator, ShortIDAllocator,
+    from_base62, get_allocator, to_base62
+)
+from yacut.models import ShortIDCounter, URLMap
+
+CREATE_SHORT_LINK_URL = '/api/id/'
+
+
+@pytest.mark.parametrize('number', [0, 1, 61, 62, 3843, 10 ** 12])
+def test_base62_roundtrip(number):
+    assert from_base62(to_base62(number, 6)) == number
+    assert len(to_base62(number, 6)) >= 6
+
+
+def test_permutation_is_bijective():
+    allocator = SequenceAllocator(
+        block_size=10, multiplier=15485863, offset=77, length=2
+    )
+    encoded = {allocator.encode(number) for number in range(62 ** 2)}
+    assert len(encoded) == 62 ** 2, (
+        'Перестановка номеров должна быть взаимно однозначной.'
+    )
+
+
+@pytest.mark.parametrize('kwargs', [
+    {'block_size': 0}, {'block_size': 10, 'multiplier': 62},
+])
+def test_sequence_allocator_invalid_params(kwargs):
+    with pytest.raises(ValueError):
+        SequenceAllocator(**kwargs)
+
+
+def test_sequence_allocator_reserves_blocks(_app):
+    allocator = SequenceAllocator(block_size=3, multiplier=15485863)
+    ids = [allocator.allocate() for _ in range(7)]
+    assert len(set(ids)) == 7, (
+        'Последовательная стратегия не должна выдавать повторяющиеся ссылки.'
+    )
+    assert all(len(short) == 6 for short in ids)
+    assert ShortIDCounter.query.get('short_id').value == 9, (
+        'Номера должны резервироваться в БД блоками заданного размера.'
+    )
+
+
+def test_sequence_allocator_keeps_request_session(_app):
+    allocator = SequenceAllocator(block_size=5)
+    db.session.add(URLMap(original=PY_URL, short='pending'))
+    allocator.allocate()
+    db.session.rollback()
+    assert URLMap.query.count() == 0, (
+        'Резервирование блока не должно фиксировать сессию запроса.'
+    )
+
+
+def test_allocator_is_abstract():
+    with pytest.raises(TypeError):
+        ShortIDAllocator()
+
+
+def test_sequence_allocator_skips_taken_ids(_app):
+    allocator = SequenceAllocator(block_size=5)
+    db.session.add(URLMap(original=PY_URL, short=allocator.encode(0)))
+    db.session.commit()
+    assert allocator.allocate() == allocator.encode(1)
+
+
+def test_api_uses_configured_allocator(client, monkeypatch):
+    monkeypatch.setitem(
+        client.application.config, 'SHORT_ID_ALLOCATOR', 'sequence'
+    )
+    shorts = []
+    for _ in range(3):
+        response = client.post(CREATE_SHORT_LINK_URL, json={'url': PY_URL})
+        shorts.append(response.json['short_link'].rsplit('/', 1)[-1])
+    assert len(set(shorts)) == 3
+    assert URLMap.query.count() == 3
+
+
+def test_unknown_allocator(_app):
+    with pytest.raises(ValueError):
+        get_allocator('unknown')
+
+
+def test_pool_pops_prevalidated_ids(_app):
+    pool = PooledAllocator(
+        RandomAllocator(), size=5, low_water=2, background=False
+    )
+    pool.refill()
+    assert pool.stats()['depth'] == 5
+    ids = [pool.allocate() for _ in range(3)]
+    assert len(set(ids)) == 3
+    assert pool.stats()['depth'] == 5, (
+        'Пул должен пополняться, когда его глубина опускается до порога.'
+    )
+    assert pool.stats()['empty_pops'] == 0
+
+
+def test_pool_falls_back_when_empty(_app):
+    pool = PooledAllocator(
+        RandomAllocator(), size=3, low_water=0, background=False
+    )
+    assert len(pool.allocate()) == 6
+    assert pool.stats()['empty_pops'] == 1
+    assert pool.stats()['depth'] == 3
+
+
+@pytest.mark.parametrize('size, low_water', [(0, 0), (3, 3), (3, -1)])
+def test_pool_invalid_params(size, low_water):
+    with pytest.raises(ValueError):
+        PooledAllocator(RandomAllocator(), size, low_water)
@@ -0,0 +1,106 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from tests.conftest import PY_URL
+from yacut import db
+from yacut.archive import archive_cold_links
+from yacut.error_handlers import ErrorInURLNaming
+from yacut.lookup import clear_caches, get_link, short_id_exists
+from yacut.models import ClickDaily, ClickStats, URLMap, URLMapArchive
+from yacut.utils import get_unique_short_id
+
+NOW = datetime.now(timezone.utc).replace(tzinfo=None)
+OLD = NOW - timedelta(days=60)
+
+
+def add_link(short, timestamp=OLD, **fields):
+    link = URLMap(original=f'{PY_URL}/{short}', short=short,
+                  timestamp=timestamp, **fields)
+    db.session.add(link)
+    db.session.commit()
+    return link
+
+
+@pytest.fixture
+def archived(_app):
+    link_id = add_link('cold').id
+    add_link('newest', NOW)
+    assert list(archive_cold_links(30)) == [1]
+    return link_id
+
+
+def test_only_cold_links_archived(_app):
+    add_link('cold')
+    add_link('clicked')
+    add_link('recent', NOW - timedelta(days=1))
+    add_link('expiring', expires_at=NOW + timedelta(days=1))
+    db.session.add(ClickStats(short='clicked', clicks=1,
+                              last_click=NOW - timedelta(days=1)))
+    db.session.commit()
+    moved = sum(archive_cold_links(30, batch_size=1))
+    assert moved == 1
+    assert [row.short for row in URLMapArchive.query] == ['cold'], (
+        'В архив должны попадать только ссылки без переходов '
+        'за период простоя.'
+    )
+
+
+def test_archived_link_promoted_on_hit(client, archived):
+    assert URLMap.query.filter_by(short='cold').count() == 0
+    response = client.get('/cold')
+    assert response.status_code == 302
+    assert response.location == f'{PY_URL}/cold'
+    link = URLMap.query.filter_by(short='cold').one()
+    assert link.id == archived, (
+        'Ссылка из архива должна возвращаться в url_map с прежним id.'
+    )
+    assert URLMapArchive.query.count() == 0
+
+
+def test_archive_visible_after_filter_reload(_app, archived):
+    clear_caches()
+    assert get_link('cold') is not None, (
+        'Фильтр Блума должен загружать короткие ссылки из архива.'
+    )
+
+
+def test_archived_short_id_stays_taken(_app, archived):
+    assert short_id_exists('cold')
+    with pytest.raises(ErrorInURLNaming):
+        get_unique_short_id(PY_URL, 'cold')
+
+
+def test_export_includes_archive(cli_runner, archived):
+    result = cli_runner.invoke(args=['links', 'export'])
+    assert '"custom_id": "cold"' in result.output
+    assert '"custom_id": "newest"' in result.output
+
+
+
+def test_stats_of_archived_link(client, archived):
+    bucket = OLD.replace(hour=0, minute=0, second=0, microsecond=0)
+    db.session.add(ClickDaily(link_id=archived, bucket=bucket, clicks=3))
+    db.session.commit()
+    response = client.get('/api/id/cold/stats/', query_string={
+        'granularity': 'day',
+        'from': (bucket - timedelta(days=1)).isoformat(),
+        'to': NOW.isoformat(),
+    })
+    assert response.status_code == 200, (
+        'Статистика архивной ссылки должна быть доступна.'
+    )
+    assert response.json['total'] == 3
+    assert URLMap.query.filter_by(short='cold').count() == 0, (
+        'Запрос статистики не должен возвращать ссылку из архива.'
+    )
+
+
+def test_archived_id_not_reused(client, _app):
+    link_id = add_link('cold').id
+    assert list(archive_cold_links(30)) == [1]
+    assert add_link('fresh', NOW).id > link_id, (
+        'Id ссылки из архива не должен выдаваться новой ссылке.'
+    )
+    assert client.get('/cold').status_code == 302
+    assert URLMap.query.filter_by(short='cold').one().id == link_id
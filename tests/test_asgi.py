@@ -0,0 +1,114 @@
+from http import HTTPStatus
+
+from tests.conftest import PY_URL
+from yacut import app, db, disk_links
+from yacut.asgi import RedirectRouter
+from yacut.clicks import click_counter
+from yacut.error_handlers import AsyncGetDownloadURLError
+from yacut.models import URLMap
+
+
+class FallbackApp:
+    """ASGI-заглушка, фиксирующая переданные ей запросы."""
+
+    def __init__(self):
+        self.paths = []
+
+    async def __call__(self, scope, receive, send):
+        self.paths.append(scope['path'])
+        await send({'type': 'http.response.start', 'status': 418,
+                    'headers': []})
+        await send({'type': 'http.response.body', 'body': b''})
+
+
+async def call_asgi(asgi_app, path, method='GET'):
+    scope = {
+        'type': 'http',
+        'method': method,
+        'path': path,
+        'root_path': '',
+        'query_string': b'',
+        'headers': [],
+    }
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    await asgi_app(scope, receive, send)
+    start, body = messages
+    return start['status'], dict(start['headers']), body['body']
+
+
+async def test_native_redirect(_app, short_python_url):
+    fallback = FallbackApp()
+    router = RedirectRouter(app, fallback)
+    status, headers, _ = await call_asgi(router, f'/{short_python_url.short}')
+    assert status == HTTPStatus.FOUND, (
+        'ASGI-приложение должно отвечать на короткую ссылку перенаправлением.'
+    )
+    assert headers[b'location'] == PY_URL.encode()
+    assert not fallback.paths, (
+        'Перенаправление не должно передаваться в приложение Flask.'
+    )
+    assert click_counter.pending(short_python_url.short) == 1, (
+        'Переход через ASGI должен учитываться в счетчике переходов.'
+    )
+
+
+async def test_native_api_lookup(_app, short_python_url):
+    router = RedirectRouter(app, FallbackApp())
+    status, headers, body = await call_asgi(
+        router, f'/api/id/{short_python_url.short}/'
+    )
+    assert status == HTTPStatus.OK
+    assert headers[b'content-type'] == b'application/json'
+    assert app.json.loads(body) == {'url': PY_URL}
+
+
+async def test_other_requests_go_to_flask(_app, short_python_url):
+    fallback = FallbackApp()
+    router = RedirectRouter(app, fallback)
+    paths = ['/', '/files', '/api/id/', '/missing', '/api/id/missing/']
+    for path in paths:
+        await call_asgi(router, path)
+    await call_asgi(router, f'/{short_python_url.short}', method='POST')
+    assert fallback.paths == paths + [f'/{short_python_url.short}'], (
+        'Все запросы, кроме найденных коротких ссылок, должны передаваться '
+        'в приложение Flask.'
+    )
+
+
+async def test_native_disk_link(_app, monkeypatch):
+    async def fetch(session, location):
+        if location == '/broken.txt':
+            raise AsyncGetDownloadURLError
+        return f'https://downloader.disk.yandex.ru{location}'
+
+    monkeypatch.setattr(disk_links, 'fetch_download_url', fetch)
+    db.session.add_all([
+        URLMap(
+            original='disk:/file.txt', short='file',
+            disk_location='/file.txt'
+        ),
+        URLMap(
+            original='disk:/broken.txt', short='broken',
+            disk_location='/broken.txt'
+        ),
+    ])
+    db.session.commit()
+    fallback = FallbackApp()
+    router = RedirectRouter(app, fallback)
+    status, headers, _ = await call_asgi(router, '/file')
+    assert status == HTTPStatus.FOUND
+    assert headers[b'location'] == (
+        b'https://downloader.disk.yandex.ru/file.txt'
+    ), 'Файл Диска должен перенаправлять на ссылку на скачивание.'
+    status, _, _ = await call_asgi(router, '/broken')
+    assert fallback.paths == ['/broken'], (
+        'Ошибку получения ссылки на скачивание должно формировать '
+        'приложение Flask.'
+    )
@@ -0,0 +1,89 @@
+import asyncio
+import threading
+
+import pytest
+from sqlalchemy import create_engine
+
+from tests.conftest import PY_URL
+from yacut import async_db, db
+from yacut.async_db import AsyncDatabase, async_database_url
+from yacut.models import URLMap
+
+
+@pytest.mark.parametrize('url, expected', [
+    ('sqlite:////tmp/yacut.db', 'sqlite+aiosqlite:////tmp/yacut.db'),
+    ('postgresql://u:p@db/yacut', 'postgresql+asyncpg://u:p@db/yacut'),
+    ('postgresql+asyncpg://u:p@db/yacut',
+     'postgresql+asyncpg://u:p@db/yacut'),
+    ('mysql://u:p@db/yacut', 'mysql+aiomysql://u:p@db/yacut'),
+    ('sqlite:///:memory:', None),
+    ('sqlite://', None),
+    ('oracle://u:p@db/yacut', None),
+    (None, None),
+])
+def test_async_database_url(url, expected, monkeypatch):
+    monkeypatch.setattr(async_db, 'driver_installed', lambda name: True)
+    result = async_database_url(url)
+    assert (None if result is None else result.render_as_string(False)) == (
+        expected
+    ), 'Адрес БД для асинхронного драйвера определяется неверно.'
+
+
+@pytest.fixture
+def file_db(tmp_path):
+    url = f'sqlite:///{tmp_path / "yacut.db"}'
+    engine = create_engine(url)
+    db.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+def test_missing_driver_not_used(monkeypatch):
+    monkeypatch.setattr(async_db, 'driver_installed', lambda name: False)
+    assert async_database_url('postgresql://u:p@db/yacut') is None, (
+        'Без установленного драйвера ссылки должны сохраняться в потоке.'
+    )
+
+
+async def test_concurrent_batches(_app, file_db):
+    database = AsyncDatabase(async_database_url(str(file_db.url)))
+    batches = await asyncio.gather(*(
+        database.insert_links([f'{PY_URL}/{number}'] * 4)
+        for number in range(5)
+    ))
+    shorts = [short for batch in batches for short in batch]
+    assert len(set(shorts)) == 20
+    with file_db.connect() as connection:
+        rows = connection.execute(URLMap.__table__.select()).all()
+    assert len(rows) == 20, (
+        'Параллельные вставки через асинхронный движок должны сохранить '
+        'все ссылки без общей блокировки.'
+    )
+
+
+async def test_allocation_off_event_loop(_app, file_db, monkeypatch):
+    loop_thread = threading.current_thread()
+    threads = []
+
+    class RecordingAllocator:
+
+        def allocate(self):
+            threads.append(threading.current_thread())
+            return f'id{len(threads)}'
+
+    monkeypatch.setattr(async_db, 'get_allocator', RecordingAllocator)
+    database = AsyncDatabase(async_database_url(str(file_db.url)))
+    await database.insert_links([PY_URL, PY_URL])
+    assert threads and loop_thread not in threads, (
+        'Синхронные запросы стратегии не должны выполняться в цикле событий.'
+    )
+
+
+async def test_batch_inserted_in_one_transaction(_app, file_db):
+    database = AsyncDatabase(async_database_url(str(file_db.url)))
+    urls = [f'{PY_URL}/{number}' for number in range(5)]
+    shorts = await database.insert_links(urls)
+    assert len(set(shorts)) == 5
+    with file_db.connect() as connection:
+        rows = connection.execute(URLMap.__table__.select()).all()
+    assert sorted(row.original for row in rows) == sorted(urls)
@@ -0,0 +1,127 @@
+import threading
+import time
+
+import pytest
+from sqlalchemy import event, insert
+
+from tests.conftest import PY_URL
+from yacut import db
+from yacut.allocators import RandomAllocator
+from yacut.bloom import BloomFilter
+from yacut.lookup import ShortIDFilter, get_link, short_id_filter
+from yacut.models import URLMap
+
+
+def test_bloom_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    keys = [f'key{number}' for number in range(1000)]
+    bloom.update(keys)
+    assert all(key in bloom for key in keys), (
+        'Фильтр Блума не должен давать ложноотрицательных ответов.'
+    )
+    false_positives = sum(
+        f'other{number}' in bloom for number in range(1000)
+    )
+    assert false_positives < 50, (
+        'Доля ложноположительных ответов фильтра превышает ожидаемую.'
+    )
+
+
+@pytest.mark.parametrize('capacity, error_rate', [(0, 0.1), (10, 0), (10, 1)])
+def test_bloom_invalid_params(capacity, error_rate):
+    with pytest.raises(ValueError):
+        BloomFilter(capacity, error_rate)
+
+
+def test_unknown_short_id_skips_database(client):
+    rejected = short_id_filter.rejected
+    response = client.get('/api/id/unknownid/')
+    assert response.status_code == 404
+    assert short_id_filter.rejected == rejected + 1, (
+        'Запрос несуществующей короткой ссылки должен отсекаться фильтром '
+        'без обращения к базе данных.'
+    )
+
+
+def test_inserted_short_id_in_filter(client, short_python_url):
+    assert short_id_filter.might_contain(short_python_url.short), (
+        'Сохраненная короткая ссылка должна попадать в фильтр.'
+    )
+    assert client.get(f'/{short_python_url.short}').status_code == 302
+
+
+def test_generate_short_id_uses_filter(client):
+    rejected = short_id_filter.rejected
+    RandomAllocator().allocate()
+    assert short_id_filter.rejected > rejected
+
+
+def insert_raw(short, **values):
+    """Вставка в обход ORM, как это делает другой процесс."""
+    db.session.execute(
+        insert(URLMap.__table__).values(original=PY_URL, short=short, **values)
+    )
+    db.session.commit()
+
+
+def test_link_from_other_process_found(_app):
+    short_id_filter.might_contain('warmup')
+    insert_raw('fresh')
+    assert get_link('fresh') is not None, (
+        'Ссылка, созданная другим процессом, должна находиться сразу, '
+        'а не после очередной догрузки фильтра.'
+    )
+
+
+def test_out_of_order_commit_loaded(_app, monkeypatch):
+    monkeypatch.setattr(short_id_filter, 'refresh_interval', 0)
+    insert_raw('later', id=10)
+    short_id_filter.might_contain('warmup')
+    insert_raw('earlier', id=5)
+    assert short_id_filter.might_contain('earlier'), (
+        'Запись с меньшим id, зафиксированная позже, должна попасть '
+        'в фильтр при догрузке.'
+    )
+
+
+def test_rejected_lookups_share_max_id_check(_app, monkeypatch):
+    monkeypatch.setattr(short_id_filter, 'confirm_interval', 60)
+    short_id_filter.might_contain('warmup')
+    executed = []
+
+    def count(conn, cursor, statement, *args):
+        executed.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', count)
+    try:
+        for number in range(5):
+            assert get_link(f'unknown{number}') is None
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count)
+    assert len(executed) == 1, (
+        'Максимальный id должен проверяться не чаще раза в интервал, '
+        'а не при каждой отсеянной ссылке.'
+    )
+
+
+def test_background_load_does_not_block(_app):
+    insert_raw('stored')
+    bloom = ShortIDFilter(100, 0.01, 60, 10, 60, background=True)
+    release = threading.Event()
+    load = bloom._load_new_rows
+
+    def slow_load():
+        release.wait(5)
+        load()
+
+    bloom._load_new_rows = slow_load
+    assert bloom.might_contain('absent'), (
+        'Пока фильтр загружается, он должен отвечать "возможно есть", '
+        'не дожидаясь загрузки.'
+    )
+    release.set()
+    deadline = time.monotonic() + 5
+    while not bloom.stats()['loaded'] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert bloom.might_contain('stored')
+    assert not bloom.might_contain('absent')
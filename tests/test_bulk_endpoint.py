@@ -0,0 +1,103 @@
+from http import HTTPStatus
+
+import pytest
+from sqlalchemy import event
+
+from tests.conftest import PY_URL, TEST_BASE_URL
+from yacut import db
+from yacut.models import URLMap
+
+BULK_URL = '/api/ids/'
+
+
+def test_bulk_create(client, short_python_url):
+    payload = [
+        {'url': PY_URL, 'custom_id': 'first'},
+        {'url': PY_URL},
+        {'url': PY_URL, 'custom_id': short_python_url.short},
+        {'url': PY_URL, 'custom_id': 'first'},
+        {'url': PY_URL, 'custom_id': 'bad-id'},
+        {'custom_id': 'nourl'},
+        'not an object',
+    ]
+    response = client.post(BULK_URL, json=payload)
+    assert response.status_code == HTTPStatus.CREATED
+    results = response.json
+    assert len(results) == len(payload), (
+        'Ответ пакетного эндпоинта должен содержать результат для каждого '
+        'элемента запроса.'
+    )
+    assert results[0] == {
+        'url': PY_URL, 'short_link': f'{TEST_BASE_URL}/first'
+    }
+    assert results[1]['short_link'].startswith(TEST_BASE_URL)
+    assert all('error' in result for result in results[2:]), (
+        'Для занятых, повторяющихся и некорректных элементов должна '
+        'возвращаться ошибка.'
+    )
+    assert URLMap.query.count() == 3
+    assert client.get('/first').location == PY_URL
+
+
+def test_bulk_invalid_url_rejected_per_item(client):
+    payload = [{'url': 5}, {'url': 'x' * 3000}, {'url': PY_URL}]
+    response = client.post(BULK_URL, json=payload)
+    assert response.status_code == HTTPStatus.CREATED
+    results = response.json
+    assert 'error' in results[0] and 'error' in results[1]
+    assert results[2]['short_link'].startswith(TEST_BASE_URL), (
+        'Некорректный элемент не должен мешать сохранению остальных.'
+    )
+
+
+def test_bulk_nothing_created(client):
+    response = client.post(BULK_URL, json=[{'url': 5}, {'custom_id': 'x'}])
+    assert response.status_code == HTTPStatus.BAD_REQUEST, (
+        'Если не создано ни одной ссылки, статус не должен быть 201.'
+    )
+    assert len(response.json) == 2
+    assert URLMap.query.count() == 0
+
+
+def test_bulk_create_single_insert(client):
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith('INSERT'):
+            statements.append(executemany)
+
+    event.listen(db.engine, 'before_cursor_execute', count)
+    try:
+        client.post(BULK_URL, json=[{'url': PY_URL} for _ in range(50)])
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count)
+    assert statements == [True], (
+        'Все ссылки пакета должны вставляться одним executemany.'
+    )
+    assert URLMap.query.count() == 50
+
+
+@pytest.mark.parametrize('payload', [None, {}, [], {'url': PY_URL}])
+def test_bulk_invalid_body(client, payload):
+    response = client.post(BULK_URL, json=payload)
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_bulk_size_limit(client, monkeypatch):
+    monkeypatch.setitem(client.application.config, 'BULK_MAX_ITEMS', 2)
+    response = client.post(BULK_URL, json=[{'url': PY_URL}] * 3)
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert URLMap.query.count() == 0
+
+
+def test_bulk_ignores_server_fields(client):
+    response = client.post(BULK_URL, json=[{
+        'url': PY_URL, 'custom_id': 'plain',
+        'disk_location': '/private.pdf', 'timestamp': '2000-01-01',
+    }])
+    assert response.status_code == 201
+    link = URLMap.query.one()
+    assert link.disk_location is None, (
+        'Поля, которые задает сервер, не принимаются через API.'
+    )
+    assert link.timestamp.year != 2000
@@ -0,0 +1,73 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.conftest import PY_URL
+from yacut.cache import TTLCache
+from yacut.lookup import fetch_target, short_id_cache
+from yacut.utils import get_unique_short_id
+
+METRICS_URL = '/api/metrics/'
+
+
+def test_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    assert cache.get('b') is None, (
+        'При переполнении кэша должна вытесняться запись, к которой дольше '
+        'всего не обращались.'
+    )
+    assert cache.get('a') == 1 and cache.get('c') == 3
+
+
+def test_cache_expires_entries(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr('yacut.cache.time.monotonic', lambda: now[0])
+    cache = TTLCache(maxsize=10, ttl=5)
+    cache.set('a', 1)
+    now[0] += 6
+    assert cache.get('a') is None, (
+        'Запись с истекшим временем жизни не должна возвращаться из кэша.'
+    )
+    assert cache.stats()['misses'] == 1
+
+
+@pytest.mark.parametrize('maxsize, ttl', [(-1, 1), (1.5, 1), (1, -1)])
+def test_cache_invalid_limits(maxsize, ttl):
+    with pytest.raises(ValueError):
+        TTLCache(maxsize=maxsize, ttl=ttl)
+
+
+def test_redirect_served_from_cache(client, short_python_url):
+    client.get(f'/{short_python_url.short}')
+    hits = short_id_cache.hits
+    response = client.get(f'/api/id/{short_python_url.short}/')
+    assert response.json == {'url': PY_URL}
+    assert short_id_cache.hits == hits + 1, (
+        'Повторное обращение к короткой ссылке должно обслуживаться из кэша.'
+    )
+
+
+def test_cache_invalidated_on_create(client):
+    short_id_cache.set('py', 'https://stale.example.com')
+    get_unique_short_id(PY_URL, 'py')
+    response = client.get('/py')
+    assert response.location == PY_URL, (
+        'После создания записи в БД кэш для короткой ссылки должен '
+        'сбрасываться.'
+    )
+
+
+def test_metrics_endpoint(client, short_python_url):
+    client.get(f'/{short_python_url.short}')
+    response = client.get(METRICS_URL)
+    assert response.status_code == HTTPStatus.OK
+    assert {'hits', 'misses', 'size'} <= response.json['short_id_cache'].keys()
+
+
+def test_fetch_target_reads_columns(_app, short_python_url):
+    assert fetch_target(short_python_url.short).original == PY_URL
+    assert fetch_target('missing') is None
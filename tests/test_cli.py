@@ -0,0 +1,120 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+from tests.conftest import PY_URL
+from yacut import db
+from yacut.models import URLMap
+
+
+def write_lines(path, lines):
+    path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    return str(path)
+
+
+def test_import_ndjson(_app, cli_runner, tmp_path):
+    source = write_lines(tmp_path / 'links.ndjson', [
+        json.dumps({'url': PY_URL, 'custom_id': 'one'}),
+        json.dumps({'url': PY_URL}),
+        'not json',
+        json.dumps({'url': PY_URL, 'custom_id': 'one'}),
+    ])
+    errors = tmp_path / 'errors.ndjson'
+    result = cli_runner.invoke(args=[
+        'links', 'import', source, '--batch-size', '2',
+        '--errors', str(errors)
+    ])
+    assert result.exit_code == 0, result.output
+    assert URLMap.query.count() == 2, (
+        'Команда импорта должна создать ссылки для корректных записей.'
+    )
+    assert len(errors.read_text(encoding='utf-8').splitlines()) == 2
+
+
+def test_import_csv(_app, cli_runner, tmp_path):
+    source = write_lines(tmp_path / 'links.csv', [
+        'url,custom_id,permanent',
+        f'{PY_URL},csv1,true',
+        f'{PY_URL},,',
+    ])
+    result = cli_runner.invoke(args=['links', 'import', source])
+    assert result.exit_code == 0, result.output
+    assert URLMap.query.filter_by(short='csv1').one().permanent is True
+    assert URLMap.query.count() == 2
+
+
+def test_import_resumes_from_checkpoint(_app, cli_runner, tmp_path):
+    source = write_lines(tmp_path / 'links.ndjson', [
+        json.dumps({'url': PY_URL, 'custom_id': f'id{number}'})
+        for number in range(5)
+    ])
+    checkpoint = tmp_path / 'import.ckpt'
+    checkpoint.write_text('3')
+    result = cli_runner.invoke(args=[
+        'links', 'import', source, '--checkpoint', str(checkpoint)
+    ])
+    assert result.exit_code == 0, result.output
+    assert {link.short for link in URLMap.query.all()} == {'id3', 'id4'}, (
+        'Импорт должен продолжаться с записи из контрольной точки.'
+    )
+    assert checkpoint.read_text() == '5'
+
+
+def test_export_roundtrip(_app, cli_runner, tmp_path, short_python_url):
+    for name in ('links.ndjson', 'links.csv'):
+        target = tmp_path / name
+        result = cli_runner.invoke(args=['links', 'export', str(target)])
+        assert result.exit_code == 0, result.output
+        assert short_python_url.short in target.read_text(encoding='utf-8')
+
+    lines = (tmp_path / 'links.ndjson').read_text().splitlines()
+    assert json.loads(lines[0])['custom_id'] == short_python_url.short
+    URLMap.query.delete()
+    result = cli_runner.invoke(
+        args=['links', 'import', str(tmp_path / 'links.csv')]
+    )
+    assert result.exit_code == 0, result.output
+    assert URLMap.query.one().short == short_python_url.short
+
+
+def test_export_keeps_expiry(_app, cli_runner, tmp_path):
+    expires_at = datetime.now(timezone.utc).replace(
+        tzinfo=None, microsecond=0
+    ) + timedelta(days=1)
+    db.session.add(URLMap(original=PY_URL, short='temp', expires_at=expires_at))
+    db.session.commit()
+    for name in ('links.ndjson', 'links.csv'):
+        target = tmp_path / name
+        result = cli_runner.invoke(args=['links', 'export', str(target)])
+        assert result.exit_code == 0, result.output
+        URLMap.query.delete()
+        db.session.commit()
+        result = cli_runner.invoke(args=['links', 'import', str(target)])
+        assert result.exit_code == 0, result.output
+        assert URLMap.query.one().expires_at == expires_at, (
+            'Экспорт и импорт не должны делать ссылку бессрочной.'
+        )
+
+
+def test_export_keeps_server_fields(_app, cli_runner, tmp_path):
+    created = datetime(2020, 1, 1, 12)
+    db.session.add(URLMap(
+        original='disk:/a_file.txt', short='file',
+        disk_location='/a_file.txt', timestamp=created
+    ))
+    db.session.commit()
+    for name in ('links.ndjson', 'links.csv'):
+        target = tmp_path / name
+        result = cli_runner.invoke(args=['links', 'export', str(target)])
+        assert result.exit_code == 0, result.output
+        URLMap.query.delete()
+        db.session.commit()
+        result = cli_runner.invoke(args=['links', 'import', str(target)])
+        assert result.exit_code == 0, result.output
+        link = URLMap.query.one()
+        assert link.disk_location == '/a_file.txt', (
+            'Ссылка на файл Диска не должна теряться при экспорте '
+            'и импорте.'
+        )
+        assert link.timestamp == created, (
+            'Импорт должен сохранять время создания ссылки.'
+        )
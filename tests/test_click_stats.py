@@ -0,0 +1,96 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from yacut import db
+from yacut.clicks import HOUR, click_hourly, compact_rollups, save_clicks
+from yacut.models import ClickDaily, ClickHourly
+
+BASE = datetime(2020, 1, 1, 22)
+BASE_HOUR = int((BASE - datetime(1970, 1, 1)).total_seconds()) // HOUR
+
+
+@pytest.fixture
+def clicks(_app, short_python_url):
+    save_clicks({
+        ('py', BASE_HOUR): 3,
+        ('py', BASE_HOUR + 1): 2,
+        ('py', BASE_HOUR + 2): 5,
+    }, BASE)
+    save_clicks({('py', BASE_HOUR + 2): 1}, BASE)
+    return short_python_url
+
+
+def test_rollups_maintained_incrementally(clicks):
+    hourly = {row.bucket: row.clicks for row in ClickHourly.query}
+    assert hourly == {
+        BASE: 3,
+        BASE + timedelta(hours=1): 2,
+        BASE + timedelta(hours=2): 6,
+    }, 'Почасовые агрегаты должны прибавляться к уже записанным.'
+    daily = {row.bucket: row.clicks for row in ClickDaily.query}
+    assert daily == {datetime(2020, 1, 1): 5, datetime(2020, 1, 2): 6}
+
+
+def test_stats_by_hour(client, clicks):
+    response = client.get(
+        '/api/id/py/stats/?granularity=hour'
+        '&from=2020-01-01T23:30:00&to=2020-01-02T05:00:00'
+    )
+    assert response.status_code == 200
+    assert response.json['from'] == '2020-01-01T23:00:00', (
+        'Начало интервала должно выравниваться по началу часа.'
+    )
+    assert response.json['buckets'] == [
+        {'start': '2020-01-01T23:00:00', 'clicks': 2},
+        {'start': '2020-01-02T00:00:00', 'clicks': 6},
+    ]
+    assert response.json['total'] == 8
+
+
+def test_stats_by_day_with_timezone(client, clicks):
+    response = client.get(
+        '/api/id/py/stats/?from=2020-01-01T03:00:00%2B03:00&to=2020-01-03'
+    )
+    assert response.json['granularity'] == 'day'
+    assert response.json['from'] == '2020-01-01T00:00:00'
+    assert response.json['total'] == 11
+
+
+@pytest.mark.parametrize('query', [
+    'granularity=week', 'from=yesterday', 'from=2020-01-02&to=2020-01-01',
+])
+def test_stats_invalid_query(client, clicks, query):
+    response = client.get(f'/api/id/py/stats/?{query}')
+    assert response.status_code == 400
+
+
+def test_stats_unknown_id(client):
+    assert client.get('/api/id/nothing/stats/').status_code == 404
+
+
+def test_compact_stats(cli_runner, clicks):
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    db.session.add(ClickHourly(link_id=clicks.id, bucket=now, clicks=1))
+    db.session.commit()
+    result = cli_runner.invoke(args=['links', 'compact-stats'])
+    assert result.exit_code == 0, result.output
+    assert ClickHourly.query.count() == 1, (
+        'Компактизация должна удалять только почасовые агрегаты старше '
+        'срока хранения.'
+    )
+    assert ClickDaily.query.count() == 2, (
+        'Суточные агрегаты по умолчанию должны храниться бессрочно.'
+    )
+
+
+def test_compact_rollups_in_batches(clicks):
+    batches = list(compact_rollups(
+        click_hourly, BASE + timedelta(hours=2), batch_size=1
+    ))
+    assert batches == [1, 1], (
+        'Агрегаты должны удаляться порциями не больше batch_size строк.'
+    )
+    assert [row.bucket for row in ClickHourly.query] == [
+        BASE + timedelta(hours=2)
+    ]
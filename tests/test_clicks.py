@@ -0,0 +1,95 @@
+import pytest
+from sqlalchemy import event
+
+from yacut import db
+from yacut.clicks import ClickCounter, click_counter, save_clicks
+from yacut.models import ClickHourly, ClickStats
+
+
+def test_redirect_does_not_write(client, short_python_url):
+    executed = []
+
+    def count(conn, cursor, statement, *args):
+        executed.append(statement)
+
+    client.get(f'/{short_python_url.short}')
+    event.listen(db.engine, 'before_cursor_execute', count)
+    try:
+        client.get(f'/{short_python_url.short}')
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count)
+    assert not executed, (
+        'Переход по закэшированной ссылке не должен обращаться к БД.'
+    )
+    assert click_counter.pending(short_python_url.short) == 2
+
+
+def test_flush_aggregates_clicks(client, short_python_url):
+    for _ in range(3):
+        client.get(f'/{short_python_url.short}')
+    click_counter.flush()
+    click_counter.record(short_python_url.short)
+    click_counter.flush()
+    stats = db.session.get(ClickStats, short_python_url.short)
+    assert stats.clicks == 4, (
+        'Счетчики из буфера должны суммироваться с уже записанными.'
+    )
+    assert stats.last_click is not None
+
+
+def test_clicks_endpoint(client, short_python_url):
+    client.get(f'/{short_python_url.short}')
+    click_counter.flush()
+    client.get(f'/{short_python_url.short}')
+    response = client.get(f'/api/id/{short_python_url.short}/clicks/')
+    assert response.status_code == 200
+    assert response.json['clicks'] == 2, (
+        'Эндпоинт должен учитывать и записанные, и еще не записанные '
+        'переходы.'
+    )
+    assert response.json['last_click']
+
+
+def test_clicks_endpoint_unknown_id(client):
+    response = client.get('/api/id/nothing/clicks/')
+    assert response.status_code == 404
+
+
+def test_api_lookup_is_not_a_click(client, short_python_url):
+    client.get(f'/api/id/{short_python_url.short}/')
+    assert click_counter.pending(short_python_url.short) == 0
+
+
+def test_buffer_limit_triggers_flush(_app):
+    counter = ClickCounter(0, buffer_limit=2, background=False)
+    counter.record('a')
+    assert db.session.get(ClickStats, 'a') is None
+    counter.record('b')
+    assert counter.flushes == 1
+    assert db.session.get(ClickStats, 'b').clicks == 1
+
+
+def test_failed_flush_keeps_clicks(_app, monkeypatch):
+    counter = ClickCounter(0, buffer_limit=10, background=False)
+    counter.record('a')
+
+    def broken(*args):
+        raise RuntimeError('БД недоступна')
+
+    monkeypatch.setattr('yacut.clicks.save_clicks', broken)
+    with pytest.raises(RuntimeError):
+        counter.flush()
+    assert counter.pending('a') == 1 and counter.flush_errors == 1, (
+        'При ошибке записи счетчики должны вернуться в буфер.'
+    )
+
+
+def test_fallback_without_upsert(_app, short_python_url, monkeypatch):
+    monkeypatch.setattr(
+        'yacut.clicks.upsert_statement', lambda table, dialect: None
+    )
+    save_clicks({('py', 1): 2}, None)
+    save_clicks({('py', 1): 3, ('gone', 2): 1}, None)
+    assert db.session.get(ClickStats, 'py').clicks == 5
+    assert db.session.get(ClickStats, 'gone').clicks == 1
+    assert ClickHourly.query.one().clicks == 5
@@ -0,0 +1,137 @@
+import asyncio
+from io import BytesIO
+
+from werkzeug.datastructures import FileStorage
+
+from tests.conftest import PY_URL
+from tests.yandex_disk_mock_server import intercept_requests
+from yacut import db
+from yacut.dedup import (
+    ContentHasher, HashingStream, check_duplicate, record_uploads
+)
+from yacut.models import UploadedFile, URLMap
+from yacut.utils import async_upload_files_to_yadisc
+
+PREFIX_SIZE = 16
+
+
+class OneWayStream:
+    """Поток без возможности перемещения, как тело запроса."""
+
+    def __init__(self, data):
+        self.buffer = BytesIO(data)
+
+    def read(self, size=-1):
+        return self.buffer.read(size)
+
+
+def read_all(stream):
+    return b''.join(iter(lambda: stream.read(4), b''))
+
+
+def add_upload(content, short='py'):
+    db.session.add(URLMap(original=PY_URL, short=short))
+    db.session.commit()
+    hasher = ContentHasher(PREFIX_SIZE)
+    hasher.update(content)
+    record_uploads([{**hasher.record('/app/file.txt'), 'short': short}])
+
+
+def test_hasher_prefix():
+    hasher = ContentHasher(4)
+    for chunk in (b'ab', b'cdef', b'gh'):
+        hasher.update(chunk)
+    whole = ContentHasher(4)
+    whole.update(b'abcdefgh')
+    assert (hasher.digest, hasher.prefix, hasher.size) == (
+        whole.digest, whole.prefix, 8
+    )
+    assert hasher.prefix != hasher.digest
+
+
+def test_unique_file_not_spooled(_app):
+    content = b'unique content ' * 10
+    hasher = ContentHasher(PREFIX_SIZE)
+    stream, short = check_duplicate(OneWayStream(content), hasher, 4, 1024)
+    assert short is None
+    assert isinstance(stream, HashingStream), (
+        'Файл без кандидатов по префиксу не должен дочитываться заранее.'
+    )
+    assert read_all(stream) == content
+    expected = ContentHasher(PREFIX_SIZE)
+    expected.update(content)
+    assert hasher.digest == expected.digest, (
+        'Дайджест должен считаться по мере передачи файла.'
+    )
+
+
+def test_duplicate_found_in_stream(_app):
+    content = b'repeated content ' * 10
+    add_upload(content)
+    hasher = ContentHasher(PREFIX_SIZE)
+    stream, short = check_duplicate(OneWayStream(content), hasher, 4, 8)
+    assert short == 'py', 'Дубликат должен находиться по содержимому.'
+    assert read_all(stream) == content
+
+
+def test_same_prefix_different_content(_app):
+    content = b'repeated content ' * 10
+    add_upload(content)
+    other = content[:PREFIX_SIZE] + b'but different tail'
+    stream, short = check_duplicate(
+        BytesIO(other), ContentHasher(PREFIX_SIZE), 4, 1024
+    )
+    assert short is None
+    assert read_all(stream) == other, (
+        'После проверки файл должен читаться с начала.'
+    )
+
+
+def test_stale_upload_ignored(_app):
+    content = b'removed link content'
+    add_upload(content)
+    db.session.query(URLMap).delete()
+    db.session.commit()
+    _, short = check_duplicate(
+        BytesIO(content), ContentHasher(PREFIX_SIZE), 4, 1024
+    )
+    assert short is None, 'Ссылка на удаленную запись не должна выдаваться.'
+
+
+async def test_reupload_returns_same_link(_app, mock_server, monkeypatch):
+    server, _ = await mock_server
+    await intercept_requests(server, monkeypatch)
+
+    def upload(name):
+        files = [FileStorage(BytesIO(b'same bytes'), name)]
+        return asyncio.run(async_upload_files_to_yadisc(files))[0]
+
+    loop = asyncio.get_running_loop()
+    first = await loop.run_in_executor(None, upload, 'a.txt')
+    second = await loop.run_in_executor(None, upload, 'b.txt')
+    assert first['url'] and second['url'] == first['url'], (
+        'Повторная загрузка того же содержимого должна вернуть '
+        'существующую ссылку.'
+    )
+    assert db.session.query(URLMap).count() == 1
+    assert db.session.query(UploadedFile).count() == 1
+
+
+async def test_same_name_keeps_duplicate(_app, mock_server, monkeypatch):
+    server, _ = await mock_server
+    await intercept_requests(server, monkeypatch)
+
+    def upload(content):
+        files = [FileStorage(BytesIO(content), 'a.txt')]
+        return asyncio.run(async_upload_files_to_yadisc(files))[0]
+
+    loop = asyncio.get_running_loop()
+    first = await loop.run_in_executor(None, upload, b'content x')
+    other = await loop.run_in_executor(None, upload, b'content y')
+    again = await loop.run_in_executor(None, upload, b'content x')
+    assert other['url'] != first['url']
+    assert again['url'] == first['url'], (
+        'Файл с тем же именем загружается по новому пути и не заменяет '
+        'прежний, поэтому дубликат прежнего содержимого находится.'
+    )
+    assert db.session.query(UploadedFile).count() == 2
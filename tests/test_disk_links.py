@@ -0,0 +1,159 @@
+import asyncio
+import time
+from http import HTTPStatus
+from io import BytesIO
+
+import aiohttp
+import pytest
+from werkzeug.datastructures import FileStorage
+
+from tests.yandex_disk_mock_server import intercept_requests
+from yacut import db, disk_links
+from yacut.disk_links import DiskLinkResolver, download_links
+from yacut.error_handlers import AsyncGetDownloadURLError
+from yacut.models import URLMap
+from yacut.utils import async_upload_files_to_yadisc
+
+
+@pytest.fixture
+def fake_api(monkeypatch):
+    calls = []
+
+    async def fetch(session, location):
+        calls.append(location)
+        if location.startswith('/broken'):
+            raise AsyncGetDownloadURLError
+        return f'https://downloader.disk.yandex.ru{location}?v={len(calls)}'
+
+    monkeypatch.setattr(disk_links, 'fetch_download_url', fetch)
+    return calls
+
+
+@pytest.fixture
+def disk_link(_app, fake_api):
+    db.session.add(URLMap(
+        original='disk:/app/file.txt', short='file',
+        disk_location='/app/file.txt'
+    ))
+    db.session.commit()
+    return fake_api
+
+
+def test_redirect_resolves_location(client, disk_link):
+    first = client.get('/file')
+    second = client.get('/file')
+    assert first.status_code == HTTPStatus.FOUND, (
+        'Ссылка на файл Диска должна перенаправлять временно.'
+    )
+    assert first.location == (
+        'https://downloader.disk.yandex.ru/app/file.txt?v=1'
+    )
+    assert second.location == first.location
+    assert disk_link == ['/app/file.txt'], (
+        'Ссылка на скачивание должна запрашиваться один раз и кэшироваться.'
+    )
+
+
+def test_api_returns_download_link(client, disk_link):
+    response = client.get('/api/id/file/')
+    assert response.json == {
+        'url': 'https://downloader.disk.yandex.ru/app/file.txt?v=1'
+    }
+
+
+def test_unavailable_download_link(client, _app, fake_api):
+    db.session.add(URLMap(
+        original='disk:/broken.txt', short='broken',
+        disk_location='/broken.txt'
+    ))
+    db.session.commit()
+    assert client.get('/broken').status_code == HTTPStatus.BAD_GATEWAY
+    assert client.get('/api/id/broken/').status_code == (
+        HTTPStatus.BAD_GATEWAY
+    )
+
+
+def test_user_disk_url_not_resolved(client, _app, fake_api):
+    db.session.add(URLMap(original='disk:/private.pdf', short='steal'))
+    db.session.commit()
+    response = client.get('/steal')
+    assert response.location == 'disk:/private.pdf', (
+        'Путь из исходной ссылки не должен превращаться в ссылку '
+        'на скачивание.'
+    )
+    assert fake_api == []
+
+
+def test_api_rejects_disk_url(client, _app, fake_api):
+    response = client.post('/api/id/', json={
+        'url': 'DISK:/Documents/private.pdf', 'custom_id': 'steal'
+    })
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert db.session.query(URLMap).filter_by(short='steal').count() == 0
+
+
+def test_refresh_ahead(_app, fake_api):
+    resolver = DiskLinkResolver(10, 60, 0)
+    first = resolver.get('/app/file.txt')
+    assert resolver.get('/app/file.txt') is first, (
+        'Пока новая ссылка не получена, выдается ссылка из кэша.'
+    )
+    deadline = time.monotonic() + 5
+    while resolver.stats()['refreshes'] < 1 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    refreshed = resolver.get('/app/file.txt')
+    assert refreshed.href != first.href, (
+        'Стареющая ссылка должна обновляться в фоне.'
+    )
+    assert resolver.stats()['fetches'] == 1
+
+
+async def test_upload_stores_location(_app, mock_server, monkeypatch):
+    server, user_calls = await mock_server
+    await intercept_requests(server, monkeypatch)
+
+    def upload():
+        files = [FileStorage(BytesIO(b'lazy link'), 'lazy.txt')]
+        return asyncio.run(async_upload_files_to_yadisc(files))[0]
+
+    result = await asyncio.get_running_loop().run_in_executor(None, upload)
+    assert result['url'], result
+    link = db.session.query(URLMap).filter_by(short=result['url']).one()
+    assert link.disk_location.endswith('_lazy.txt'), (
+        'Для файла должен сохраняться путь на Диске, а не ссылка '
+        'на скачивание.'
+    )
+    assert 'get_download_link' not in user_calls, (
+        'Ссылка на скачивание не должна запрашиваться при загрузке.'
+    )
+    href = await download_links.get_async(link.disk_location)
+    assert 'get_download_link' in user_calls
+    assert href.href.startswith(f'http://{server.host}:{server.port}')
+
+
+async def test_same_name_uploads_keep_own_files(
+        _app, mock_server, monkeypatch
+):
+    server, _ = await mock_server
+    await intercept_requests(server, monkeypatch)
+
+    def upload(content):
+        files = [FileStorage(BytesIO(content), 'same.txt')]
+        return asyncio.run(async_upload_files_to_yadisc(files))[0]
+
+    loop = asyncio.get_running_loop()
+    uploads = {
+        content: await loop.run_in_executor(None, upload, content)
+        for content in (b'first', b'second')
+    }
+    async with aiohttp.ClientSession() as session:
+        for content, result in uploads.items():
+            link = db.session.query(URLMap).filter_by(
+                short=result['url']
+            ).one()
+            href = await download_links.get_async(link.disk_location)
+            async with session.get(href.href) as response:
+                assert await response.read() == content, (
+                    'Файл с тем же именем не должен заменять файл, '
+                    'на который ведет прежняя ссылка.'
+                )
@@ -0,0 +1,39 @@
+from sqlalchemy import create_engine, text
+
+from yacut import app
+from yacut.engine import configure_sqlite, engine_options, sqlite_pragmas
+
+
+def test_memory_sqlite_has_no_pool_options():
+    assert engine_options({'SQLALCHEMY_DATABASE_URI': 'sqlite://'}) == {}
+
+
+def test_pool_options_from_config():
+    config = dict(app.config, SQLALCHEMY_DATABASE_URI='sqlite:////tmp/y.db')
+    options = engine_options(config)
+    assert options['pool_size'] == app.config['DATABASE_POOL_SIZE']
+    assert options['max_overflow'] == app.config['DATABASE_MAX_OVERFLOW']
+
+
+def test_empty_pragma_skipped():
+    config = dict(app.config, SQLITE_MMAP_SIZE='')
+    assert not any('mmap_size' in pragma for pragma in sqlite_pragmas(config))
+    assert sqlite_pragmas(config)[0].startswith('PRAGMA busy_timeout'), (
+        'busy_timeout должен задаваться до переключения журнала, '
+        'которому нужна блокировка БД.'
+    )
+
+
+def test_pragmas_applied_to_new_connections(tmp_path):
+    engine = create_engine(f'sqlite:///{tmp_path / "yacut.db"}')
+    configure_sqlite(engine, dict(
+        app.config, SQLITE_JOURNAL_MODE='WAL', SQLITE_BUSY_TIMEOUT='1234'
+    ))
+    with engine.connect() as connection:
+        assert connection.execute(
+            text('PRAGMA journal_mode')
+        ).scalar() == 'wal', 'Соединения с SQLite должны работать в WAL.'
+        assert connection.execute(text('PRAGMA busy_timeout')).scalar() == (
+            1234
+        )
+    engine.dispose()
@@ -0,0 +1,108 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from tests.conftest import PY_URL
+from yacut import db
+from yacut.expiry import purge_expired
+from yacut.lookup import get_link, short_id_cache
+from yacut.models import ClickDaily, URLMap
+from yacut.utils import get_unique_short_id
+
+
+def utc_now():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def add_link(short, expires_at):
+    link = URLMap(original=PY_URL, short=short, expires_at=expires_at)
+    db.session.add(link)
+    db.session.commit()
+    return link
+
+
+def test_api_sets_expiry(client):
+    expires_at = (utc_now() + timedelta(days=1)).replace(microsecond=0)
+    response = client.post('/api/id/', json={
+        'url': PY_URL, 'custom_id': 'soon',
+        'expires_at': expires_at.isoformat() + '+00:00',
+    })
+    assert response.status_code == 201
+    assert URLMap.query.filter_by(short='soon').one().expires_at == (
+        expires_at
+    ), 'Срок действия из API должен сохраняться в поле expires_at.'
+
+
+@pytest.mark.parametrize('expires_at', ['2020-01-01T00:00:00', 'tomorrow', 1])
+def test_api_rejects_bad_expiry(client, expires_at):
+    response = client.post(
+        '/api/id/', json={'url': PY_URL, 'expires_at': expires_at}
+    )
+    assert response.status_code == 400
+    assert URLMap.query.count() == 0
+
+
+def test_form_sets_expiry(client):
+    expires_at = (utc_now() + timedelta(days=1)).replace(second=0,
+                                                         microsecond=0)
+    client.post('/', data={
+        'original_link': PY_URL,
+        'custom_id': 'formsoon',
+        'expires_at': expires_at.strftime('%Y-%m-%dT%H:%M'),
+    })
+    assert URLMap.query.filter_by(short='formsoon').one().expires_at == (
+        expires_at
+    )
+
+
+def test_expired_link_not_redirected(client):
+    add_link('old', utc_now() - timedelta(seconds=1))
+    assert client.get('/old').status_code == 404
+    assert client.get('/api/id/old/').status_code == 404
+
+
+def test_expiring_link_redirect_is_temporary(client):
+    add_link('soon', utc_now() + timedelta(hours=1))
+    response = client.get('/soon')
+    assert response.status_code == 302
+    assert 'Cache-Control' not in response.headers, (
+        'Перенаправление по ссылке со сроком действия не должно '
+        'кэшироваться браузером.'
+    )
+
+
+def test_cache_ttl_bounded_by_expiry(_app):
+    add_link('soon', utc_now() + timedelta(seconds=2))
+    get_link('soon')
+    _, expires = short_id_cache._data['soon']
+    assert expires - time.monotonic() <= 2, (
+        'Ссылка со сроком действия должна храниться в кэше не дольше '
+        'этого срока.'
+    )
+
+
+def test_expiring_links_not_reused(_app):
+    add_link('soon', utc_now() + timedelta(hours=1))
+    assert get_unique_short_id(PY_URL, reuse=True) != 'soon'
+
+
+def test_purge_in_batches(_app):
+    now = utc_now()
+    for number in range(5):
+        link = add_link(f'gone{number}', now - timedelta(minutes=number))
+    db.session.add(ClickDaily(link_id=link.id, bucket=now, clicks=1))
+    add_link('alive', now + timedelta(days=1))
+    add_link('forever', None)
+    assert list(purge_expired(batch_size=2)) == [2, 2, 1], (
+        'Истекшие ссылки должны удаляться порциями заданного размера.'
+    )
+    assert {link.short for link in URLMap.query} == {'alive', 'forever'}
+    assert ClickDaily.query.count() == 0
+
+
+def test_purge_command(cli_runner, _app):
+    add_link('gone', utc_now() - timedelta(minutes=1))
+    result = cli_runner.invoke(args=['links', 'purge-expired'])
+    assert result.exit_code == 0, result.output
+    assert URLMap.query.count() == 0
@@ -11,7 +11,6 @@ FILES_URL = '/files'
 EXPECTED_API_CALLS = {
     'get_upload_link',
     'upload',
-    'get_download_link'
 }
 
 
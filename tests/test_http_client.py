@@ -0,0 +1,110 @@
+import asyncio
+from io import BytesIO
+
+import pytest
+from werkzeug.datastructures import FileStorage
+
+from tests.yandex_disk_mock_server import intercept_requests
+from yacut import utils
+from yacut.http_client import HTTPClient, disk_client
+from yacut.utils import async_upload_files_to_yadisc
+
+
+async def get_session(session):
+    return session
+
+
+@pytest.fixture
+def http_client():
+    client = HTTPClient(
+        limit=7, limit_per_host=3, keepalive_timeout=15, dns_cache_ttl=60
+    )
+    yield client
+    client.close()
+
+
+def test_session_shared_between_loops(http_client):
+    first = asyncio.run(http_client.run(get_session))
+    second = asyncio.run(http_client.run(get_session))
+    assert first is second, (
+        'Запросы из разных циклов событий должны использовать одну сессию.'
+    )
+    assert http_client.stats()['calls'] == 2
+
+
+def test_connector_settings(http_client):
+    connector = asyncio.run(http_client.run(get_session)).connector
+    assert connector.limit == 7
+    assert connector.limit_per_host == 3
+    assert connector.use_dns_cache, 'Кэш DNS должен быть включен.'
+
+
+def test_close_releases_session(http_client):
+    session = asyncio.run(http_client.run(get_session))
+    http_client.close()
+    assert session.closed, 'Сессия должна закрываться при остановке.'
+    assert not http_client.stats()['running']
+    restarted = asyncio.run(http_client.run(get_session))
+    assert restarted is not session and not restarted.closed, (
+        'После остановки клиент должен создавать новую сессию.'
+    )
+
+
+async def test_upload_uses_shared_client(_app, mock_server, monkeypatch):
+    server, user_calls = await mock_server
+    await intercept_requests(server, monkeypatch)
+
+    def upload_twice():
+        for number in range(2):
+            files = [FileStorage(BytesIO(b'data'), f'file{number}.txt')]
+            results = asyncio.run(async_upload_files_to_yadisc(files))
+            assert results[0]['error'] == '', results
+            assert results[0]['url']
+
+    calls = disk_client.stats()['calls']
+    await asyncio.get_running_loop().run_in_executor(None, upload_twice)
+    assert disk_client.stats()['calls'] == calls + 2, (
+        'Загрузка файлов должна идти через общий HTTP-клиент.'
+    )
+    assert user_calls == {'get_upload_link', 'upload'}
+
+
+async def test_stage_limits(monkeypatch):
+    limits = {'files': 6, 'upload_url': 3, 'upload': 2}
+    client = HTTPClient(10, 10, 15, 60, limits)
+    monkeypatch.setattr(utils, 'disk_client', client)
+    monkeypatch.setitem(utils.app.config, 'UPLOAD_DEDUP', False)
+    active = {name: 0 for name in limits}
+    peak = dict(active)
+    events = []
+
+    def stage(name, result):
+        async def call(session, *args):
+            for key in (name, 'files'):
+                active[key] += 1
+                peak[key] = max(peak[key], active[key])
+            events.append(name)
+            await asyncio.sleep(0.01)
+            active[name] -= 1
+            active['files'] -= 1
+            return result
+        return call
+
+    monkeypatch.setattr(utils, 'get_upload_url', stage('upload_url', 'u'))
+    monkeypatch.setattr(utils, 'upload_file', stage('upload', '/l'))
+    files = [FileStorage(BytesIO(b'data'), f'{i}.txt') for i in range(20)]
+    try:
+        results = await client.run(utils.upload_files, files)
+    finally:
+        client.close()
+    assert all(result['link'] == 'disk:/l' for result in results)
+    for name in ('upload_url', 'upload'):
+        assert peak[name] <= limits[name], (
+            f'Превышено ограничение этапа `{name}`.'
+        )
+    assert peak['files'] <= limits['files'], (
+        'Превышено общее ограничение числа файлов в обработке.'
+    )
+    assert events.index('upload') < events.index('upload_url', 3), (
+        'Этапы разных файлов должны выполняться одновременно.'
+    )
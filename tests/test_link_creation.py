@@ -0,0 +1,151 @@
+import pytest
+from sqlalchemy import event, update
+
+from tests.conftest import PY_URL
+from yacut import db
+from yacut.error_handlers import ErrorInDBSave, ErrorInURLNaming
+from yacut.lookup import short_id_filter
+from yacut.models import URLMap, url_digest
+from yacut.utils import (
+    get_unique_short_id, insert_links, save_uploaded_links
+)
+
+
+class FixedAllocator:
+    """Стратегия, выдающая заранее заданные ссылки по порядку."""
+
+    def __init__(self, *ids):
+        self.ids = list(ids)
+
+    def allocate(self):
+        return self.ids.pop(0)
+
+
+@pytest.fixture
+def statements(_app):
+    executed = []
+
+    def count(conn, cursor, statement, *args):
+        executed.append(statement)
+
+    short_id_filter.might_contain('warmup')
+    event.listen(db.engine, 'before_cursor_execute', count)
+    yield executed
+    event.remove(db.engine, 'before_cursor_execute', count)
+
+
+def test_custom_id_created_in_single_statement(statements):
+    assert get_unique_short_id(PY_URL, 'single') == 'single'
+    assert len(statements) == 1 and statements[0].startswith('INSERT'), (
+        'Создание ссылки должно выполняться одной вставкой без '
+        'предварительной проверки занятости.'
+    )
+
+
+def test_taken_custom_id_raises_naming_error(_app, short_python_url):
+    with pytest.raises(ErrorInURLNaming):
+        get_unique_short_id(PY_URL, short_python_url.short)
+    assert URLMap.query.count() == 1
+
+
+def test_generated_id_conflict_retried(_app, short_python_url, monkeypatch):
+    allocator = FixedAllocator(short_python_url.short, 'fresh1')
+    monkeypatch.setattr('yacut.utils.get_allocator', lambda: allocator)
+    assert get_unique_short_id(PY_URL) == 'fresh1', (
+        'При конфликте сгенерированной ссылки создание должно '
+        'незаметно повторяться с новой ссылкой.'
+    )
+
+
+def test_generated_id_attempts_are_bounded(_app, short_python_url,
+                                           monkeypatch):
+    allocator = FixedAllocator(*[short_python_url.short] * 10)
+    monkeypatch.setattr('yacut.utils.get_allocator', lambda: allocator)
+    with pytest.raises(ErrorInDBSave):
+        get_unique_short_id(PY_URL)
+
+
+def test_original_hash_filled(_app, short_python_url):
+    assert short_python_url.original_hash == url_digest(PY_URL), (
+        'При сохранении ссылки должен заполняться хеш исходного адреса.'
+    )
+
+
+def test_update_keeps_original_hash(_app, short_python_url):
+    short_python_url.permanent = True
+    db.session.commit()
+    db.session.execute(update(URLMap).values(permanent=False))
+    db.session.commit()
+    db.session.refresh(short_python_url)
+    assert short_python_url.original_hash == url_digest(PY_URL), (
+        'Изменение других полей не должно затрагивать хеш ссылки.'
+    )
+    short_python_url.original = 'https://example.com'
+    db.session.commit()
+    assert short_python_url.original_hash == url_digest(
+        'https://example.com'
+    ), 'При изменении ссылки через ORM хеш должен пересчитываться.'
+
+
+def test_reuse_existing_link_api(client, short_python_url):
+    response = client.post('/api/id/', json={'url': PY_URL, 'reuse': True})
+    assert response.json['short_link'].endswith(f'/{short_python_url.short}'), (
+        'При `reuse: true` должна возвращаться уже существующая короткая '
+        'ссылка на тот же адрес.'
+    )
+    assert URLMap.query.count() == 1
+
+
+@pytest.mark.parametrize('data', [
+    {'url': 123, 'reuse': True},
+    {'url': 123},
+    {'url': 'https://example.com/' + 'a' * 2048},
+])
+def test_api_rejects_invalid_url(client, data):
+    response = client.post('/api/id/', json=data)
+    assert response.status_code == 400
+    assert response.json['message'].startswith('"url" должно быть строкой')
+    assert URLMap.query.count() == 0
+
+
+def test_reuse_respects_redirect_policy(_app, short_python_url):
+    short = get_unique_short_id(PY_URL, permanent=True, reuse=True)
+    assert short != short_python_url.short
+    assert get_unique_short_id(PY_URL, permanent=True, reuse=True) == short
+
+
+def test_reuse_disabled_by_default(client, short_python_url):
+    response = client.post('/api/id/', json={'url': PY_URL})
+    assert not response.json['short_link'].endswith(
+        f'/{short_python_url.short}'
+    )
+    assert URLMap.query.count() == 2
+
+
+async def test_uploaded_links_saved_in_single_insert(statements):
+    uploaded = [
+        {'name': 'a.txt', 'link': f'{PY_URL}/a', 'error': ''},
+        {'name': 'b.txt', 'link': '', 'error': 'Не удалось загрузить файл'},
+        {'name': 'c.txt', 'link': f'{PY_URL}/c', 'error': ''},
+    ]
+    results = await save_uploaded_links(uploaded)
+    inserts = [sql for sql in statements if sql.startswith('INSERT')]
+    assert len(inserts) == 1, (
+        'Ссылки на все загруженные файлы должны сохраняться одной вставкой.'
+    )
+    assert [result['name'] for result in results] == ['a.txt', 'b.txt',
+                                                      'c.txt']
+    assert results[0]['url'] and results[2]['url'] and not results[1]['url']
+    assert results[1]['error'] == 'Не удалось загрузить файл'
+    assert URLMap.query.count() == 2
+
+
+def test_batch_conflict_reallocates_whole_batch(_app, short_python_url,
+                                                monkeypatch):
+    allocator = FixedAllocator(short_python_url.short, 'fresh1',
+                               'fresh2', 'fresh3')
+    monkeypatch.setattr('yacut.utils.get_allocator', lambda: allocator)
+    assert insert_links([f'{PY_URL}/a', f'{PY_URL}/b']) == [
+        'fresh2', 'fresh3'
+    ], 'При конфликте ссылки пакета должны выделяться заново.'
+    assert URLMap.query.count() == 3
@@ -0,0 +1,53 @@
+from http import HTTPStatus
+
+from tests.conftest import PY_URL
+from yacut.lookup import get_link
+
+CREATE_SHORT_LINK_URL = '/api/id/'
+
+
+def test_permanent_redirect_per_link(client):
+    response = client.post(CREATE_SHORT_LINK_URL, json={
+        'url': PY_URL, 'custom_id': 'perm', 'permanent': True
+    })
+    assert response.status_code == HTTPStatus.CREATED
+    response = client.get('/perm')
+    assert response.status_code == HTTPStatus.MOVED_PERMANENTLY, (
+        'Для ссылки с `permanent: true` перенаправление должно быть '
+        f'постоянным ({HTTPStatus.MOVED_PERMANENTLY.value}).'
+    )
+    assert response.location == PY_URL
+
+
+def test_invalid_permanent_value(client):
+    response = client.post(CREATE_SHORT_LINK_URL, json={
+        'url': PY_URL, 'permanent': 'yes'
+    })
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_redirect_cache_headers(client, short_python_url, monkeypatch):
+    monkeypatch.setitem(client.application.config, 'REDIRECT_MAX_AGE', 3600)
+    monkeypatch.setitem(client.application.config, 'REDIRECT_PERMANENT', True)
+    response = client.get(f'/{short_python_url.short}')
+    assert response.status_code == HTTPStatus.MOVED_PERMANENTLY
+    assert response.headers['Cache-Control'] == 'public, max-age=3600', (
+        'При заданном `REDIRECT_MAX_AGE` перенаправление должно содержать '
+        'заголовок `Cache-Control`.'
+    )
+    assert 'Expires' in response.headers
+
+
+def test_default_redirect_has_no_cache_headers(client, short_python_url):
+    response = client.get(f'/{short_python_url.short}')
+    assert response.status_code == HTTPStatus.FOUND
+    assert 'Cache-Control' not in response.headers
+
+
+def test_prebuilt_redirect_reused(client, short_python_url):
+    client.get(f'/{short_python_url.short}')
+    first = get_link(short_python_url.short).redirect
+    client.get(f'/{short_python_url.short}')
+    assert get_link(short_python_url.short).redirect is first, (
+        'Собранный ответ-перенаправление должен переиспользоваться.'
+    )
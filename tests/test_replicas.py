@@ -0,0 +1,90 @@
+import pytest
+from sqlalchemy import create_engine
+
+from tests.conftest import PY_URL
+from yacut import db
+from yacut.lookup import fetch_target, get_link
+from yacut.models import URLMap
+from yacut.replicas import ReadRouter
+from yacut.utils import get_unique_short_id
+
+
+def replica_url(tmp_path, name):
+    url = f'sqlite:///{tmp_path / name}'
+    engine = create_engine(url)
+    db.metadata.create_all(engine)
+    engine.dispose()
+    return url
+
+
+def insert_into(url, short):
+    engine = create_engine(url)
+    with engine.begin() as connection:
+        connection.execute(
+            URLMap.__table__.insert(), {'original': PY_URL, 'short': short}
+        )
+    engine.dispose()
+
+
+@pytest.fixture
+def replicas(_app, tmp_path, monkeypatch):
+    urls = [replica_url(tmp_path, 'a.db'), replica_url(tmp_path, 'b.db')]
+    router = ReadRouter(urls, stickiness=60)
+    monkeypatch.setattr('yacut.lookup.read_router', router)
+    yield urls, router
+    db.session.remove()
+    for engine in router.engines:
+        engine.dispose()
+
+
+def test_lookup_served_by_replica(replicas):
+    urls, router = replicas
+    for url in urls:
+        insert_into(url, 'onlyreplica')
+    assert fetch_target('onlyreplica').original == PY_URL, (
+        'Поиск ссылки для перенаправления должен выполняться на реплике.'
+    )
+    assert router.replica_reads == 1 and router.primary_reads == 0
+
+
+def test_replicas_used_round_robin(replicas):
+    urls, router = replicas
+    insert_into(urls[0], 'first')
+    assert [
+        fetch_target('first') is not None for _ in range(4)
+    ] == [True, False, True, False], (
+        'Запросы на чтение должны распределяться между репликами по кругу.'
+    )
+
+
+def test_read_your_writes(replicas):
+    urls, router = replicas
+    short = get_unique_short_id(PY_URL)
+    assert get_link(short).original == PY_URL
+    assert router.primary_reads == 1 and router.replica_reads == 0, (
+        'Только что созданная ссылка должна читаться из основной БД.'
+    )
+
+
+def test_replica_miss_falls_back_to_primary(replicas):
+    urls, router = replicas
+    short = get_unique_short_id(PY_URL)
+    router.clear()
+    assert get_link(short).original == PY_URL, (
+        'Если реплика еще не получила ссылку, поиск должен повторяться '
+        'в основной БД.'
+    )
+    assert router.replica_misses == 1
+
+
+def test_writes_stay_on_primary(replicas):
+    urls, router = replicas
+    get_unique_short_id(PY_URL, 'primary')
+    assert URLMap.query.filter_by(short='primary').count() == 1
+    for url in urls:
+        engine = create_engine(url)
+        with engine.connect() as connection:
+            assert connection.execute(
+                URLMap.__table__.select()
+            ).first() is None, 'Запись не должна попадать на реплики.'
+        engine.dispose()
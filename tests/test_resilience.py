@@ -0,0 +1,277 @@
+import asyncio
+import hashlib
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from io import BytesIO
+
+import aiohttp
+import pytest
+from werkzeug.datastructures import FileStorage
+from werkzeug.http import http_date
+
+from tests.yandex_disk_mock_server import intercept_requests
+from yacut import app, disk_links, utils
+from yacut.error_handlers import (
+    AsyncGetUploadURLError, AsyncUploadFileError, DiskUnavailableError
+)
+from yacut.resilience import CircuitBreaker, RetryPolicy, retry_after_seconds
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class OneWayStream:
+    """Поток без возможности перемещения, как тело запроса."""
+
+    def __init__(self, data):
+        self.buffer = BytesIO(data)
+
+    def read(self, size=-1):
+        return self.buffer.read(size)
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def policy(monkeypatch, clock):
+    policy = RetryPolicy(4, 0, 1, CircuitBreaker(3, 30, clock))
+    monkeypatch.setattr(utils, 'disk_api', policy)
+    monkeypatch.setattr(disk_links, 'disk_api', policy)
+    return policy
+
+
+@asynccontextmanager
+async def disk_session(faulty_mock_server, monkeypatch):
+    server, _, faults = await faulty_mock_server
+    await intercept_requests(server, monkeypatch)
+    async with aiohttp.ClientSession() as session:
+        yield session, faults
+
+
+def make_file(stream=None):
+    return FileStorage(stream or BytesIO(b'content'), 'file.txt')
+
+
+@pytest.mark.parametrize('value, expected', [
+    (None, None),
+    ('', None),
+    ('7', 7.0),
+    ('soon', None),
+])
+def test_retry_after_seconds(value, expected):
+    assert retry_after_seconds(value) == expected
+
+
+def test_retry_after_date():
+    moment = datetime.now(timezone.utc) + timedelta(seconds=30)
+    assert 25 < retry_after_seconds(http_date(moment)) <= 30
+
+
+def test_backoff_with_jitter():
+    policy = RetryPolicy(5, 0.5, 3, CircuitBreaker(0, 1))
+    for attempt in range(5):
+        delays = [policy.delay(attempt, None) for _ in range(50)]
+        assert all(
+            0 <= delay <= min(3, 0.5 * 2 ** attempt) for delay in delays
+        ), 'Пауза должна расти экспоненциально и не превышать максимум.'
+    assert policy.delay(0, 2) == 2, 'Пауза должна браться из Retry-After.'
+    assert policy.delay(0, 10) is None, (
+        'Если Retry-After дольше максимальной паузы, повтор не нужен.'
+    )
+
+
+def test_breaker_transitions(clock):
+    breaker = CircuitBreaker(2, 10, clock)
+    breaker.failure()
+    assert breaker.allow()
+    breaker.failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow(), 'Разомкнутый выключатель отклоняет запросы.'
+    clock.now = 10
+    assert breaker.allow(), 'После паузы пропускается пробный запрос.'
+    assert not breaker.allow(), 'Пробный запрос должен быть один.'
+    breaker.failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    clock.now = 20
+    assert breaker.allow()
+    breaker.success()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow()
+
+
+def test_lost_probe_replaced(clock):
+    breaker = CircuitBreaker(1, 10, clock)
+    breaker.failure()
+    clock.now = 10
+    assert breaker.allow()
+    clock.now = 15
+    assert not breaker.allow()
+    clock.now = 20
+    assert breaker.allow(), (
+        'Если пробный запрос не завершился, после паузы '
+        'пропускается новый.'
+    )
+    assert not breaker.allow()
+
+
+async def test_cancelled_probe_does_not_block(clock):
+    policy = RetryPolicy(1, 0, 1, CircuitBreaker(1, 10, clock))
+    policy.breaker.failure()
+    clock.now = 10
+
+    async def cancelled():
+        raise asyncio.CancelledError
+
+    async def ok():
+        return 'ok'
+
+    with pytest.raises(asyncio.CancelledError):
+        await policy.call(cancelled)
+    assert policy.breaker.state == CircuitBreaker.HALF_OPEN
+    clock.now = 20
+    assert await policy.call(ok) == 'ok'
+    assert policy.breaker.state == CircuitBreaker.CLOSED
+
+
+async def test_transient_errors_retried(
+        _app, policy, faulty_mock_server, monkeypatch
+):
+    async with disk_session(faulty_mock_server, monkeypatch) as (
+            session, faults
+    ):
+        # После первого разрыва идемпотентный запрос один раз
+        # повторяет сам aiohttp, до политики доходит второй.
+        faults['get_upload_link'] = [
+            {'reset': True},
+            {'reset': True},
+            {'status': 429, 'headers': {'Retry-After': '0'}},
+        ]
+        assert await utils.get_upload_url(session, make_file())
+    assert policy.retries == 2
+    assert policy.breaker.state == CircuitBreaker.CLOSED
+
+
+async def test_timeout_retried(
+        _app, policy, faulty_mock_server, monkeypatch
+):
+    monkeypatch.setitem(app.config, 'DISK_API_TIMEOUT', 0.1)
+    async with disk_session(faulty_mock_server, monkeypatch) as (
+            session, faults
+    ):
+        faults['get_upload_link'] = [{'delay': 1}]
+        assert await utils.get_upload_url(session, make_file())
+    assert policy.retries == 1, 'Запрос по таймауту должен повторяться.'
+
+
+async def test_long_retry_after_not_retried(
+        _app, policy, faulty_mock_server, monkeypatch
+):
+    async with disk_session(faulty_mock_server, monkeypatch) as (
+            session, faults
+    ):
+        faults['get_upload_link'] = [
+            {'status': 429, 'headers': {'Retry-After': '3600'}},
+        ]
+        with pytest.raises(AsyncGetUploadURLError):
+            await utils.get_upload_url(session, make_file())
+    assert policy.retries == 0
+
+
+async def test_client_error_not_retried(
+        _app, policy, faulty_mock_server, monkeypatch
+):
+    async with disk_session(faulty_mock_server, monkeypatch) as (
+            session, faults
+    ):
+        faults['get_upload_link'] = [{'status': 401}]
+        with pytest.raises(AsyncGetUploadURLError):
+            await utils.get_upload_url(session, make_file())
+    assert policy.retries == 0, 'Ошибки клиента не должны повторяться.'
+    assert policy.breaker.failures == 0
+
+
+async def test_breaker_fails_fast(
+        _app, policy, faulty_mock_server, monkeypatch, clock
+):
+    async with disk_session(faulty_mock_server, monkeypatch) as (
+            session, faults
+    ):
+        faults['get_upload_link'] = [{'status': 500}] * 4
+        with pytest.raises(DiskUnavailableError):
+            await utils.get_upload_url(session, make_file())
+        assert policy.breaker.state == CircuitBreaker.OPEN
+        assert len(faults['get_upload_link']) == 1, (
+            'После размыкания выключателя запросы не должны отправляться.'
+        )
+        result = await utils.upload_file_and_get_link(session, make_file())
+        assert result['error'] == (
+            'ЯндексДиск временно недоступен, попробуйте позже.'
+        )
+        assert policy.stats()['rejected'] == 2
+        clock.now = 30
+        faults['get_upload_link'].clear()
+        assert await utils.get_upload_url(session, make_file())
+    assert policy.breaker.state == CircuitBreaker.CLOSED
+
+
+async def test_upload_retried_only_when_rewindable(
+        _app, policy, faulty_mock_server, monkeypatch
+):
+    async with disk_session(faulty_mock_server, monkeypatch) as (
+            session, faults
+    ):
+        upload_url = await utils.get_upload_url(session, make_file())
+        faults['upload'] = [{'status': 503}]
+        with pytest.raises(AsyncUploadFileError):
+            await utils.upload_file(
+                session, upload_url, make_file(OneWayStream(b'content'))
+            )
+        assert policy.retries == 0, (
+            'Поток тела запроса нельзя отправить повторно.'
+        )
+        faults['upload'] = [{'status': 503}]
+        assert await utils.upload_file(session, upload_url, make_file())
+    assert policy.retries == 1
+
+
+async def test_deduplicated_upload_retried(
+        _app, policy, faulty_mock_server, monkeypatch
+):
+    content = b'rewindable content' * 100
+    async with disk_session(faulty_mock_server, monkeypatch) as (
+            session, faults
+    ):
+        file, hasher, short = await utils.find_duplicate(
+            make_file(BytesIO(content))
+        )
+        assert short is None
+        upload_url = await utils.get_upload_url(session, file)
+        faults['upload'] = [{'status': 503}]
+        assert await utils.upload_file(session, upload_url, file)
+    assert policy.retries == 1, (
+        'Файл, который хешируется при загрузке, тоже должен '
+        'загружаться повторно, если его поток можно перемотать.'
+    )
+    assert hasher.size == len(content)
+    assert hasher.digest == hashlib.sha256(content).hexdigest(), (
+        'При повторной загрузке дайджест должен считаться заново.'
+    )
+
+
+async def test_download_url_retried(
+        _app, policy, faulty_mock_server, monkeypatch
+):
+    async with disk_session(faulty_mock_server, monkeypatch) as (
+            session, faults
+    ):
+        faults['get_download_link'] = [{'status': 502}]
+        assert await disk_links.get_download_url(session, '/file.txt')
+    assert policy.retries == 1
@@ -0,0 +1,189 @@
+import asyncio
+import tracemalloc
+from http import HTTPStatus
+from io import BytesIO
+
+import pytest
+from werkzeug.exceptions import BadRequest, RequestEntityTooLarge
+
+from yacut import utils, views
+from yacut.http_client import disk_client
+from yacut.streaming import MultipartReader
+
+BOUNDARY = 'test-boundary'
+CHUNK_SIZE = 4096
+MEMORY_LIMIT = 65536
+
+
+def field(name, value):
+    return (
+        f'--{BOUNDARY}\r\n'
+        f'Content-Disposition: form-data; name="{name}"\r\n\r\n'
+        f'{value}\r\n'
+    ).encode()
+
+
+def file_header(filename):
+    return (
+        f'--{BOUNDARY}\r\n'
+        'Content-Disposition: form-data; name="files"; '
+        f'filename="{filename}"\r\n'
+        'Content-Type: application/octet-stream\r\n\r\n'
+    ).encode()
+
+
+def body(*parts):
+    return b''.join(parts) + f'--{BOUNDARY}--\r\n'.encode()
+
+
+def make_reader(data, memory_limit=MEMORY_LIMIT):
+    return MultipartReader(
+        BytesIO(data), BOUNDARY.encode(), CHUNK_SIZE, memory_limit
+    )
+
+
+def read_all(file):
+    return b''.join(iter(lambda: file.stream.read(CHUNK_SIZE), b''))
+
+
+def test_fields_and_files():
+    reader = make_reader(body(
+        field('csrf_token', 'token'),
+        file_header(''), b'\r\n',
+        file_header('a.txt'), b'first' * 3000, b'\r\n',
+        file_header('b.txt'), b'second', b'\r\n',
+        field('submit', 'go'),
+    ))
+    first = reader.next_file()
+    assert reader.fields == {'csrf_token': 'token'}
+    assert first.filename == 'a.txt', (
+        'Файлы без имени должны пропускаться.'
+    )
+    assert read_all(first) == b'first' * 3000
+    second = reader.next_file()
+    assert second.filename == 'b.txt'
+    assert reader.next_file() is None
+    assert reader.fields['submit'] == 'go', (
+        'Непрочитанный файл должен пропускаться до следующих полей.'
+    )
+
+
+class GeneratedStream:
+    """Тело запроса с большим файлом, которое не хранится в памяти."""
+
+    def __init__(self, size):
+        self.parts = iter([file_header('big.bin')])
+        self.remaining = size
+        self.tail = iter([b'\r\n' + f'--{BOUNDARY}--\r\n'.encode()])
+
+    def read(self, size):
+        part = next(self.parts, None)
+        if part is not None:
+            return part
+        if self.remaining:
+            chunk = min(size, self.remaining)
+            self.remaining -= chunk
+            return b'x' * chunk
+        return next(self.tail, b'')
+
+
+def test_large_file_constant_memory():
+    size = 32 * 1024 * 1024
+    reader = MultipartReader(
+        GeneratedStream(size), BOUNDARY.encode(), CHUNK_SIZE, MEMORY_LIMIT
+    )
+    tracemalloc.start()
+    try:
+        file = reader.next_file()
+        received = 0
+        while chunk := file.stream.read(CHUNK_SIZE):
+            received += len(chunk)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert received == size
+    assert peak < 4 * MEMORY_LIMIT, (
+        'Память при чтении файла не должна зависеть от его размера.'
+    )
+
+
+def test_field_memory_limit():
+    reader = make_reader(body(field('note', 'x' * 2048)), memory_limit=1024)
+    with pytest.raises(RequestEntityTooLarge):
+        reader.next_file()
+
+
+def test_truncated_body():
+    reader = make_reader(file_header('a.txt') + b'data')
+    file = reader.next_file()
+    with pytest.raises(BadRequest):
+        read_all(file)
+
+
+def test_upload_view_without_files(client):
+    response = client.post(
+        '/files',
+        data=body(field('submit', 'go')),
+        content_type=f'multipart/form-data; boundary={BOUNDARY}',
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert 'Выберите файлы' in response.data.decode(), (
+        'Без файлов форма должна показывать ошибку поля.'
+    )
+
+
+def test_upload_view_checks_csrf(client, monkeypatch):
+    async def fail(*args):
+        raise AssertionError('Файлы не должны загружаться без CSRF-токена.')
+
+    monkeypatch.setattr(disk_client, 'run', fail)
+    client.application.config['WTF_CSRF_ENABLED'] = True
+    response = client.post(
+        '/files',
+        data=body(
+            field('csrf_token', 'wrong'),
+            file_header('a.txt'), b'data\r\n',
+        ),
+        content_type=f'multipart/form-data; boundary={BOUNDARY}',
+    )
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_upload_view_without_streaming(client, monkeypatch):
+    uploaded = []
+
+    async def upload(files):
+        uploaded.extend(file.filename for file in files)
+        return []
+
+    monkeypatch.setattr(views, 'async_upload_files_to_yadisc', upload)
+    monkeypatch.setitem(
+        client.application.config, 'DISK_STREAM_UPLOADS', False
+    )
+    response = client.post('/files', data={
+        'files': [(BytesIO(b'one'), 'a.txt'), (BytesIO(b'two'), 'b.txt')]
+    })
+    assert response.status_code == HTTPStatus.OK
+    assert uploaded == ['a.txt', 'b.txt'], (
+        'Без DISK_STREAM_UPLOADS файлы формы должны загружаться '
+        'параллельно через async_upload_files_to_yadisc.'
+    )
+
+
+def test_streamed_files_use_own_limit(monkeypatch):
+    limits = []
+
+    async def upload(session, file, upload_limit='upload'):
+        read_all(file)
+        limits.append(upload_limit)
+        return {'name': file.filename, 'link': '', 'error': ''}
+
+    monkeypatch.setattr(utils, 'upload_file_and_get_link', upload)
+    reader = make_reader(body(
+        file_header('a.txt'), b'one\r\n', file_header('b.txt'), b'two\r\n'
+    ))
+    asyncio.run(utils.upload_stream(None, reader, reader.next_file()))
+    assert limits == ['stream_upload'] * 2, (
+        'Файлы, передаваемые со скоростью клиента, не должны занимать '
+        'общие места загрузки DISK_UPLOAD_CONCURRENCY.'
+    )
@@ -1,4 +1,5 @@
 import aiohttp
+import asyncio
 import re
 from contextlib import suppress
 from hashlib import md5
@@ -10,6 +11,7 @@ from aiohttp import web
 REQUEST_UPLOAD_URL = '/v1/disk/resources/upload'
 UPLOAD_URL = '/upload-target'
 DOWNLOAD_LINK_URL = '/v1/disk/resources/download'
+DOWNLOAD_URL = '/download-target'
 
 COMMON_ASSERT_MSG_FOR_UPLOAD_FILES = (
     'Убедитесь, что для загрузки полученных файлов на Яндекс Диск `'
@@ -17,16 +19,57 @@ COMMON_ASSERT_MSG_FOR_UPLOAD_FILES = (
     f'1. GET-запрос к эндпоинту `{REQUEST_UPLOAD_URL}` для получения '
     'ссылки для загрузки файла;\n'
     f'2. PUT-запрос к эндпоинту `{UPLOAD_URL}` для загрузки файла;\n'
-    f'3. GET-запрос к эндпоинту `{DOWNLOAD_LINK_URL}` для получения '
-    'ссылки для скачивания файла.'
+    f'3. при переходе по короткой ссылке - GET-запрос к эндпоинту '
+    f'`{DOWNLOAD_LINK_URL}` для получения ссылки для скачивания файла.'
 )
 
 
-@pytest.fixture
-async def mock_server(aiohttp_server):
-    """Возвращает мок-сервер для проверки работы с API Я.Диска."""
+def endpoint_name(path):
+    """Имя эндпоинта мок-сервера по пути запроса."""
+    if path == REQUEST_UPLOAD_URL:
+        return 'get_upload_link'
+    if path.startswith(UPLOAD_URL):
+        return 'upload'
+    if path == DOWNLOAD_LINK_URL:
+        return 'get_download_link'
+    return None
+
+
+def fault_injector(faults):
+    """Middleware, отвечающий на запросы сбоями из словаря faults."""
+    faults = {} if faults is None else faults
+
+    @web.middleware
+    async def inject_faults(request, handler):
+        queue = faults.get(endpoint_name(request.path))
+        if not queue:
+            return await handler(request)
+        fault = queue.pop(0)
+        await request.read()
+        if fault.get('reset'):
+            request.transport.close()
+            return web.Response()
+        if 'delay' in fault:
+            await asyncio.sleep(fault['delay'])
+            return await handler(request)
+        return web.Response(
+            status=fault['status'], headers=fault.get('headers')
+        )
+
+    return inject_faults
+
+
+def create_mock_app(faults=None):
+    """Возвращает приложение мок-сервера API Я.Диска и множество вызовов.
+
+    В faults можно передать словарь: имя эндпоинта - список сбоев,
+    которыми по очереди ответят первые запросы к нему. Сбой - словарь
+    с ключом status (и необязательным headers), delay (задержка ответа
+    в секундах) или reset (разрыв соединения).
+    """
     user_calls = set()
     file_names = {}
+    contents = {}
 
     async def check_headers(path, headers):
         assert 'Authorization' in headers, (
@@ -84,9 +127,9 @@ async def mock_server(aiohttp_server):
             'Убедитесь, что PUT-запрос на загрузку файла на Яндекс Диск '
             'содержит загружаемые данные.'
         )
-        location_header = '/disk/{}'.format(
-            quote(file_names[request.url.name])
-        )
+        file_name = file_names[request.url.name]
+        contents[file_name] = request_data
+        location_header = '/disk/{}'.format(quote(file_name))
         return web.Response(headers={'Location': location_header}, status=201)
 
     async def mock_get_download_link_handler(request):
@@ -99,8 +142,8 @@ async def mock_server(aiohttp_server):
             f'(`{DOWNLOAD_LINK_URL}`) передаётся параметр запроса `path` с '
             'путем к скачиваемому файлу.'
         )
-        path_hash = md5(request.query['path'].encode()).hexdigest()
-        link = f'http://{request.host}disk/{path_hash}'
+        file_name = request.query['path'].split('/')[-1]
+        link = f'http://{request.host}{DOWNLOAD_URL}/{quote(file_name)}'
         response_data = await handle_fields_param(
             request,
             {
@@ -111,6 +154,13 @@ async def mock_server(aiohttp_server):
         )
         return web.json_response(response_data, status=200)
 
+    async def mock_download_handler(request):
+        """Обработчик для скачивания загруженного файла."""
+        file_name = request.match_info['file_name']
+        if file_name not in contents:
+            raise web.HTTPNotFound()
+        return web.Response(body=contents[file_name])
+
     async def disk_info_handler(request):
         """Обработчик для запроса информации о Я.Диске."""
         return web.json_response(
@@ -133,18 +183,34 @@ async def mock_server(aiohttp_server):
         """Обработчик для любых других запросов."""
         raise AssertionError(COMMON_ASSERT_MSG_FOR_UPLOAD_FILES)
 
-    app = web.Application()
+    app = web.Application(middlewares=[fault_injector(faults)])
     app.router.add_get(REQUEST_UPLOAD_URL, get_upload_link_handler)
     app.router.add_put(UPLOAD_URL + '/{path_hash}', mock_upload_handler)
     app.router.add_get(DOWNLOAD_LINK_URL, mock_get_download_link_handler)
+    app.router.add_get(DOWNLOAD_URL + '/{file_name}', mock_download_handler)
 
     app.router.add_get('/v1/disk/', disk_info_handler)
     app.router.add_route('*', '/{tail:.*}', catch_all_handler)
+    return app, user_calls
+
 
+@pytest.fixture
+async def mock_server(aiohttp_server):
+    """Возвращает мок-сервер для проверки работы с API Я.Диска."""
+    app, user_calls = create_mock_app()
     server = await aiohttp_server(app)
     return server, user_calls
 
 
+@pytest.fixture
+async def faulty_mock_server(aiohttp_server):
+    """Возвращает мок-сервер API Я.Диска со сбоями из словаря faults."""
+    faults = {}
+    app, user_calls = create_mock_app(faults)
+    server = await aiohttp_server(app)
+    return server, user_calls, faults
+
+
 async def intercept_requests(mock_server, monkeypatch):
     """Перехватывает запросы к API Я.Диска, используя мок-сервер."""
     def substitute_host(url):
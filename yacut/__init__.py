@@ -1,9 +1,9 @@
-from asgiref.wsgi import WsgiToAsgi
 from flask import Flask
 from flask_migrate import Migrate
 from flask_sqlalchemy import SQLAlchemy
 from settings import Config
 
+from .engine import configure_sqlite, engine_options
 
 
 app = Flask(
@@ -11,9 +11,16 @@ app = Flask(
     template_folder='html/templates',
     static_folder='html/static'
 )
-asgi_app = WsgiToAsgi(app)
 app.config.from_object(Config)
+app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(app.config))
 db = SQLAlchemy(app)
+with app.app_context():
+    configure_sqlite(db.engine, app.config)
 migrate = Migrate(app, db)
 
 from . import api_views, error_handlers, models, views
+from .asgi import RedirectRouter
+from .cli import links_cli
+
+app.cli.add_command(links_cli)
+asgi_app = RedirectRouter(app)
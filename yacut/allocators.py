@@ -0,0 +1,319 @@
+"""Стратегии выделения коротких ссылок.
+
+Стратегия выбирается настройкой SHORT_ID_ALLOCATOR:
+- 'random' - случайные строки с проверкой занятости (как раньше);
+- 'sequence' - номера из общего счетчика в БД в кодировке base62.
+При SHORT_ID_POOL_SIZE > 0 выбранная стратегия оборачивается в пул
+заранее подготовленных ссылок с фоновым пополнением.
+"""
+
+import random
+import string
+import threading
+import time
+
+from abc import ABC, abstractmethod
+from collections import deque
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+from typing import Any, Dict, Optional
+
+from . import app, db, metrics
+from .constants import RANDOM_STRING_LENGTH, SHORT_ID_MAX_ATTEMPTS
+from .error_handlers import ErrorInDBSave
+from .lookup import short_id_exists
+from .models import ShortIDCounter
+
+BASE62 = string.digits + string.ascii_letters
+
+
+def to_base62(number: int, length: int = 1) -> str:
+    """Запись неотрицательного числа в base62 не короче length символов."""
+    if number < 0:
+        raise ValueError('\"number\" - не может быть отрицательным')
+    symbols = []
+    while number:
+        number, remainder = divmod(number, len(BASE62))
+        symbols.append(BASE62[remainder])
+    return ''.join(reversed(symbols)).rjust(length, BASE62[0])
+
+
+def from_base62(text: str) -> int:
+    """Обратное преобразование строки base62 в число."""
+    number = 0
+    for symbol in text:
+        number = number * len(BASE62) + BASE62.index(symbol)
+    return number
+
+
+class ShortIDAllocator(ABC):
+    """Базовый класс стратегии выделения коротких ссылок."""
+
+    @abstractmethod
+    def allocate(self) -> str:
+        """Возврат свободной короткой ссылки."""
+
+    def reset(self):
+        """Сброс внутреннего состояния стратегии."""
+
+
+class RandomAllocator(ShortIDAllocator):
+    """Случайные строки фиксированной длины с проверкой занятости."""
+
+    def __init__(self, length: int = RANDOM_STRING_LENGTH):
+        """Инициализация стратегии."""
+        self.length = length
+
+    def allocate(self) -> str:
+        """Подбор случайной строки, которой еще нет в базе."""
+        symbols = string.ascii_letters + string.digits
+        while True:
+            url = ''.join(random.choices(symbols, k=self.length))
+            if not short_id_exists(url):
+                return url
+
+
+class SequenceAllocator(ShortIDAllocator):
+    """Короткие ссылки из общего счетчика в таблице short_id_counter.
+
+    Каждый процесс резервирует в БД блок из block_size номеров
+    и выдает их из памяти без обращений к базе. Номера разных блоков
+    не пересекаются, поэтому коллизий между сгенерированными ссылками
+    нет. Номер переставляется аффинным преобразованием по модулю
+    62**length, чтобы соседние ссылки не были похожи друг на друга.
+    Это маскировка, а не криптографическая защита.
+    """
+
+    def __init__(
+            self,
+            block_size: int,
+            multiplier: int = 1,
+            offset: int = 0,
+            length: int = RANDOM_STRING_LENGTH,
+            name: str = 'short_id'
+    ):
+        """Инициализация стратегии."""
+        if not isinstance(block_size, int) or block_size < 1:
+            raise ValueError(
+                '\"block_size\" - должен быть целым положительным числом > 0'
+            )
+        self.space = len(BASE62) ** length
+        if multiplier % 2 == 0 or multiplier % 31 == 0:
+            raise ValueError(
+                '\"multiplier\" - должен быть взаимно простым с 62'
+            )
+        self.block_size = block_size
+        self.multiplier = multiplier % self.space
+        self.offset = offset % self.space
+        self.length = length
+        self.name = name
+        self._next = 0
+        self._end = 0
+        self._lock = threading.Lock()
+
+    def encode(self, number: int) -> str:
+        """Преобразование номера из счетчика в короткую ссылку.
+
+        Номера за пределами 62**length не переставляются и дают
+        более длинные ссылки.
+        """
+        if number < self.space:
+            number = (number * self.multiplier + self.offset) % self.space
+        return to_base62(number, self.length)
+
+    def _reserve_block(self):
+        """Резервирование в БД следующего блока номеров.
+
+        Счетчик обновляется в отдельной транзакции, чтобы не фиксировать
+        и не откатывать сессию запроса, в котором выделяется ссылка.
+        Если строку счетчика одновременно создал другой процесс,
+        резервирование повторяется не больше SHORT_ID_MAX_ATTEMPTS раз.
+        """
+        table = ShortIDCounter.__table__
+        condition = table.c.name == self.name
+        for _ in range(SHORT_ID_MAX_ATTEMPTS):
+            try:
+                with db.engine.begin() as connection:
+                    updated = connection.execute(
+                        update(table).where(condition)
+                        .values(value=table.c.value + self.block_size)
+                    )
+                    if not updated.rowcount:
+                        connection.execute(insert(table).values(
+                            name=self.name, value=self.block_size
+                        ))
+                    end = connection.execute(
+                        select(table.c.value).where(condition)
+                    ).scalar_one()
+            except IntegrityError:
+                continue
+            self._end = end
+            self._next = end - self.block_size
+            return
+        raise ErrorInDBSave
+
+    def allocate(self) -> str:
+        """Выдача следующей свободной ссылки из зарезервированного блока.
+
+        Ссылки, совпавшие с пользовательскими вариантами, пропускаются.
+        """
+        while True:
+            with self._lock:
+                if self._next >= self._end:
+                    self._reserve_block()
+                number = self._next
+                self._next += 1
+            url = self.encode(number)
+            if not short_id_exists(url):
+                return url
+
+    def reset(self):
+        """Отказ от остатка текущего блока."""
+        with self._lock:
+            self._next = self._end = 0
+
+
+class PooledAllocator(ShortIDAllocator):
+    """Пул заранее выделенных свободных коротких ссылок.
+
+    Ссылки выдаются из очереди в памяти за O(1). Когда в очереди
+    остается не больше low_water ссылок, фоновый поток пополняет ее
+    из исходной стратегии до size. Если очередь опустела, ссылка
+    выделяется исходной стратегией прямо в запросе.
+    """
+
+    def __init__(
+            self,
+            source: ShortIDAllocator,
+            size: int,
+            low_water: int,
+            background: bool = True
+    ):
+        """Инициализация пустого пула."""
+        if not isinstance(size, int) or size < 1:
+            raise ValueError(
+                '\"size\" - должен быть целым положительным числом > 0'
+            )
+        if not 0 <= low_water < size:
+            raise ValueError('\"low_water\" - должен быть от 0 до size - 1')
+        self.source = source
+        self.size = size
+        self.low_water = low_water
+        self.background = background
+        self.refills = 0
+        self.refilled = 0
+        self.refill_rate = 0.0
+        self.empty_pops = 0
+        self._queue: deque = deque()
+        self._wakeup = threading.Event()
+        self._refill_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+
+    def refill(self):
+        """Пополнение пула до полного размера."""
+        with self._refill_lock:
+            started = time.monotonic()
+            added = 0
+            while len(self._queue) < self.size:
+                self._queue.append(self.source.allocate())
+                added += 1
+            if added:
+                elapsed = time.monotonic() - started
+                self.refills += 1
+                self.refilled += added
+                self.refill_rate = round(added / elapsed, 1) if elapsed else 0
+
+    def _run(self):
+        """Цикл фонового потока пополнения."""
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            with app.app_context():
+                try:
+                    self.refill()
+                except Exception:
+                    app.logger.exception('Ошибка пополнения пула ссылок')
+
+    def _request_refill(self):
+        """Запуск пополнения, если пул опустился ниже порога."""
+        if len(self._queue) > self.low_water:
+            return
+        if not self.background:
+            self.refill()
+            return
+        if self._worker is None:
+            with self._start_lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(
+                        target=self._run, name='short-id-pool', daemon=True
+                    )
+                    self._worker.start()
+        self._wakeup.set()
+
+    def allocate(self) -> str:
+        """Выдача ссылки из пула."""
+        try:
+            url = self._queue.popleft()
+        except IndexError:
+            self.empty_pops += 1
+            url = self.source.allocate()
+        self._request_refill()
+        return url
+
+    def reset(self):
+        """Очистка пула и сброс исходной стратегии."""
+        with self._refill_lock:
+            self._queue.clear()
+            self.source.reset()
+
+    def stats(self) -> Dict[str, Any]:
+        """Состояние пула для метрик."""
+        return {
+            'depth': len(self._queue),
+            'size': self.size,
+            'low_water': self.low_water,
+            'refills': self.refills,
+            'refilled': self.refilled,
+            'refill_rate': self.refill_rate,
+            'empty_pops': self.empty_pops,
+        }
+
+
+def create_allocator(name: str) -> ShortIDAllocator:
+    """Создание стратегии по имени из настроек приложения."""
+    if name == 'random':
+        return RandomAllocator()
+    if name == 'sequence':
+        return SequenceAllocator(
+            app.config['SHORT_ID_BLOCK_SIZE'],
+            app.config['SHORT_ID_MULTIPLIER'],
+            app.config['SHORT_ID_OFFSET'],
+        )
+    raise ValueError(f'Неизвестная стратегия коротких ссылок: {name}')
+
+
+_allocators: Dict[str, ShortIDAllocator] = {}
+
+
+def get_allocator(name: Optional[str] = None) -> ShortIDAllocator:
+    """Стратегия, выбранная в настройке SHORT_ID_ALLOCATOR."""
+    name = name or app.config['SHORT_ID_ALLOCATOR']
+    if name not in _allocators:
+        allocator = create_allocator(name)
+        if app.config['SHORT_ID_POOL_SIZE']:
+            allocator = PooledAllocator(
+                allocator,
+                app.config['SHORT_ID_POOL_SIZE'],
+                app.config['SHORT_ID_POOL_LOW_WATER']
+            )
+            metrics.register(f'short_id_pool_{name}', allocator.stats)
+        _allocators[name] = allocator
+    return _allocators[name]
+
+
+def reset_allocators():
+    """Сброс состояния всех созданных стратегий."""
+    for allocator in _allocators.values():
+        allocator.reset()
@@ -3,11 +3,29 @@
 from flask import jsonify, request
 from http import HTTPStatus
 
-from . import app
-from .constants import OPTIONAL_KEY, TO_DICT_SHORT_URL, REQUIRED_KEY
-from .error_handlers import ErrorInDBSave, ErrorInURLNaming, InvalidAPIUsage
-from .models import URLMap
-from .utils import get_unique_short_id, validate_api_data
+from . import app, metrics
+from .clicks import click_series, get_clicks, stats_link_id, stats_query
+from .constants import (
+    EXPIRES_KEY,
+    OPTIONAL_KEY,
+    PERMANENT_KEY,
+    REUSE_KEY,
+    TO_DICT_SHORT_URL,
+    REQUIRED_KEY
+)
+from .error_handlers import (
+    AsyncGetDownloadURLError,
+    ErrorInDBSave,
+    ErrorInURLNaming,
+    InvalidAPIUsage
+)
+from .lookup import get_link
+from .utils import (
+    bulk_create_links,
+    get_unique_short_id,
+    parse_expires_at,
+    validate_api_data
+)
 
 
 @app.route('/api/id/', methods=['POST'])
@@ -19,7 +37,11 @@ def get_short_url():
 
     try:
         short_id = get_unique_short_id(
-            data[REQUIRED_KEY], short_url
+            data[REQUIRED_KEY],
+            short_url,
+            data.get(PERMANENT_KEY),
+            data.get(REUSE_KEY),
+            parse_expires_at(data.get(EXPIRES_KEY))
         )
     except ErrorInURLNaming:
         raise InvalidAPIUsage(
@@ -35,12 +57,88 @@ def get_short_url():
     return jsonify(result), HTTPStatus.CREATED
 
 
+@app.route('/api/ids/', methods=['POST'])
+def get_short_urls():
+    """Пакетное получение коротких ссылок через API.
+
+    Возвращает результат для каждого элемента в исходном порядке:
+    созданную короткую ссылку или текст ошибки. Если не создано
+    ни одной ссылки, ответ имеет статус 400.
+    """
+    data = request.get_json(silent=True)
+    if not data or not isinstance(data, list):
+        raise InvalidAPIUsage('Тело запроса должно быть непустым списком')
+    if len(data) > app.config['BULK_MAX_ITEMS']:
+        raise InvalidAPIUsage(
+            'Превышен размер пакета: не более '
+            f'{app.config["BULK_MAX_ITEMS"]} ссылок'
+        )
+
+    results = []
+    created = False
+    for result in bulk_create_links(data):
+        if result.get('short'):
+            created = True
+            result = {
+                'url': result['url'],
+                TO_DICT_SHORT_URL: request.host_url + result['short']
+            }
+        results.append(result)
+    status = HTTPStatus.CREATED if created else HTTPStatus.BAD_REQUEST
+    return jsonify(results), status
+
+
 @app.route('/api/id/<short_id>/', methods=['GET'])
 def redirect_api(short_id: str):
     """Метод возвращает полную ссылку по короткой."""
-    link = URLMap.query.filter_by(short=short_id).first()
+    target = get_link(short_id)
 
-    if link is None:
+    if target is None:
         raise InvalidAPIUsage('Указанный id не найден', HTTPStatus.NOT_FOUND)
 
-    return jsonify({'url': link.original})
+    try:
+        url = target.url
+    except AsyncGetDownloadURLError:
+        raise InvalidAPIUsage(
+            'Не удалось получить ссылку на файл', HTTPStatus.BAD_GATEWAY
+        )
+    return jsonify({'url': url})
+
+
+@app.route('/api/id/<short_id>/clicks/', methods=['GET'])
+def get_link_clicks(short_id: str):
+    """Метод возвращает число переходов по короткой ссылке."""
+    if get_link(short_id) is None:
+        raise InvalidAPIUsage('Указанный id не найден', HTTPStatus.NOT_FOUND)
+
+    return jsonify({'short_id': short_id, **get_clicks(short_id)})
+
+
+@app.route('/api/id/<short_id>/stats/', methods=['GET'])
+def get_link_stats(short_id: str):
+    """Метод возвращает переходы по короткой ссылке по часам или дням.
+
+    Параметры запроса: granularity (hour или day), from и to в ISO 8601.
+    Данные берутся из агрегатов и отстают от реальных переходов
+    не больше чем на интервал записи счетчиков.
+    """
+    link_id = stats_link_id(short_id)
+    if link_id is None:
+        raise InvalidAPIUsage('Указанный id не найден', HTTPStatus.NOT_FOUND)
+
+    granularity, start, end = stats_query(request.args)
+    buckets = click_series(link_id, granularity, start, end)
+    return jsonify({
+        'short_id': short_id,
+        'granularity': granularity,
+        'from': start.isoformat(),
+        'to': end.isoformat(),
+        'total': sum(bucket['clicks'] for bucket in buckets),
+        'buckets': buckets,
+    })
+
+
+@app.route('/api/metrics/', methods=['GET'])
+def get_metrics():
+    """Метод возвращает текущие метрики подсистем сервиса."""
+    return jsonify(metrics.collect())
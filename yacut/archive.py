@@ -0,0 +1,82 @@
+"""Перенос давно неиспользуемых ссылок в архив url_map_archive.
+
+Ссылка считается холодной, если она создана раньше чем ARCHIVE_IDLE_DAYS
+дней назад и за это время по ней не было переходов (по click_stats).
+Такие записи переносятся из url_map порциями по первичному ключу,
+поэтому размер основной таблицы и глубина ее индексов определяются
+только активными ссылками. При обращении к ссылке из архива она
+возвращается в url_map (см. lookup.restore_archived).
+"""
+
+import time
+
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import delete, or_, select
+from typing import Iterator, List, Optional
+
+from . import db
+from .clicks import click_stats
+from .lookup import archive, invalidate, url_map
+
+
+def cold_batch(cutoff: datetime, after_id: int, batch_size: int) -> List:
+    """Очередная порция холодных ссылок с id больше after_id."""
+    return db.session.execute(
+        select(
+            url_map.c.id,
+            url_map.c.original,
+            url_map.c.short,
+            url_map.c.permanent,
+            url_map.c.timestamp,
+            url_map.c.expires_at,
+            url_map.c.disk_location,
+        )
+        .outerjoin(click_stats, click_stats.c.short == url_map.c.short)
+        .where(
+            url_map.c.id > after_id,
+            url_map.c.timestamp < cutoff,
+            url_map.c.expires_at.is_(None),
+            or_(
+                click_stats.c.last_click.is_(None),
+                click_stats.c.last_click < cutoff,
+            ),
+        )
+        .order_by(url_map.c.id)
+        .limit(batch_size)
+    ).all()
+
+
+def archive_cold_links(
+        idle_days: int,
+        batch_size: int = 500,
+        pause: float = 0,
+        now: Optional[datetime] = None
+) -> Iterator[int]:
+    """Перенос холодных ссылок в архив.
+
+    Каждая порция переносится отдельной транзакцией. Ссылки со сроком
+    действия не архивируются: их удаляет purge-expired. Id записей
+    не выдаются повторно (в SQLite - благодаря AUTOINCREMENT), поэтому
+    ссылку можно вернуть из архива с прежним id.
+    Возвращает итератор по числу перенесенных в каждой порции записей.
+    """
+    if now is None:
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+    cutoff = now - timedelta(days=idle_days)
+    after_id = 0
+    while True:
+        rows = cold_batch(cutoff, after_id, batch_size)
+        if not rows:
+            return
+        db.session.execute(archive.insert(), [
+            {**row._asdict(), 'archived_at': now} for row in rows
+        ])
+        ids = [row.id for row in rows]
+        db.session.execute(delete(url_map).where(url_map.c.id.in_(ids)))
+        db.session.commit()
+        for row in rows:
+            invalidate(row.short)
+        after_id = ids[-1]
+        yield len(rows)
+        if pause:
+            time.sleep(pause)
@@ -0,0 +1,132 @@
+"""ASGI-приложение проекта YaCut.
+
+Перенаправления по коротким ссылкам обрабатываются напрямую в цикле
+событий: без передачи запроса в поток, построения WSGI-окружения
+и контекста запроса Flask. Все остальные запросы передаются
+обернутому в WsgiToAsgi приложению Flask.
+"""
+
+import asyncio
+
+from asgiref.wsgi import WsgiToAsgi
+from flask import Flask
+from typing import Callable, Optional
+from werkzeug.exceptions import HTTPException
+from werkzeug.routing import RequestRedirect
+from werkzeug.wrappers import Response
+
+from .clicks import click_counter
+from .disk_links import download_links
+from .error_handlers import AsyncGetDownloadURLError
+from .lookup import LinkTarget, get_link, short_id_cache
+
+REDIRECT_ENDPOINT = 'link_redirect'
+API_ENDPOINT = 'redirect_api'
+
+
+class RedirectRouter:
+    """Маршрутизатор ASGI с быстрым путем для перенаправлений.
+
+    Маршруты сопоставляются по url_map приложения Flask, поэтому
+    приоритет правил ('/files', статика и т.д.) остается прежним.
+    Нативно отвечает только на найденные короткие ссылки, а ошибки
+    404 по-прежнему формирует приложение Flask.
+    """
+
+    def __init__(self, app: Flask, fallback: Optional[Callable] = None):
+        """Инициализация маршрутизатора."""
+        self.app = app
+        self.fallback = fallback or WsgiToAsgi(app)
+        self.adapter = app.url_map.bind('localhost')
+
+    def _match(self, scope) -> Optional[tuple]:
+        """Определение обработчика Flask для пути запроса."""
+        if scope['type'] != 'http' or scope['method'] != 'GET':
+            return None
+        path = scope['path']
+        root_path = scope.get('root_path', '')
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path):]
+        try:
+            endpoint, args = self.adapter.match(path, method='GET')
+        except (HTTPException, RequestRedirect):
+            return None
+        if endpoint not in (REDIRECT_ENDPOINT, API_ENDPOINT):
+            return None
+        return endpoint, args['short_id']
+
+    def _lookup(self, short_id: str) -> Optional[LinkTarget]:
+        """Поиск короткой ссылки в контексте приложения."""
+        with self.app.app_context():
+            return get_link(short_id)
+
+    async def resolve(self, short_id: str) -> Optional[LinkTarget]:
+        """Асинхронный поиск короткой ссылки.
+
+        Попадание в кэш обслуживается без выхода из цикла событий,
+        в БД запрос уходит из пула потоков.
+        """
+        target = short_id_cache.get(short_id)
+        if target is not None:
+            return target
+        return await asyncio.to_thread(self._lookup, short_id)
+
+    @staticmethod
+    async def prefetch_download_link(
+            target: LinkTarget
+    ) -> Optional[LinkTarget]:
+        """Получение ссылки на скачивание для файла Диска заранее.
+
+        Тогда target.redirect и target.url берут ее из кэша и не
+        блокируют цикл событий. Если ссылку получить не удалось,
+        возвращает None, и ошибку формирует приложение Flask.
+        """
+        if target.location is None:
+            return target
+        try:
+            await download_links.get_async(target.location)
+        except AsyncGetDownloadURLError:
+            return None
+        return target
+
+    @staticmethod
+    async def send_redirect(send: Callable, target: LinkTarget):
+        """Отправка заранее собранного перенаправления."""
+        redirect = target.redirect
+        await send({
+            'type': 'http.response.start',
+            'status': redirect.status,
+            'headers': redirect.asgi_headers(),
+        })
+        await send({'type': 'http.response.body', 'body': redirect.body})
+
+    @staticmethod
+    async def send_response(send: Callable, response: Response):
+        """Отправка ответа werkzeug через интерфейс ASGI."""
+        await send({
+            'type': 'http.response.start',
+            'status': response.status_code,
+            'headers': [
+                (name.lower().encode('latin-1'), value.encode('latin-1'))
+                for name, value in response.headers.items()
+            ],
+        })
+        await send({'type': 'http.response.body', 'body': response.data})
+
+    async def __call__(self, scope, receive, send):
+        """Точка входа ASGI."""
+        matched = self._match(scope)
+        target = None
+        if matched is not None:
+            endpoint, short_id = matched
+            target = await self.resolve(short_id)
+        if target is not None:
+            target = await self.prefetch_download_link(target)
+        if target is None:
+            await self.fallback(scope, receive, send)
+        elif endpoint == REDIRECT_ENDPOINT:
+            click_counter.record(short_id)
+            await self.send_redirect(send, target)
+        else:
+            response = self.app.json.response({'url': target.url})
+            await self.send_response(send, response)
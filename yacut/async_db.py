@@ -0,0 +1,155 @@
+"""Асинхронный доступ к БД для корутин загрузки файлов.
+
+Ссылки на загруженные файлы создаются через асинхронный движок
+SQLAlchemy прямо в цикле событий, без общей сессии Flask-SQLAlchemy.
+Адрес БД берется из ASYNC_DATABASE_URI или выводится из
+SQLALCHEMY_DATABASE_URI заменой драйвера, если асинхронный драйвер
+установлен. Иначе ссылки сохраняются в потоке, как раньше.
+"""
+
+import asyncio
+import importlib.util
+import weakref
+
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import NullPool
+from typing import Any, Dict, List, Optional, Union
+
+from . import app, db
+from .allocators import get_allocator
+from .constants import SHORT_ID_MAX_ATTEMPTS
+from .engine import configure_sqlite, is_memory_sqlite
+from .error_handlers import ErrorInDBSave
+from .lookup import register_inserted
+from .models import URLMap
+
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+asyncpg',
+    'mysql': 'mysql+aiomysql',
+}
+
+
+def driver_installed(drivername: str) -> bool:
+    """Можно ли импортировать модуль драйвера вида 'backend+driver'."""
+    return importlib.util.find_spec(drivername.split('+')[-1]) is not None
+
+
+def async_database_url(url: Union[str, URL, None]) -> Optional[URL]:
+    """Адрес БД с асинхронным драйвером или None, если его нет.
+
+    БД SQLite в памяти у каждого соединения своя, поэтому для нее
+    асинхронный движок не создается. Драйвер подставляется, только
+    если он установлен.
+    """
+    if not url or is_memory_sqlite(url):
+        return None
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        return None
+    if url.get_driver_name() not in ASYNC_DRIVERS[backend]:
+        url = url.set(drivername=ASYNC_DRIVERS[backend])
+    return url if driver_installed(url.drivername) else None
+
+
+def allocate_short_ids(count: int) -> List[str]:
+    """Выделение count коротких ссылок в собственном контексте приложения.
+
+    Стратегии обращаются к БД синхронно, поэтому вызываются в потоке,
+    а не в цикле событий.
+    """
+    with app.app_context():
+        allocator = get_allocator()
+        return [allocator.allocate() for _ in range(count)]
+
+
+class AsyncDatabase:
+    """Асинхронная запись ссылок в БД.
+
+    Flask выполняет асинхронные view-функции в отдельном цикле событий
+    на каждый запрос, а соединения асинхронных драйверов привязаны
+    к циклу, поэтому движок создается на каждый цикл и не держит пул
+    соединений.
+    """
+
+    def __init__(self, url: Optional[URL]):
+        """Инициализация по адресу БД с асинхронным драйвером."""
+        self.url = url
+        self._engines: weakref.WeakKeyDictionary = (
+            weakref.WeakKeyDictionary()
+        )
+
+    @property
+    def available(self) -> bool:
+        """Используется ли асинхронный драйвер."""
+        return self.url is not None
+
+    @property
+    def engine(self) -> AsyncEngine:
+        """Движок для текущего цикла событий."""
+        loop = asyncio.get_running_loop()
+        engine = self._engines.get(loop)
+        if engine is None:
+            engine = create_async_engine(self.url, poolclass=NullPool)
+            configure_sqlite(engine.sync_engine, app.config)
+            self._engines[loop] = engine
+        return engine
+
+    async def _insert(self, rows: List[Dict[str, Any]]):
+        """Вставка записей одним executemany в одной транзакции."""
+        async with self.engine.begin() as connection:
+            await connection.execute(URLMap.__table__.insert(), rows)
+
+    async def insert_links(
+            self,
+            full_urls: List[str],
+            locations: Optional[List[str]] = None
+    ) -> List[str]:
+        """Вставка пакета ссылок с сгенерированными короткими вариантами.
+
+        Все записи сохраняются одной транзакцией. При конфликте
+        ссылки пакета выделяются заново и вставка повторяется целиком.
+        locations - пути к загруженным файлам на Диске для каждой ссылки.
+        """
+        if not full_urls:
+            return []
+        locations = locations or [None] * len(full_urls)
+        for _ in range(SHORT_ID_MAX_ATTEMPTS):
+            shorts = await asyncio.to_thread(
+                allocate_short_ids, len(full_urls)
+            )
+            try:
+                await self._insert([
+                    {'original': full_url, 'short': short,
+                     'disk_location': location}
+                    for full_url, short, location
+                    in zip(full_urls, shorts, locations)
+                ])
+            except IntegrityError:
+                continue
+            except Exception:
+                raise ErrorInDBSave
+            register_inserted(shorts)
+            return shorts
+        raise ErrorInDBSave
+
+
+def configured_url() -> Optional[URL]:
+    """Адрес из ASYNC_DATABASE_URI или выведенный из синхронного движка.
+
+    Явно заданный адрес используется как есть. Иначе берется адрес
+    уже созданного движка Flask-SQLAlchemy: в нем относительный путь
+    к файлу SQLite приведен к папке instance.
+    """
+    if app.config['ASYNC_DATABASE_URI']:
+        return make_url(app.config['ASYNC_DATABASE_URI'])
+    if not app.config['SQLALCHEMY_DATABASE_URI']:
+        return None
+    with app.app_context():
+        return async_database_url(db.engine.url)
+
+
+async_db = AsyncDatabase(configured_url())
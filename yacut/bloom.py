@@ -0,0 +1,75 @@
+"""Фильтр Блума для быстрой проверки отсутствия коротких ссылок."""
+
+import math
+import threading
+
+from hashlib import blake2b
+from typing import Any, Dict, Iterable
+
+
+class BloomFilter:
+    """Вероятностное множество строк.
+
+    Проверка вхождения никогда не дает ложноотрицательного ответа:
+    если строка была добавлена, фильтр всегда ответит, что она есть.
+    Ложноположительные ответы возможны с вероятностью не выше
+    error_rate, пока количество элементов не превышает capacity.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        """Инициализация фильтра под ожидаемое количество элементов."""
+        if not isinstance(capacity, int) or capacity < 1:
+            raise ValueError(
+                '\"capacity\" - должен быть целым положительным числом > 0'
+            )
+        if not 0 < error_rate < 1:
+            raise ValueError('\"error_rate\" - должен быть в интервале (0, 1)')
+
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = math.ceil(
+            -capacity * math.log(error_rate) / math.log(2) ** 2
+        )
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+        self._lock = threading.Lock()
+
+    def _positions(self, key: str) -> Iterable[int]:
+        """Номера битов для строки по схеме двойного хеширования."""
+        digest = blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return (
+            (first + i * second) % self.size for i in range(self.hashes)
+        )
+
+    def add(self, key: str):
+        """Добавление строки в фильтр."""
+        positions = list(self._positions(key))
+        with self._lock:
+            for position in positions:
+                self._bits[position >> 3] |= 1 << (position & 7)
+            self.count += 1
+
+    def update(self, keys: Iterable[str]):
+        """Добавление набора строк в фильтр."""
+        for key in keys:
+            self.add(key)
+
+    def __contains__(self, key: str) -> bool:
+        """Проверка, могла ли строка быть добавлена в фильтр."""
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(key)
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Параметры и заполненность фильтра для метрик."""
+        return {
+            'items': self.count,
+            'capacity': self.capacity,
+            'bits': self.size,
+            'hashes': self.hashes,
+            'error_rate': self.error_rate,
+        }
@@ -0,0 +1,91 @@
+"""Кэши в памяти процесса для проекта YaCut."""
+
+import threading
+import time
+
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class TTLCache:
+    """Ограниченный по размеру LRU-кэш с временем жизни записей.
+
+    При переполнении вытесняется запись, к которой дольше всего
+    не обращались. Запись с истекшим временем жизни считается
+    отсутствующей и удаляется при обращении к ней.
+    Кэш потокобезопасен и ведет счетчики попаданий и промахов.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        """Инициализация кэша."""
+        if not isinstance(maxsize, int) or maxsize < 0:
+            raise ValueError(
+                '\"maxsize\" - должен быть целым неотрицательным числом'
+            )
+        if ttl < 0:
+            raise ValueError('\"ttl\" - не может быть отрицательным')
+
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Количество записей в кэше, включая устаревшие."""
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Получение значения из кэша с учетом времени жизни."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                value, expires = item
+                if expires > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Сохранение значения в кэше.
+
+        Необязательный параметр ttl позволяет сократить время жизни
+        отдельной записи относительно значения по умолчанию.
+        """
+        if not self.maxsize:
+            return
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> Any:
+        """Удаление записи из кэша, возвращает удаленное значение."""
+        with self._lock:
+            item = self._data.pop(key, None)
+        return None if item is None else item[0]
+
+    def clear(self):
+        """Полная очистка кэша и счетчиков."""
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Текущее состояние кэша для метрик."""
+        requests = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / requests, 4) if requests else 0.0,
+        }
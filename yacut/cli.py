@@ -0,0 +1,295 @@
+"""Команды flask для работы со ссылками и их статистикой.
+
+    flask links import links.ndjson --checkpoint links.ckpt
+    flask links export links.csv
+    flask links compact-stats --hourly-retention 30
+    flask links purge-expired --batch-size 500
+    flask links archive --idle-days 30
+"""
+
+import csv
+import json
+import os
+import time
+
+import click
+
+from datetime import datetime, timedelta, timezone
+from flask import current_app
+from flask.cli import AppGroup
+from itertools import chain, islice
+from sqlalchemy import select
+from typing import Any, Dict, Iterator, List, Optional, TextIO
+
+from . import db
+from .archive import archive_cold_links
+from .clicks import click_daily, click_hourly, compact_rollups
+from .expiry import purge_expired
+from .constants import (
+    DISK_LOCATION_KEY,
+    EXPIRES_KEY,
+    OPTIONAL_KEY,
+    PERMANENT_KEY,
+    REQUIRED_KEY,
+    TIMESTAMP_KEY
+)
+from .models import URLMap, URLMapArchive
+from .utils import bulk_create_links
+
+FORMATS = ('ndjson', 'csv')
+CSV_FIELDS = (
+    REQUIRED_KEY, OPTIONAL_KEY, PERMANENT_KEY, EXPIRES_KEY,
+    DISK_LOCATION_KEY, TIMESTAMP_KEY
+)
+CSV_BOOLEANS = {'': None, 'true': True, 'false': False}
+
+links_cli = AppGroup('links', help='Импорт и экспорт коротких ссылок.')
+
+
+def detect_format(stream: TextIO, fmt: Optional[str]) -> str:
+    """Формат файла из параметра или по расширению, по умолчанию ndjson."""
+    if fmt:
+        return fmt
+    name = getattr(stream, 'name', '')
+    return 'csv' if str(name).lower().endswith('.csv') else 'ndjson'
+
+
+def read_ndjson(stream: TextIO) -> Iterator[Any]:
+    """Построчное чтение объектов NDJSON.
+
+    Некорректная строка превращается в None, а не пропускается, чтобы
+    она учитывалась в счетчике записей для контрольных точек.
+    """
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield None
+
+
+def read_csv(stream: TextIO) -> Iterator[Any]:
+    """Чтение записей CSV с заголовком url,custom_id[,...] (CSV_FIELDS)."""
+    for row in csv.DictReader(stream):
+        permanent = (row.get(PERMANENT_KEY) or '').strip().lower()
+        if permanent not in CSV_BOOLEANS:
+            yield None
+            continue
+        yield {
+            REQUIRED_KEY: row.get(REQUIRED_KEY),
+            OPTIONAL_KEY: row.get(OPTIONAL_KEY) or '',
+            PERMANENT_KEY: CSV_BOOLEANS[permanent],
+            EXPIRES_KEY: row.get(EXPIRES_KEY) or None,
+            DISK_LOCATION_KEY: row.get(DISK_LOCATION_KEY) or None,
+            TIMESTAMP_KEY: row.get(TIMESTAMP_KEY) or None,
+        }
+
+
+def read_checkpoint(path: Optional[str]) -> int:
+    """Количество записей, обработанных в прошлых запусках."""
+    if not path or not os.path.exists(path):
+        return 0
+    with open(path, encoding='utf-8') as checkpoint:
+        return int(checkpoint.read().strip() or 0)
+
+
+def write_checkpoint(path: Optional[str], processed: int):
+    """Атомарное сохранение количества обработанных записей."""
+    if not path:
+        return
+    temporary = f'{path}.tmp'
+    with open(temporary, 'w', encoding='utf-8') as checkpoint:
+        checkpoint.write(str(processed))
+    os.replace(temporary, path)
+
+
+def import_batch(
+        batch: List[Any], errors: Optional[TextIO]
+) -> Dict[str, int]:
+    """Создание ссылок одного пакета и запись ошибок."""
+    results = bulk_create_links(batch, server_fields=True)
+    failed = [result for result in results if result.get('error')]
+    if errors is not None:
+        for result in failed:
+            errors.write(json.dumps(result, ensure_ascii=False) + '\n')
+    return {'created': len(results) - len(failed), 'failed': len(failed)}
+
+
+@links_cli.command('import')
+@click.argument('source', type=click.File('r', encoding='utf-8'))
+@click.option('--format', 'fmt', type=click.Choice(FORMATS),
+              help='Формат файла, по умолчанию - по расширению.')
+@click.option('--batch-size', default=1000, show_default=True,
+              type=click.IntRange(min=1), help='Записей в одной транзакции.')
+@click.option('--checkpoint', type=click.Path(dir_okay=False),
+              help='Файл контрольной точки для продолжения импорта.')
+@click.option('--errors', type=click.File('w', encoding='utf-8'),
+              help='Файл NDJSON для записей, которые не удалось создать.')
+def import_links(source, fmt, batch_size, checkpoint, errors):
+    """Импорт ссылок из NDJSON или CSV.
+
+    Записи читаются потоком и создаются пакетами по batch-size штук,
+    поэтому память не зависит от размера файла. После каждого пакета
+    номер последней обработанной записи сохраняется в контрольную
+    точку, и повторный запуск продолжает импорт с нее.
+    Поля disk_location и timestamp из экспорта восстанавливаются:
+    ссылки на файлы Диска продолжают работать, а время создания
+    учитывается при переносе в архив.
+    """
+    reader = read_csv if detect_format(source, fmt) == 'csv' else read_ndjson
+    records = reader(source)
+    processed = read_checkpoint(checkpoint)
+    for _ in islice(records, processed):
+        pass
+
+    totals = {'created': 0, 'failed': 0}
+    started = time.monotonic()
+    while True:
+        batch = list(islice(records, batch_size))
+        if not batch:
+            break
+        for key, value in import_batch(batch, errors).items():
+            totals[key] += value
+        processed += len(batch)
+        write_checkpoint(checkpoint, processed)
+        db.session.expunge_all()
+        rate = sum(totals.values()) / (time.monotonic() - started)
+        click.echo(
+            f'Обработано {processed}: создано {totals["created"]}, '
+            f'ошибок {totals["failed"]}, {rate:.0f} записей/с', err=True
+        )
+    click.echo(
+        f'Импорт завершен: создано {totals["created"]}, '
+        f'ошибок {totals["failed"]}.'
+    )
+
+
+@links_cli.command('export')
+@click.argument('target', type=click.File('w', encoding='utf-8'),
+                default='-')
+@click.option('--format', 'fmt', type=click.Choice(FORMATS),
+              help='Формат файла, по умолчанию - по расширению.')
+@click.option('--batch-size', default=1000, show_default=True,
+              type=click.IntRange(min=1),
+              help='Строк, получаемых из курсора за раз.')
+def export_links(target, fmt, batch_size):
+    """Экспорт всех ссылок в NDJSON или CSV.
+
+    Строки читаются через серверный курсор порциями по batch-size
+    и сразу записываются в файл, не накапливаясь в памяти.
+    Ссылки из архива выгружаются после ссылок из url_map.
+    """
+    statements = [
+        select(
+            table.c.original.label(REQUIRED_KEY),
+            table.c.short.label(OPTIONAL_KEY),
+            table.c.permanent.label(PERMANENT_KEY),
+            table.c.expires_at.label(EXPIRES_KEY),
+            table.c.disk_location.label(DISK_LOCATION_KEY),
+            table.c.timestamp.label(TIMESTAMP_KEY),
+        )
+        .order_by(table.c.id)
+        .execution_options(yield_per=batch_size)
+        for table in (URLMap.__table__, URLMapArchive.__table__)
+    ]
+    writer = None
+    if detect_format(target, fmt) == 'csv':
+        writer = csv.DictWriter(target, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+
+    exported = 0
+    rows = chain.from_iterable(
+        db.session.execute(statement).mappings() for statement in statements
+    )
+    for row in rows:
+        record = dict(row)
+        for key in (EXPIRES_KEY, TIMESTAMP_KEY):
+            if record[key] is not None:
+                record[key] = record[key].isoformat()
+        if writer is None:
+            target.write(json.dumps(record, ensure_ascii=False) + '\n')
+        else:
+            if record[PERMANENT_KEY] is not None:
+                record[PERMANENT_KEY] = str(record[PERMANENT_KEY]).lower()
+            writer.writerow(record)
+        exported += 1
+    click.echo(f'Экспортировано ссылок: {exported}.', err=True)
+
+
+@links_cli.command('compact-stats')
+@click.option('--hourly-retention', type=click.IntRange(min=1),
+              help='Дней хранения почасовых агрегатов, по умолчанию - '
+                   'CLICK_HOURLY_RETENTION_DAYS.')
+@click.option('--daily-retention', type=click.IntRange(min=0),
+              help='Дней хранения суточных агрегатов, 0 - бессрочно, '
+                   'по умолчанию - CLICK_DAILY_RETENTION_DAYS.')
+@click.option('--batch-size', default=500, show_default=True,
+              type=click.IntRange(min=1), help='Строк в одной транзакции.')
+@click.option('--pause', default=0.0, show_default=True,
+              type=click.FloatRange(min=0),
+              help='Пауза между порциями в секундах.')
+def compact_stats(hourly_retention, daily_retention, batch_size, pause):
+    """Удаление устаревших агрегатов переходов.
+
+    Суточные агрегаты ведутся одновременно с почасовыми, поэтому
+    после удаления почасовых данных статистика по дням сохраняется.
+    """
+    retention = {
+        click_hourly: (hourly_retention
+                       or current_app.config['CLICK_HOURLY_RETENTION_DAYS']),
+        click_daily: (current_app.config['CLICK_DAILY_RETENTION_DAYS']
+                      if daily_retention is None else daily_retention),
+    }
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    for table, days in retention.items():
+        if not days:
+            continue
+        deleted = 0
+        for count in compact_rollups(
+                table, now - timedelta(days=days), batch_size, pause
+        ):
+            deleted += count
+            click.echo(f'{table.name}: удалено {deleted}', err=True)
+        click.echo(f'{table.name}: удалено строк {deleted}.')
+
+
+@links_cli.command('purge-expired')
+@click.option('--batch-size', default=500, show_default=True,
+              type=click.IntRange(min=1), help='Записей в одной транзакции.')
+@click.option('--pause', default=0.0, show_default=True,
+              type=click.FloatRange(min=0),
+              help='Пауза между порциями в секундах.')
+def purge_expired_links(batch_size, pause):
+    """Удаление ссылок с истекшим сроком действия.
+
+    Записи удаляются небольшими порциями по индексу expires_at,
+    каждая порция - отдельной короткой транзакцией.
+    """
+    deleted = 0
+    for count in purge_expired(batch_size, pause):
+        deleted += count
+        click.echo(f'Удалено {deleted}', err=True)
+    click.echo(f'Удалено ссылок с истекшим сроком: {deleted}.')
+
+
+@links_cli.command('archive')
+@click.option('--idle-days', type=click.IntRange(min=1),
+              help='Дней без переходов, по умолчанию - ARCHIVE_IDLE_DAYS.')
+@click.option('--batch-size', default=500, show_default=True,
+              type=click.IntRange(min=1), help='Записей в одной транзакции.')
+@click.option('--pause', default=0.0, show_default=True,
+              type=click.FloatRange(min=0),
+              help='Пауза между порциями в секундах.')
+def archive_links(idle_days, batch_size, pause):
+    """Перенос давно неиспользуемых ссылок в архив.
+
+    Ссылки из архива продолжают работать и возвращаются в основную
+    таблицу при первом обращении.
+    """
+    idle_days = idle_days or current_app.config['ARCHIVE_IDLE_DAYS']
+    archived = 0
+    for count in archive_cold_links(idle_days, batch_size, pause):
+        archived += count
+        click.echo(f'Перенесено {archived}', err=True)
+    click.echo(f'Перенесено в архив ссылок: {archived}.')
@@ -0,0 +1,421 @@
+"""Подсчет переходов по коротким ссылкам с отложенной записью в БД.
+
+Перенаправление только увеличивает счетчик в памяти процесса.
+Фоновый поток каждые CLICK_FLUSH_INTERVAL секунд забирает накопленные
+счетчики и пакетными upsert добавляет их в общий счетчик click_stats
+и в агрегаты по часам и суткам click_hourly и click_daily.
+Буфер сбрасывается и раньше, если в нем набралось CLICK_BUFFER_LIMIT
+ссылок, поэтому при падении процесса теряются переходы не более чем
+за один интервал или из одного неполного буфера.
+"""
+
+import atexit
+import threading
+import time
+
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import Table, delete, select, tuple_, update
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.sql import Executable
+from typing import (
+    Any, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+)
+
+from . import app, db, metrics
+from .error_handlers import InvalidAPIUsage
+from .models import (
+    ClickDaily, ClickHourly, ClickStats, URLMap, URLMapArchive
+)
+from .utils import parse_timestamp
+
+click_stats = ClickStats.__table__
+click_hourly = ClickHourly.__table__
+click_daily = ClickDaily.__table__
+url_map = URLMap.__table__
+archive = URLMapArchive.__table__
+
+HOUR = 3600
+IN_CLAUSE_CHUNK = 500
+
+ROLLUP_TABLES = {'hour': click_hourly, 'day': click_daily}
+DEFAULT_RANGES = {'hour': timedelta(days=1), 'day': timedelta(days=30)}
+
+UPSERT_DIALECTS = {
+    'sqlite': sqlite.insert,
+    'postgresql': postgresql.insert,
+}
+
+
+def upsert_statement(table: Table, dialect: str) -> Optional[Executable]:
+    """Пакетный upsert счетчиков для диалекта БД или None, если его нет.
+
+    При конфликте по первичному ключу clicks складываются, а остальные
+    колонки получают новые значения.
+    """
+    replaced = [
+        column.name for column in table.columns
+        if not column.primary_key and column.name != 'clicks'
+    ]
+    if dialect in UPSERT_DIALECTS:
+        statement = UPSERT_DIALECTS[dialect](table)
+        return statement.on_conflict_do_update(
+            index_elements=list(table.primary_key.columns),
+            set_={
+                'clicks': table.c.clicks + statement.excluded.clicks,
+                **{name: statement.excluded[name] for name in replaced},
+            }
+        )
+    if dialect in ('mysql', 'mariadb'):
+        statement = mysql.insert(table)
+        return statement.on_duplicate_key_update(
+            clicks=table.c.clicks + statement.inserted.clicks,
+            **{name: statement.inserted[name] for name in replaced},
+        )
+    return None
+
+
+def add_counts(table: Table, rows: List[Dict[str, Any]]):
+    """Прибавление счетчиков к строкам таблицы с созданием недостающих.
+
+    Для БД без upsert каждая строка сначала обновляется, а если
+    ее еще нет - вставляется.
+    """
+    if not rows:
+        return
+    statement = upsert_statement(table, db.session.get_bind().dialect.name)
+    if statement is not None:
+        db.session.execute(statement, rows)
+        return
+    keys = [column.name for column in table.primary_key.columns]
+    for row in rows:
+        values = {name: value for name, value in row.items()
+                  if name not in keys}
+        values['clicks'] = table.c.clicks + row['clicks']
+        updated = db.session.execute(
+            update(table)
+            .where(*(table.c[key] == row[key] for key in keys))
+            .values(**values)
+        )
+        if not updated.rowcount:
+            db.session.execute(table.insert(), row)
+
+
+def link_ids(shorts: Iterable[str]) -> Dict[str, int]:
+    """Идентификаторы записей url_map для набора коротких ссылок."""
+    shorts = list(shorts)
+    ids = {}
+    for start in range(0, len(shorts), IN_CLAUSE_CHUNK):
+        ids.update(db.session.execute(
+            select(url_map.c.short, url_map.c.id)
+            .where(url_map.c.short.in_(shorts[start:start + IN_CLAUSE_CHUNK]))
+        ).all())
+    return ids
+
+
+def stats_link_id(short_id: str) -> Optional[int]:
+    """Идентификатор ссылки для статистики, в том числе из архива.
+
+    Агрегаты переходов хранятся по id, который сохраняется при
+    переносе ссылки в архив, поэтому статистика архивной ссылки
+    доступна без ее возврата в url_map.
+    """
+    link_id = link_ids([short_id]).get(short_id)
+    if link_id is not None:
+        return link_id
+    return db.session.execute(
+        select(archive.c.id).where(archive.c.short == short_id)
+    ).scalar()
+
+
+def rollup_rows(
+        counts: Dict[Tuple[int, datetime], int]
+) -> List[Dict[str, Any]]:
+    """Строки для таблицы агрегатов из счетчиков по ссылке и интервалу."""
+    return [
+        {'link_id': link_id, 'bucket': bucket, 'clicks': clicks}
+        for (link_id, bucket), clicks in counts.items()
+    ]
+
+
+def save_clicks(counts: Dict[Tuple[str, int], int], clicked_at: datetime):
+    """Запись счетчиков переходов одной транзакцией.
+
+    Принимает счетчики по короткой ссылке и номеру часа от начала
+    эпохи. Обновляет общий счетчик в click_stats и агрегаты по часам
+    и по суткам в click_hourly и click_daily. Переходы по ссылкам,
+    которых уже нет в url_map, учитываются только в click_stats.
+    """
+    totals: Counter = Counter()
+    hourly: Counter = Counter()
+    daily: Counter = Counter()
+    ids = link_ids({short for short, _ in counts})
+    for (short, hour), clicks in counts.items():
+        totals[short] += clicks
+        if short not in ids:
+            continue
+        bucket = datetime.fromtimestamp(hour * HOUR, timezone.utc)
+        bucket = bucket.replace(tzinfo=None)
+        hourly[ids[short], bucket] += clicks
+        daily[ids[short], bucket.replace(hour=0)] += clicks
+
+    add_counts(click_stats, [
+        {'short': short, 'clicks': clicks, 'last_click': clicked_at}
+        for short, clicks in totals.items()
+    ])
+    add_counts(click_hourly, rollup_rows(hourly))
+    add_counts(click_daily, rollup_rows(daily))
+    db.session.commit()
+
+
+class ClickCounter:
+    """Буфер счетчиков переходов с фоновой записью в БД.
+
+    При background=False фоновый поток не запускается, и буфер
+    сбрасывается только при заполнении или явным вызовом flush.
+    """
+
+    def __init__(
+            self, interval: float, buffer_limit: int, background: bool = True
+    ):
+        """Инициализация пустого буфера."""
+        if not isinstance(buffer_limit, int) or buffer_limit < 1:
+            raise ValueError(
+                '\"buffer_limit\" - должен быть целым положительным числом'
+            )
+        self.interval = interval
+        self.buffer_limit = buffer_limit
+        self.background = background
+        self.flushes = 0
+        self.flushed_clicks = 0
+        self.flush_errors = 0
+        self.dropped_clicks = 0
+        self.last_flush_seconds = 0.0
+        self._pending: Counter = Counter()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+
+    def record(self, short_id: str):
+        """Учет одного перехода по короткой ссылке в текущем часе."""
+        hour = int(time.time()) // HOUR
+        with self._lock:
+            self._pending[short_id, hour] += 1
+            full = len(self._pending) >= self.buffer_limit
+        if self.background:
+            self._ensure_worker()
+            if full:
+                self._wakeup.set()
+        elif full:
+            self.safe_flush()
+
+    def pending(self, short_id: str) -> int:
+        """Переходы по ссылке, еще не записанные в БД."""
+        with self._lock:
+            return sum(
+                clicks for (short, _), clicks in self._pending.items()
+                if short == short_id
+            )
+
+    def _take(self) -> Counter:
+        """Извлечение накопленных счетчиков из буфера."""
+        with self._lock:
+            counts, self._pending = self._pending, Counter()
+        return counts
+
+    def _restore(self, counts: Counter):
+        """Возврат несохраненных счетчиков в буфер.
+
+        Если буфер уже заполнен новыми переходами, старые счетчики
+        отбрасываются, чтобы память не росла при недоступной БД.
+        """
+        with self._lock:
+            if len(self._pending) >= self.buffer_limit:
+                self.dropped_clicks += sum(counts.values())
+                return
+            self._pending.update(counts)
+
+    def flush(self):
+        """Запись накопленных счетчиков в БД одной транзакцией."""
+        with self._flush_lock:
+            counts = self._take()
+            if not counts:
+                return
+            started = time.monotonic()
+            try:
+                save_clicks(counts, datetime.now(timezone.utc))
+            except Exception:
+                db.session.rollback()
+                self.flush_errors += 1
+                self._restore(counts)
+                raise
+            self.flushes += 1
+            self.flushed_clicks += sum(counts.values())
+            self.last_flush_seconds = round(time.monotonic() - started, 6)
+
+    def _run(self):
+        """Цикл фонового потока записи."""
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            with app.app_context():
+                self.safe_flush()
+
+    def _ensure_worker(self):
+        """Запуск фонового потока при первом переходе."""
+        if self._worker is not None:
+            return
+        with self._start_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._run, name='click-flusher', daemon=True
+                )
+                self._worker.start()
+
+    def safe_flush(self):
+        """Запись буфера с логированием ошибки вместо исключения."""
+        try:
+            self.flush()
+        except Exception:
+            app.logger.exception('Ошибка записи счетчиков переходов')
+
+    def shutdown(self):
+        """Запись остатка буфера при завершении процесса."""
+        with app.app_context():
+            self.safe_flush()
+
+    def clear(self):
+        """Очистка буфера без записи в БД."""
+        self._take()
+
+    def stats(self) -> Dict[str, Any]:
+        """Состояние буфера для метрик."""
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            'pending_links': pending,
+            'flushes': self.flushes,
+            'flushed_clicks': self.flushed_clicks,
+            'flush_errors': self.flush_errors,
+            'dropped_clicks': self.dropped_clicks,
+            'last_flush_seconds': self.last_flush_seconds,
+        }
+
+
+click_counter = ClickCounter(
+    app.config['CLICK_FLUSH_INTERVAL'],
+    app.config['CLICK_BUFFER_LIMIT'],
+    background=app.config['CLICK_FLUSH_INTERVAL'] > 0
+)
+metrics.register('clicks', click_counter.stats)
+atexit.register(click_counter.shutdown)
+
+
+def get_clicks(short_id: str) -> Dict[str, Any]:
+    """Число переходов по ссылке с учетом еще не записанных в БД."""
+    row = db.session.execute(
+        click_stats.select().where(click_stats.c.short == short_id)
+    ).first()
+    stored = row.clicks if row is not None else 0
+    return {
+        'clicks': stored + click_counter.pending(short_id),
+        'last_click': (
+            row.last_click.isoformat()
+            if row is not None and row.last_click else None
+        ),
+    }
+
+
+def stats_query(
+        args: Mapping[str, str]
+) -> Tuple[str, datetime, datetime]:
+    """Проверка параметров запроса статистики переходов.
+
+    Возвращает гранулярность ('hour' или 'day') и границы интервала:
+    from выравнивается по началу часа или суток, а в ответ попадают
+    интервалы, начавшиеся раньше to. По умолчанию - последние сутки
+    по часам или последние 30 дней по дням.
+    """
+    granularity = args.get('granularity', 'day')
+    if granularity not in DEFAULT_RANGES:
+        raise InvalidAPIUsage(
+            '\"granularity\" должно быть одним из: hour, day'
+        )
+    if 'to' in args:
+        end = parse_timestamp(args['to'])
+    else:
+        end = datetime.now(timezone.utc).replace(tzinfo=None)
+    if 'from' in args:
+        start = parse_timestamp(args['from'])
+    else:
+        start = end - DEFAULT_RANGES[granularity]
+    start = truncate(start, granularity)
+    if start >= end:
+        raise InvalidAPIUsage('Начало интервала должно быть раньше конца')
+    return granularity, start, end
+
+
+def truncate(moment: datetime, granularity: str) -> datetime:
+    """Начало часа или суток, к которым относится момент времени."""
+    moment = moment.replace(minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0) if granularity == 'day' else moment
+
+
+def click_series(
+        link_id: int, granularity: str, start: datetime, end: datetime
+) -> List[Dict[str, Any]]:
+    """Переходы по ссылке по интервалам из таблицы агрегатов.
+
+    Запрос читает диапазон первичного ключа (link_id, bucket),
+    поэтому его стоимость зависит от длины интервала, а не от
+    общего числа переходов. Интервалы без переходов не возвращаются.
+    """
+    table = ROLLUP_TABLES[granularity]
+    rows = db.session.execute(
+        select(table.c.bucket, table.c.clicks)
+        .where(
+            table.c.link_id == link_id,
+            table.c.bucket >= start,
+            table.c.bucket < end,
+        )
+        .order_by(table.c.bucket)
+    )
+    return [
+        {'start': bucket.isoformat(), 'clicks': clicks}
+        for bucket, clicks in rows
+    ]
+
+
+def compact_rollups(
+        table: Table,
+        cutoff: datetime,
+        batch_size: int = 500,
+        pause: float = 0
+) -> Iterator[int]:
+    """Удаление агрегатов старше cutoff порциями по batch_size строк.
+
+    Старые строки отбираются по индексу bucket и удаляются
+    по первичному ключу. Каждая порция удаляется отдельной
+    транзакцией, чтобы не держать долгую блокировку таблицы;
+    между порциями можно сделать паузу pause секунд.
+    Возвращает итератор по числу удаленных в каждой порции строк.
+    """
+    key = tuple_(table.c.link_id, table.c.bucket)
+    while True:
+        rows = db.session.execute(
+            select(table.c.link_id, table.c.bucket)
+            .where(table.c.bucket < cutoff)
+            .order_by(table.c.bucket)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            return
+        db.session.execute(
+            delete(table).where(key.in_([tuple(row) for row in rows]))
+        )
+        db.session.commit()
+        yield len(rows)
+        if pause:
+            time.sleep(pause)
@@ -1,15 +1,28 @@
 """Константы для проекта yacut."""
 
 LINK = 2048
+URL_DIGEST_SIZE = 16
 SHORT_LINK_MAX = 16
 BAD_URL = 'files'
 RANDOM_STRING_LENGTH = 6
+SHORT_ID_MAX_ATTEMPTS = 10
 API_HOST = 'https://cloud-api.yandex.net/'
 API_VERSION = 'v1'
 REQUEST_UPLOAD_URL = f'{API_HOST}{API_VERSION}/disk/resources/upload'
 DOWNLOAD_LINK_URL = f'{API_HOST}{API_VERSION}/disk/resources/download'
-OVERWRITE = True
+# Префикс исходной ссылки для файлов ЯндексДиска. Служит только для
+# отображения: файл определяется по url_map.disk_location.
+DISK_LINK_PREFIX = 'disk:'
+# Пути загрузки уникальны (см. utils.upload_path), файл с тем же
+# путем не перезаписывается.
+OVERWRITE = False
 REQUIRED_KEY = 'url'
 OPTIONAL_KEY = 'custom_id'
+PERMANENT_KEY = 'permanent'
+REUSE_KEY = 'reuse'
+EXPIRES_KEY = 'expires_at'
+# Поля, которые задает только сервер; принимаются лишь при импорте.
+DISK_LOCATION_KEY = 'disk_location'
+TIMESTAMP_KEY = 'timestamp'
 TO_DICT_SHORT_URL = 'short_link'
 CORRECT_SYMBOLS = r'^[a-zA-Z0-9]*$'
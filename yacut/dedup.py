@@ -0,0 +1,246 @@
+"""Дедупликация файлов, загружаемых на ЯндексДиск, по содержимому.
+
+Содержимое файла хешируется (SHA-256) по мере передачи на Диск, после
+загрузки дайджест и размер сохраняются в uploaded_file вместе с путем
+на Диске и короткой ссылкой. Перед загрузкой проверяется, есть ли
+файлы с тем же дайджестом первых DEDUP_PREFIX_SIZE байт (и тем же
+размером, если он известен заранее). Если нет, файл заведомо новый
+и сразу передается на Диск. Если есть, файл дочитывается
+с хешированием во временный файл, и при совпадении полного дайджеста
+вместо загрузки возвращается существующая короткая ссылка.
+
+Каждый файл загружается по новому пути (см. utils.upload_path), поэтому
+содержимое по записанному пути не меняется. Записи о прежнем
+содержимом по пути загруженного файла все равно удаляются, чтобы
+дубликат никогда не указывал на другое содержимое.
+"""
+
+import hashlib
+import os
+
+from sqlalchemy import delete, exists, insert, select
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from tempfile import SpooledTemporaryFile
+from typing import (
+    Any, BinaryIO, Callable, Dict, Iterable, List, Optional, Tuple
+)
+
+from . import app, db
+from .lookup import short_id_exists
+from .models import UploadedFile
+
+uploaded_file = UploadedFile.__table__
+
+
+class ContentHasher:
+    """Дайджест содержимого и его первых prefix_size байт."""
+
+    def __init__(self, prefix_size: int):
+        """Инициализация пустого дайджеста."""
+        self.prefix_size = prefix_size
+        self.reset()
+
+    def reset(self):
+        """Сброс дайджеста, например перед повторным чтением файла."""
+        self.size = 0
+        self._digest = hashlib.sha256()
+        self._prefix = hashlib.sha256()
+
+    def update(self, chunk: bytes):
+        """Учет очередного блока содержимого."""
+        if self.size < self.prefix_size:
+            self._prefix.update(chunk[:self.prefix_size - self.size])
+        self._digest.update(chunk)
+        self.size += len(chunk)
+
+    @property
+    def digest(self) -> str:
+        """Дайджест всего прочитанного содержимого."""
+        return self._digest.hexdigest()
+
+    @property
+    def prefix(self) -> str:
+        """Дайджест первых prefix_size байт содержимого."""
+        return self._prefix.hexdigest()
+
+    def record(self, location: str) -> Dict[str, Any]:
+        """Данные для строки uploaded_file без короткой ссылки."""
+        return {
+            'digest': self.digest,
+            'size': self.size,
+            'prefix': self.prefix,
+            'location': location,
+        }
+
+
+class HashingStream:
+    """Чтение потока с подсчетом дайджеста; head отдается первым.
+
+    Если исходный поток поддерживает перемещение, его поддерживает
+    и обертка: так загрузку можно повторить после временной ошибки.
+    """
+
+    def __init__(self, stream: BinaryIO, hasher: ContentHasher, head: bytes):
+        """Инициализация; head уже учтен в hasher."""
+        self.stream = stream
+        self.hasher = hasher
+        self.head = head
+        self.start = None
+        if self.seekable():
+            self.start = stream.tell() - len(head)
+
+    def seekable(self) -> bool:
+        """Поддерживает ли исходный поток перемещение."""
+        return getattr(self.stream, 'seekable', lambda: False)()
+
+    def tell(self) -> int:
+        """Позиция с учетом еще не отданного head."""
+        return self.stream.tell() - len(self.head)
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        """Перемещение в потоке; дайджест пересчитывается с начала файла."""
+        position = self.stream.seek(offset, whence)
+        if position < self.start:
+            raise ValueError('Перемещение до начала файла')
+        self.stream.seek(self.start)
+        self.head = b''
+        self.hasher.reset()
+        self.hasher.update(read_head(self.stream, position - self.start))
+        return position
+
+    def read(self, size: int = -1) -> bytes:
+        """Очередной блок содержимого."""
+        if self.head:
+            chunk, self.head = self.head, b''
+            return chunk
+        chunk = self.stream.read(size)
+        self.hasher.update(chunk)
+        return chunk
+
+
+def remaining_size(stream: BinaryIO) -> Optional[int]:
+    """Размер непрочитанной части потока, если по нему можно перемещаться."""
+    if not getattr(stream, 'seekable', lambda: False)():
+        return None
+    position = stream.tell()
+    size = stream.seek(0, os.SEEK_END) - position
+    stream.seek(position)
+    return size
+
+
+def read_head(stream: BinaryIO, size: int) -> bytes:
+    """Первые size байт потока (меньше, если поток короче)."""
+    chunks = []
+    while size > 0 and (chunk := stream.read(size)):
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+def spool_rest(
+        stream: BinaryIO,
+        hasher: ContentHasher,
+        head: bytes,
+        chunk_size: int,
+        memory_limit: int
+) -> BinaryIO:
+    """Дочитывание потока с хешированием; возвращает поток с начала.
+
+    Поток без перемещения сохраняется во временный файл, который
+    держит в памяти не больше memory_limit байт.
+    """
+    seekable = remaining_size(stream) is not None
+    if seekable:
+        start = stream.tell() - len(head)
+        spool = stream
+    else:
+        spool = SpooledTemporaryFile(max_size=memory_limit)
+        spool.write(head)
+    while chunk := stream.read(chunk_size):
+        hasher.update(chunk)
+        if not seekable:
+            spool.write(chunk)
+    spool.seek(start if seekable else 0)
+    return spool
+
+
+def has_candidates(prefix: str, size: Optional[int]) -> bool:
+    """Есть ли загруженные файлы с тем же началом и размером."""
+    condition = uploaded_file.c.prefix == prefix
+    if size is not None:
+        condition = condition & (uploaded_file.c.size == size)
+    return db.session.execute(select(exists().where(condition))).scalar()
+
+
+def find_upload(digest: str, size: int) -> Optional[str]:
+    """Короткая ссылка на уже загруженный файл с тем же содержимым."""
+    short = db.session.execute(
+        select(uploaded_file.c.short).where(
+            uploaded_file.c.digest == digest, uploaded_file.c.size == size
+        )
+    ).scalar()
+    if short is None or not short_id_exists(short):
+        return None
+    return short
+
+
+def check_duplicate(
+        stream: BinaryIO,
+        hasher: ContentHasher,
+        chunk_size: int,
+        memory_limit: int
+) -> Tuple[BinaryIO, Optional[str]]:
+    """Проверка, загружался ли уже файл с тем же содержимым.
+
+    Возвращает поток для загрузки файла на Диск и короткую ссылку
+    на существующий файл или None. Вызывается вне цикла событий.
+    """
+    size = remaining_size(stream)
+    head = read_head(stream, hasher.prefix_size)
+    hasher.update(head)
+    if len(head) < hasher.prefix_size:
+        size = len(head)
+    with app.app_context():
+        if not has_candidates(hasher.prefix, size):
+            return HashingStream(stream, hasher, head), None
+        stream = spool_rest(stream, hasher, head, chunk_size, memory_limit)
+        return stream, find_upload(hasher.digest, hasher.size)
+
+
+def record_uploads(
+        rows: List[Dict[str, Any]], locations: Iterable[str] = ()
+):
+    """Сохранение загруженных файлов для последующей дедупликации.
+
+    Сначала удаляются записи о файлах по путям locations, куда
+    только что были загружены файлы. Файлы с уже известным
+    содержимым (загруженные параллельно) пропускаются. Ошибки
+    записи не влияют на результат загрузки.
+    """
+    locations = list(locations)
+    try:
+        if locations:
+            db.session.execute(delete(uploaded_file).where(
+                uploaded_file.c.location.in_(locations)
+            ))
+            db.session.commit()
+    except SQLAlchemyError:
+        db.session.rollback()
+        app.logger.exception('Не удалось удалить перезаписанные файлы')
+        return
+    for row in rows:
+        try:
+            db.session.execute(insert(uploaded_file), row)
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+        except SQLAlchemyError:
+            db.session.rollback()
+            app.logger.exception('Не удалось сохранить загруженный файл')
+            return
+
+
+def run_in_app_context(function: Callable, *args: Any) -> Any:
+    """Вызов function в новом контексте приложения (для потоков)."""
+    with app.app_context():
+        return function(*args)
@@ -0,0 +1,169 @@
+"""Ссылки на скачивание файлов ЯндексДиска, получаемые при переходе.
+
+Для загруженных файлов в url_map хранится не подписанная ссылка
+на скачивание (она действует ограниченное время), а путь к файлу
+на Диске в колонке disk_location. Ее заполняет только сервер при
+загрузке, поэтому пользователь не может получить ссылку на чужой
+путь, передав его в исходной ссылке. Ссылка на скачивание
+запрашивается у API Диска при переходе по короткой ссылке
+и кэшируется по пути на DISK_LINK_TTL секунд. Когда прошла доля
+DISK_LINK_REFRESH_AHEAD этого времени, переход получает ссылку
+из кэша, а новая запрашивается в фоне: популярные файлы не ждут API.
+"""
+
+import os
+import threading
+import time
+
+from aiohttp import ClientSession, ClientTimeout
+from concurrent.futures import Future
+from functools import partial
+from typing import Any, Dict, Optional
+
+from . import app, metrics
+from .cache import TTLCache
+from .constants import DOWNLOAD_LINK_URL
+from .error_handlers import AsyncGetDownloadURLError
+from .http_client import disk_client
+from .redirects import PrebuiltRedirect
+from .resilience import check_response, disk_api
+
+
+async def get_download_url(session: ClientSession, location: str) -> str:
+    """Получение ссылки на загрузку файла по короткому пути на ЯндексДиске.
+
+    Временные ошибки API повторяются (см. resilience).
+    """
+    async def request() -> str:
+        async with session.get(
+            headers={"Authorization": f'OAuth {os.getenv("DISK_TOKEN")}'},
+            url=DOWNLOAD_LINK_URL,
+            params={'path': location},
+            timeout=ClientTimeout(total=app.config['DISK_API_TIMEOUT'])
+        ) as response:
+            check_response(response)
+            data = await response.json()
+            return data['href']
+
+    try:
+        return await disk_api.call(request)
+    except Exception:
+        raise AsyncGetDownloadURLError
+
+
+async def fetch_download_url(session: ClientSession, location: str) -> str:
+    """Запрос ссылки на скачивание в пределах DISK_DOWNLOAD_URL_CONCURRENCY."""
+    async with disk_client.limiter('download_url'):
+        return await get_download_url(session, location)
+
+
+class DownloadLink:
+    """Ссылка на скачивание и готовое перенаправление на нее."""
+
+    __slots__ = ('href', 'redirect', 'fetched_at')
+
+    def __init__(self, href: str):
+        """Сборка перенаправления; ссылка временная, поэтому 302."""
+        self.href = href
+        self.redirect = PrebuiltRedirect(href, False, 0)
+        self.fetched_at = time.monotonic()
+
+
+class DiskLinkResolver:
+    """Кэш ссылок на скачивание по пути к файлу с фоновым обновлением."""
+
+    def __init__(self, maxsize: int, ttl: float, refresh_ahead: float):
+        """Инициализация пустого кэша."""
+        self.refresh_after = ttl * refresh_ahead
+        self.fetches = 0
+        self.refreshes = 0
+        self.errors = 0
+        self._cache = TTLCache(maxsize, ttl)
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def _store(self, location: str, href: str) -> DownloadLink:
+        """Сохранение полученной ссылки в кэше."""
+        link = DownloadLink(href)
+        self._cache.set(location, link)
+        return link
+
+    def _cached(self, location: str) -> Optional[DownloadLink]:
+        """Ссылка из кэша с запуском обновления, если она стареет."""
+        link = self._cache.get(location)
+        if (link is not None
+                and time.monotonic() - link.fetched_at > self.refresh_after):
+            self._refresh(location)
+        return link
+
+    def _refresh(self, location: str):
+        """Фоновый запрос новой ссылки, не больше одного на путь."""
+        with self._lock:
+            if location in self._refreshing:
+                return
+            self._refreshing.add(location)
+        future = disk_client.submit(fetch_download_url, location)
+        future.add_done_callback(partial(self._refreshed, location))
+
+    def _refreshed(self, location: str, future: Future):
+        """Сохранение обновленной ссылки; при ошибке остается прежняя."""
+        with self._lock:
+            self._refreshing.discard(location)
+        if future.exception() is not None:
+            self.errors += 1
+            return
+        self.refreshes += 1
+        self._store(location, future.result())
+
+    def get(self, location: str) -> DownloadLink:
+        """Ссылка на скачивание файла; при промахе кэша ждет API Диска.
+
+        Вызывается вне циклов событий. Если получить ссылку
+        не удалось, выбрасывает AsyncGetDownloadURLError.
+        """
+        link = self._cached(location)
+        if link is not None:
+            return link
+        self.fetches += 1
+        try:
+            href = disk_client.call(fetch_download_url, location)
+        except AsyncGetDownloadURLError:
+            self.errors += 1
+            raise
+        return self._store(location, href)
+
+    async def get_async(self, location: str) -> DownloadLink:
+        """То же, что get, для вызова из цикла событий."""
+        link = self._cached(location)
+        if link is not None:
+            return link
+        self.fetches += 1
+        try:
+            href = await disk_client.run(fetch_download_url, location)
+        except AsyncGetDownloadURLError:
+            self.errors += 1
+            raise
+        return self._store(location, href)
+
+    def clear(self):
+        """Сброс кэша ссылок."""
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Счетчики для метрик."""
+        return {
+            'size': len(self._cache),
+            'hits': self._cache.hits,
+            'misses': self._cache.misses,
+            'fetches': self.fetches,
+            'refreshes': self.refreshes,
+            'errors': self.errors,
+        }
+
+
+download_links = DiskLinkResolver(
+    app.config['DISK_LINK_CACHE_SIZE'],
+    app.config['DISK_LINK_TTL'],
+    app.config['DISK_LINK_REFRESH_AHEAD'],
+)
+metrics.register('disk_links', download_links.stats)
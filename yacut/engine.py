@@ -0,0 +1,74 @@
+"""Настройка движков SQLAlchemy проекта YaCut.
+
+Для SQLite каждому новому соединению задаются PRAGMA из настроек:
+журнал WAL позволяет читателям не ждать писателя, а busy_timeout
+заставляет писателя подождать блокировку вместо немедленной ошибки
+"database is locked". Размер пула соединений задается для всех БД,
+кроме SQLite в памяти, которой достаточно одного соединения.
+"""
+
+from sqlalchemy import event
+from sqlalchemy.engine import URL, Engine, make_url
+from typing import Any, Dict, List, Mapping, Union
+
+SQLITE_PRAGMAS = {
+    'SQLITE_BUSY_TIMEOUT': 'busy_timeout',
+    'SQLITE_JOURNAL_MODE': 'journal_mode',
+    'SQLITE_SYNCHRONOUS': 'synchronous',
+    'SQLITE_CACHE_SIZE': 'cache_size',
+    'SQLITE_MMAP_SIZE': 'mmap_size',
+}
+
+
+def is_memory_sqlite(url: Union[str, URL, None]) -> bool:
+    """Указывает ли адрес на БД SQLite в памяти."""
+    if not url:
+        return False
+    url = make_url(url)
+    return (url.get_backend_name() == 'sqlite'
+            and url.database in (None, '', ':memory:'))
+
+
+def engine_options(
+        config: Mapping[str, Any], url: Union[str, URL, None] = None
+) -> Dict[str, Any]:
+    """Параметры пула соединений для движка БД по адресу url.
+
+    По умолчанию - для основной БД из SQLALCHEMY_DATABASE_URI.
+    """
+    if is_memory_sqlite(url or config['SQLALCHEMY_DATABASE_URI']):
+        return {}
+    return {
+        'pool_size': config['DATABASE_POOL_SIZE'],
+        'max_overflow': config['DATABASE_MAX_OVERFLOW'],
+        'pool_timeout': config['DATABASE_POOL_TIMEOUT'],
+        'pool_recycle': config['DATABASE_POOL_RECYCLE'],
+    }
+
+
+def sqlite_pragmas(config: Mapping[str, Any]) -> List[str]:
+    """Команды PRAGMA для нового соединения с SQLite.
+
+    Пустое значение настройки оставляет значение SQLite по умолчанию.
+    """
+    return [
+        f'PRAGMA {pragma} = {config[key]}'
+        for key, pragma in SQLITE_PRAGMAS.items()
+        if config[key] not in (None, '')
+    ]
+
+
+def configure_sqlite(engine: Engine, config: Mapping[str, Any]):
+    """Подключение PRAGMA из настроек к соединениям движка SQLite."""
+    if engine.dialect.name != 'sqlite':
+        return
+    pragmas = sqlite_pragmas(config)
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
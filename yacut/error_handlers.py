@@ -43,6 +43,10 @@ class AsyncGetDownloadURLError(YaCutErrors):
     """Ошибка при получении ссылки для скачивания."""
 
 
+class DiskUnavailableError(YaCutErrors):
+    """API ЯндексДиска временно недоступно, запрос не отправлялся."""
+
+
 class InvalidAPIUsage(Exception):
     """Исключение для API."""
 
@@ -0,0 +1,86 @@
+"""Удаление коротких ссылок с истекшим сроком действия.
+
+Записи выбираются по индексу url_map.expires_at порциями с ключевой
+пагинацией (expires_at, id) и удаляются короткими транзакциями, чтобы
+удаление не держало долгих блокировок таблицы.
+"""
+
+import time
+
+from datetime import datetime, timezone
+from sqlalchemy import and_, delete, or_, select
+from typing import Iterator, List, Optional, Tuple
+
+from . import db
+from .clicks import click_daily, click_hourly, click_stats
+from .lookup import invalidate
+from .models import URLMap
+
+url_map = URLMap.__table__
+
+
+def expired_batch(
+        now: datetime,
+        after: Optional[Tuple[datetime, int]],
+        batch_size: int
+) -> List[Tuple[int, str, datetime]]:
+    """Очередная порция истекших ссылок после ключа after."""
+    statement = (
+        select(url_map.c.id, url_map.c.short, url_map.c.expires_at)
+        .where(url_map.c.expires_at <= now)
+        .order_by(url_map.c.expires_at, url_map.c.id)
+        .limit(batch_size)
+    )
+    if after is not None:
+        expires_at, row_id = after
+        statement = statement.where(or_(
+            url_map.c.expires_at > expires_at,
+            and_(url_map.c.expires_at == expires_at, url_map.c.id > row_id),
+        ))
+    return db.session.execute(statement).all()
+
+
+def delete_links(ids: List[int], shorts: List[str]):
+    """Удаление ссылок вместе с их статистикой переходов."""
+    db.session.execute(delete(click_hourly).where(
+        click_hourly.c.link_id.in_(ids)
+    ))
+    db.session.execute(delete(click_daily).where(
+        click_daily.c.link_id.in_(ids)
+    ))
+    db.session.execute(delete(click_stats).where(
+        click_stats.c.short.in_(shorts)
+    ))
+    db.session.execute(delete(url_map).where(url_map.c.id.in_(ids)))
+
+
+def purge_expired(
+        batch_size: int = 500,
+        pause: float = 0,
+        now: Optional[datetime] = None
+) -> Iterator[int]:
+    """Удаление ссылок, срок которых истек к моменту now.
+
+    Каждая порция из batch_size записей удаляется отдельной
+    транзакцией, между порциями можно сделать паузу pause секунд.
+    Возвращает итератор по числу удаленных в каждой порции записей.
+    """
+    if now is None:
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+    after = None
+    while True:
+        rows = expired_batch(now, after, batch_size)
+        if not rows:
+            return
+        delete_links(
+            [row_id for row_id, _, _ in rows],
+            [short for _, short, _ in rows]
+        )
+        db.session.commit()
+        for _, short, _ in rows:
+            invalidate(short)
+        row_id, _, expires_at = rows[-1]
+        after = (expires_at, row_id)
+        yield len(rows)
+        if pause:
+            time.sleep(pause)
@@ -2,11 +2,11 @@
 
 from flask_wtf import FlaskForm
 from flask_wtf.file import MultipleFileField
-from wtforms import SubmitField, URLField
-from wtforms.validators import DataRequired, Length, URL
+from wtforms import DateTimeLocalField, SubmitField, URLField
+from wtforms.validators import DataRequired, Length, Optional, URL
 
 from .constants import LINK
-from .validators import ValidateShortURL
+from .validators import ValidateFutureDate, ValidateShortURL
 
 
 class URLForm(FlaskForm):
@@ -27,6 +27,11 @@ class URLForm(FlaskForm):
         'Ваш вариант короткой ссылки',
         validators=[ValidateShortURL()]
     )
+    expires_at = DateTimeLocalField(
+        'Действует до (UTC)',
+        format='%Y-%m-%dT%H:%M',
+        validators=[Optional(), ValidateFutureDate()]
+    )
     submit = SubmitField('Создать')
 
 
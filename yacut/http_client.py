@@ -0,0 +1,163 @@
+"""Общий HTTP-клиент приложения для запросов к API Яндекс Диска.
+
+Flask выполняет каждую асинхронную view-функцию в новом цикле событий,
+а сессия aiohttp и ее пул соединений привязаны к циклу, в котором
+созданы. Поэтому клиент держит собственный цикл событий в фоновом
+потоке и одну сессию в нем на все время жизни процесса: соединения
+с cloud-api.yandex.net переиспользуются между запросами, без новых
+DNS-запросов и рукопожатий TCP и TLS.
+
+Клиент также ограничивает число одновременных операций по именам
+(см. limiter): ограничения общие для всех запросов к приложению.
+"""
+
+import asyncio
+import atexit
+import sys
+import threading
+
+import aiohttp
+
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from . import app, metrics
+
+
+class HTTPClient:
+    """Долгоживущая сессия aiohttp в отдельном цикле событий."""
+
+    def __init__(
+            self,
+            limit: int,
+            limit_per_host: int,
+            keepalive_timeout: float,
+            dns_cache_ttl: int,
+            limits: Optional[Dict[str, int]] = None
+    ):
+        """Инициализация клиента; поток и сессия создаются при запросе."""
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        self.limits = limits or {}
+        self.calls = 0
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._lock = threading.Lock()
+
+    async def _create_session(self) -> aiohttp.ClientSession:
+        """Создание сессии с настроенным пулом соединений."""
+        connector = aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+            ttl_dns_cache=self.dns_cache_ttl,
+            use_dns_cache=True,
+        )
+        return aiohttp.ClientSession(connector=connector)
+
+    def _start(self) -> asyncio.AbstractEventLoop:
+        """Запуск цикла событий клиента и создание сессии."""
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=loop.run_forever, name='http-client', daemon=True
+                )
+                self._thread.start()
+                self._session = asyncio.run_coroutine_threadsafe(
+                    self._create_session(), loop
+                ).result()
+                self._loop = loop
+        return self._loop
+
+    def submit(
+            self,
+            function: Callable[..., Awaitable[Any]],
+            *args: Any
+    ) -> Future:
+        """Запуск function(session, *args) в цикле клиента."""
+        loop = self._loop or self._start()
+        self.calls += 1
+        return asyncio.run_coroutine_threadsafe(
+            function(self._session, *args), loop
+        )
+
+    async def run(
+            self,
+            function: Callable[..., Awaitable[Any]],
+            *args: Any
+    ) -> Any:
+        """Выполнение function(session, *args) в цикле клиента.
+
+        Вызывающая корутина ждет результат, не блокируя свой цикл.
+        """
+        return await asyncio.wrap_future(self.submit(function, *args))
+
+    def call(
+            self,
+            function: Callable[..., Awaitable[Any]],
+            *args: Any
+    ) -> Any:
+        """Синхронное выполнение function(session, *args) в цикле клиента.
+
+        Для кода вне циклов событий, например синхронных view-функций.
+        """
+        return self.submit(function, *args).result()
+
+    def limiter(self, name: str) -> asyncio.Semaphore:
+        """Семафор ограничения name; вызывается только в цикле клиента.
+
+        Для ограничения, не заданного в limits или равного нулю,
+        возвращается семафор без практического предела.
+        """
+        semaphore = self._semaphores.get(name)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.limits.get(name) or sys.maxsize)
+            self._semaphores[name] = semaphore
+        return semaphore
+
+    def close(self):
+        """Закрытие сессии и остановка цикла событий клиента."""
+        with self._lock:
+            loop, self._loop = self._loop, None
+            if loop is None:
+                return
+            asyncio.run_coroutine_threadsafe(
+                self._session.close(), loop
+            ).result()
+            loop.call_soon_threadsafe(loop.stop)
+            self._thread.join()
+            loop.close()
+            self._session = self._thread = None
+            self._semaphores.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Состояние клиента для метрик."""
+        return {
+            'running': self._loop is not None,
+            'calls': self.calls,
+            'limit': self.limit,
+            'limit_per_host': self.limit_per_host,
+            'limits': dict(self.limits),
+        }
+
+
+disk_client = HTTPClient(
+    app.config['DISK_POOL_LIMIT'],
+    app.config['DISK_POOL_LIMIT_PER_HOST'],
+    app.config['DISK_KEEPALIVE_TIMEOUT'],
+    app.config['DISK_DNS_CACHE_TTL'],
+    {
+        'files': app.config['DISK_MAX_CONCURRENCY'],
+        'upload_url': app.config['DISK_UPLOAD_URL_CONCURRENCY'],
+        'upload': app.config['DISK_UPLOAD_CONCURRENCY'],
+        'stream_upload': app.config['DISK_STREAM_UPLOAD_CONCURRENCY'],
+        'download_url': app.config['DISK_DOWNLOAD_URL_CONCURRENCY'],
+    },
+)
+metrics.register('disk_client', disk_client.stats)
+atexit.register(disk_client.close)
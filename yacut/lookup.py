@@ -0,0 +1,522 @@
+"""Поиск исходной ссылки по короткой для перенаправлений."""
+
+import threading
+import time
+
+from datetime import datetime, timezone
+from sqlalchemy import (
+    bindparam, delete, event, func, insert, select, union_all
+)
+from sqlalchemy.engine import Row
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from typing import Any, Dict, Iterable, Optional, Set
+
+from . import app, db, metrics
+from .bloom import BloomFilter
+from .cache import TTLCache
+from .disk_links import download_links
+from .models import URLMap, URLMapArchive, url_digest
+from .redirects import PrebuiltRedirect
+from .replicas import read_router
+
+url_map = URLMap.__table__
+archive = URLMapArchive.__table__
+
+# Ограничение на число параметров в одном запросе с IN (...).
+IN_CLAUSE_CHUNK = 500
+
+# Запросы собираются один раз при импорте, а их скомпилированная форма
+# переиспользуется из кэша SQLAlchemy при каждом выполнении.
+SELECT_TARGET = (
+    select(
+        url_map.c.original,
+        url_map.c.permanent,
+        url_map.c.expires_at,
+        url_map.c.disk_location,
+    )
+    .where(url_map.c.short == bindparam('short'))
+)
+SELECT_ARCHIVED = (
+    select(
+        archive.c.original,
+        archive.c.permanent,
+        archive.c.expires_at,
+        archive.c.disk_location,
+        archive.c.id,
+        archive.c.timestamp,
+    )
+    .where(archive.c.short == bindparam('short'))
+)
+# Короткие ссылки из архива тоже заняты: их можно вернуть в url_map.
+SELECT_EXISTS = union_all(
+    select(url_map.c.id).where(url_map.c.short == bindparam('short')),
+    select(archive.c.id).where(archive.c.short == bindparam('short')),
+)
+SELECT_EXISTING = union_all(
+    select(url_map.c.short)
+    .where(url_map.c.short.in_(bindparam('shorts', expanding=True))),
+    select(archive.c.short)
+    .where(archive.c.short.in_(bindparam('shorts', expanding=True))),
+)
+SELECT_MAX_ID = select(func.max(url_map.c.id))
+SELECT_BY_ORIGINAL = (
+    select(url_map.c.short)
+    .where(
+        url_map.c.original_hash == bindparam('digest'),
+        url_map.c.original == bindparam('original'),
+        url_map.c.permanent.is_not_distinct_from(bindparam('permanent')),
+        url_map.c.expires_at.is_(None),
+        url_map.c.disk_location.is_(None)
+    )
+    .limit(1)
+)
+
+
+class LinkTarget:
+    """Данные короткой ссылки, нужные для перенаправления.
+
+    Ответ-перенаправление собирается при первом обращении и хранится
+    вместе с объектом в кэше коротких ссылок.
+    """
+
+    __slots__ = (
+        'original', 'permanent', 'expires_at', 'location', '_redirect'
+    )
+
+    def __init__(
+            self,
+            original: str,
+            permanent: Optional[bool] = None,
+            expires_at: Optional[datetime] = None,
+            location: Optional[str] = None
+    ):
+        """Инициализация по исходной ссылке и политике перенаправления."""
+        self.original = original
+        self.permanent = permanent
+        self.expires_at = expires_at
+        # Путь к файлу на ЯндексДиске, если ссылка ведет на файл.
+        self.location = location
+        self._redirect = None
+
+    def seconds_left(self) -> Optional[float]:
+        """Секунды до истечения срока ссылки или None для бессрочной."""
+        if self.expires_at is None:
+            return None
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        return (self.expires_at - now).total_seconds()
+
+    @property
+    def expired(self) -> bool:
+        """Истек ли срок действия ссылки."""
+        seconds_left = self.seconds_left()
+        return seconds_left is not None and seconds_left <= 0
+
+    @property
+    def url(self) -> str:
+        """Адрес перехода: для файла Диска - ссылка на скачивание."""
+        if self.location is None:
+            return self.original
+        return download_links.get(self.location).href
+
+    @property
+    def redirect(self) -> PrebuiltRedirect:
+        """Готовый ответ-перенаправление для ссылки.
+
+        Ссылки со сроком действия перенаправляют временно и без
+        заголовков кэширования, чтобы браузер не запомнил переход
+        дольше, чем живет ссылка. Файлы Диска перенаправляют
+        на текущую ссылку на скачивание из кэша disk_links.
+        Если ее не удалось получить, выбрасывается
+        AsyncGetDownloadURLError.
+        """
+        if self.location is not None:
+            return download_links.get(self.location).redirect
+        if self._redirect is None:
+            if self.expires_at is not None:
+                self._redirect = PrebuiltRedirect(self.original, False, 0)
+                return self._redirect
+            permanent = self.permanent
+            if permanent is None:
+                permanent = app.config['REDIRECT_PERMANENT']
+            self._redirect = PrebuiltRedirect(
+                self.original, permanent, app.config['REDIRECT_MAX_AGE']
+            )
+        return self._redirect
+
+
+class ShortIDFilter:
+    """Фильтр Блума по всем коротким ссылкам из url_map и архива.
+
+    Заполняется из базы при первом обращении, пополняется при вставке
+    записей через ORM и периодически догружает строки, добавленные
+    другими процессами. Догрузка перечитывает последние lookback
+    записей до уже загруженного максимума id: строка с меньшим id
+    может быть зафиксирована позже строки с большим.
+    При background загрузка идет в фоновом потоке: пока фильтр
+    не загружен или не удалось его загрузить, он отвечает
+    "возможно есть", и проверка уходит в базу как раньше.
+    """
+
+    def __init__(
+            self,
+            capacity: int,
+            error_rate: float,
+            refresh_interval: float,
+            lookback: int,
+            confirm_interval: float,
+            background: bool = True
+    ):
+        """Инициализация незагруженного фильтра."""
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.refresh_interval = refresh_interval
+        self.lookback = lookback
+        self.confirm_interval = confirm_interval
+        self.background = background
+        self.rejected = 0
+        self.false_positives = 0
+        self.stale_checks = 0
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._loaded = False
+        self._loading = False
+        self._max_id = 0
+        self._seen_max_id = 0
+        self._refreshed_at = 0.0
+        self._checked_at = float('-inf')
+        self._lock = threading.Lock()
+        self._check_lock = threading.Lock()
+
+    def _load_new_rows(self):
+        """Догрузка в фильтр записей, появившихся после последней загрузки.
+
+        При переполнении фильтр пересоздается с удвоенной емкостью,
+        чтобы доля ложноположительных ответов не росла. Новый фильтр
+        заполняется отдельно и заменяет прежний, когда готов.
+        """
+        bloom, max_id = self._bloom, self._max_id
+        if bloom.count > bloom.capacity:
+            self.capacity = bloom.capacity * 2
+            bloom, max_id = BloomFilter(self.capacity, self.error_rate), 0
+
+        if not max_id:
+            archived = select(archive.c.short).execution_options(
+                yield_per=10000
+            )
+            bloom.update(db.session.execute(archived).scalars())
+
+        statement = (
+            select(URLMap.id, URLMap.short)
+            .where(URLMap.id > max(max_id - self.lookback, 0))
+            .execution_options(yield_per=10000)
+        )
+        for row_id, short in db.session.execute(statement):
+            # Перечитанные строки уже в фильтре и не должны
+            # увеличивать счетчик заполненности.
+            if short not in bloom:
+                bloom.add(short)
+            max_id = max(max_id, row_id)
+        self._bloom, self._max_id = bloom, max_id
+        self._loaded = True
+        self._refreshed_at = time.monotonic()
+
+    def _load(self):
+        """Загрузка новых записей; ошибка оставляет прежнее состояние."""
+        try:
+            self._load_new_rows()
+        except SQLAlchemyError:
+            db.session.rollback()
+            app.logger.exception('Не удалось загрузить фильтр ссылок')
+        finally:
+            self._loading = False
+
+    def _load_in_context(self):
+        """Загрузка в фоновом потоке с собственной сессией."""
+        with app.app_context():
+            self._load()
+
+    def _is_fresh(self) -> bool:
+        """Фильтр загружен и не требует догрузки новых записей."""
+        return self._loaded and (
+            time.monotonic() - self._refreshed_at < self.refresh_interval
+        )
+
+    def _refresh(self, force: bool = False):
+        """Запуск догрузки, если она нужна и еще не идет.
+
+        Запросы не ждут фоновую загрузку: до ее окончания фильтр
+        отвечает по уже загруженным записям.
+        """
+        with self._lock:
+            if self._loading or not force and self._is_fresh():
+                return
+            self._loading = True
+        if self.background:
+            threading.Thread(
+                target=self._load_in_context,
+                name='short-id-filter',
+                daemon=True
+            ).start()
+        else:
+            self._load()
+
+    def _sync(self) -> bool:
+        """Загрузка или обновление фильтра, если это требуется."""
+        if not self._is_fresh():
+            self._refresh()
+        return self._loaded
+
+    def _has_unseen_rows(self) -> bool:
+        """Появились ли в url_map записи с id больше загруженных.
+
+        Максимальный id читается не чаще раза в confirm_interval
+        секунд на процесс, с реплики, если они настроены; в остальное
+        время используется последнее прочитанное значение.
+        """
+        if (time.monotonic() - self._checked_at >= self.confirm_interval
+                and self._check_lock.acquire(blocking=False)):
+            try:
+                self._checked_at = time.monotonic()
+                self.stale_checks += 1
+                self._seen_max_id = read_router.scalar(SELECT_MAX_ID) or 0
+            except SQLAlchemyError:
+                db.session.rollback()
+                return True
+            finally:
+                self._check_lock.release()
+        return self._seen_max_id > self._max_id
+
+    def might_contain(self, short: str, confirm: bool = False) -> bool:
+        """Проверка, может ли короткая ссылка уже существовать в базе.
+
+        При confirm отрицательный ответ проверяется по максимальному
+        id в url_map: если другие процессы добавили записи, фильтр
+        догружает их, а до конца догрузки отвечает "возможно есть".
+        Так ссылка, созданная в другом процессе, находится сразу,
+        а не после очередной догрузки.
+        """
+        if not self._sync():
+            return True
+        if short in self._bloom:
+            return True
+        if confirm and self._has_unseen_rows():
+            self._refresh(force=True)
+            if self.background or short in self._bloom:
+                return True
+        self.rejected += 1
+        return False
+
+    def add(self, short: str):
+        """Добавление короткой ссылки в фильтр."""
+        self._bloom.add(short)
+
+    def clear(self):
+        """Сброс фильтра; он будет заново загружен из базы."""
+        with self._lock:
+            self._bloom = BloomFilter(self.capacity, self.error_rate)
+            self._loaded = False
+            self._max_id = 0
+            self._seen_max_id = 0
+            self._checked_at = float('-inf')
+            self.rejected = 0
+            self.false_positives = 0
+            self.stale_checks = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Состояние фильтра для метрик."""
+        return {
+            'loaded': self._loaded,
+            'rejected': self.rejected,
+            'false_positives': self.false_positives,
+            'stale_checks': self.stale_checks,
+            **self._bloom.stats(),
+        }
+
+
+short_id_cache = TTLCache(
+    app.config['SHORT_ID_CACHE_SIZE'], app.config['SHORT_ID_CACHE_TTL']
+)
+short_id_filter = ShortIDFilter(
+    app.config['SHORT_ID_FILTER_CAPACITY'],
+    app.config['SHORT_ID_FILTER_ERROR_RATE'],
+    app.config['SHORT_ID_FILTER_REFRESH'],
+    app.config['SHORT_ID_FILTER_LOOKBACK'],
+    app.config['SHORT_ID_FILTER_CONFIRM_INTERVAL'],
+    app.config['SHORT_ID_FILTER_BACKGROUND']
+)
+archive_stats = {'hits': 0, 'promotions': 0, 'promotion_errors': 0}
+metrics.register('short_id_cache', short_id_cache.stats)
+metrics.register('short_id_filter', short_id_filter.stats)
+metrics.register('archive', lambda: dict(archive_stats))
+
+
+@event.listens_for(URLMap, 'after_insert')
+def add_to_filter(mapper, connection, target: URLMap):
+    """Пополнение фильтра при сохранении новой записи через ORM."""
+    short_id_filter.add(target.short)
+    read_router.mark_written(target.short)
+
+
+def short_id_exists(short_id: str) -> bool:
+    """Проверка занятости короткой ссылки.
+
+    Ссылки, которые фильтр гарантированно не видел, не проверяются в БД.
+    """
+    if not short_id_filter.might_contain(short_id):
+        return False
+    return db.session.connection().execute(
+        SELECT_EXISTS, {'short': short_id}
+    ).first() is not None
+
+
+def is_archived(short_id: str) -> bool:
+    """Проверка, есть ли короткая ссылка в архиве."""
+    if not short_id_filter.might_contain(short_id):
+        return False
+    return db.session.connection().execute(
+        SELECT_ARCHIVED, {'short': short_id}
+    ).first() is not None
+
+
+def existing_short_ids(shorts: Iterable[str]) -> Set[str]:
+    """Выбор из набора коротких ссылок тех, что уже есть в базе.
+
+    Ссылки, отсеянные фильтром, в запрос не попадают; остальные
+    проверяются одним запросом на каждые IN_CLAUSE_CHUNK штук.
+    """
+    candidates = [
+        short for short in set(shorts) if short_id_filter.might_contain(short)
+    ]
+    connection = db.session.connection()
+    existing = set()
+    for start in range(0, len(candidates), IN_CLAUSE_CHUNK):
+        chunk = candidates[start:start + IN_CLAUSE_CHUNK]
+        existing.update(
+            connection.execute(SELECT_EXISTING, {'shorts': chunk}).scalars()
+        )
+    return existing
+
+
+def fetch_target(short_id: str) -> Optional[LinkTarget]:
+    """Чтение данных для перенаправления из БД без создания модели.
+
+    Выбираются только нужные колонки через SQLAlchemy Core, минуя
+    identity map сессии и преобразование остальных полей записи.
+    Запрос уходит на реплику, если они настроены.
+    """
+    row = read_router.first(SELECT_TARGET, {'short': short_id}, short_id)
+    return None if row is None else LinkTarget(*row)
+
+
+def promote(short_id: str, row: Row):
+    """Возврат ссылки из архива в url_map с исходным id.
+
+    Если ссылку одновременно вернул другой запрос, вставка нарушит
+    уникальность, и повторный перенос не нужен.
+    """
+    original, permanent, expires_at, location, link_id, timestamp = row
+    try:
+        db.session.execute(insert(url_map).values(
+            id=link_id,
+            original=original,
+            short=short_id,
+            permanent=permanent,
+            expires_at=expires_at,
+            disk_location=location,
+            timestamp=timestamp,
+        ))
+        db.session.execute(delete(archive).where(archive.c.id == link_id))
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return
+    except SQLAlchemyError:
+        db.session.rollback()
+        archive_stats['promotion_errors'] += 1
+        app.logger.exception('Не удалось вернуть ссылку из архива')
+        return
+    archive_stats['promotions'] += 1
+    read_router.mark_written(short_id)
+
+
+def restore_archived(short_id: str) -> Optional[LinkTarget]:
+    """Поиск ссылки в архиве с возвратом ее в url_map.
+
+    Перенаправление обслуживается, даже если вернуть ссылку
+    из архива не удалось.
+    """
+    row = read_router.first(SELECT_ARCHIVED, {'short': short_id}, short_id)
+    if row is None:
+        return None
+    archive_stats['hits'] += 1
+    target = LinkTarget(*row[:4])
+    if not target.expired:
+        promote(short_id, row)
+    return target
+
+
+def find_short_id(
+        original: str, permanent: Optional[bool] = None
+) -> Optional[str]:
+    """Поиск уже существующей короткой ссылки на тот же адрес.
+
+    Поиск идет по индексу хеша исходной ссылки; сравнение самих
+    строк отсекает возможные коллизии хеша.
+    """
+    return db.session.connection().execute(
+        SELECT_BY_ORIGINAL,
+        {
+            'digest': url_digest(original),
+            'original': original,
+            'permanent': permanent,
+        }
+    ).scalar()
+
+
+def get_link(short_id: str) -> Optional[LinkTarget]:
+    """Возврат данных короткой ссылки или None, если ее нет.
+
+    Найденные ссылки сохраняются в кэше, поэтому популярные
+    перенаправления не обращаются к базе данных. Несуществующие
+    ссылки в большинстве случаев отсекаются фильтром Блума, который
+    сверяет максимальный id в url_map не чаще раза в интервал.
+    Ссылки с истекшим сроком действия считаются несуществующими.
+    При промахе в url_map ссылка ищется в архиве и возвращается из него.
+    """
+    target = short_id_cache.get(short_id)
+    if target is not None:
+        return target
+
+    if not short_id_filter.might_contain(short_id, confirm=True):
+        return None
+
+    target = fetch_target(short_id) or restore_archived(short_id)
+    if target is None:
+        short_id_filter.false_positives += 1
+        return None
+    if target.expired:
+        return None
+
+    # Ссылка со сроком действия хранится в кэше не дольше этого срока.
+    short_id_cache.set(short_id, target, target.seconds_left())
+    return target
+
+
+def invalidate(short_id: str):
+    """Сброс закэшированных данных о короткой ссылке."""
+    short_id_cache.pop(short_id)
+
+
+def register_inserted(shorts: Iterable[str]):
+    """Учет ссылок, вставленных в БД в обход ORM."""
+    for short in shorts:
+        short_id_filter.add(short)
+        short_id_cache.pop(short)
+        read_router.mark_written(short)
+
+
+def clear_caches():
+    """Полный сброс состояния поиска, например после пересоздания БД."""
+    short_id_cache.clear()
+    short_id_filter.clear()
+    read_router.clear()
+    download_links.clear()
@@ -0,0 +1,20 @@
+"""Реестр метрик подсистем проекта YaCut.
+
+Каждая подсистема регистрирует функцию, возвращающую словарь
+со своим текущим состоянием. Эндпоинт '/api/metrics/' собирает
+их все в один ответ.
+"""
+
+from typing import Any, Callable, Dict
+
+_collectors: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+
+def register(name: str, collector: Callable[[], Dict[str, Any]]):
+    """Регистрация функции сбора метрик под заданным именем."""
+    _collectors[name] = collector
+
+
+def collect() -> Dict[str, Dict[str, Any]]:
+    """Сбор метрик всех зарегистрированных подсистем."""
+    return {name: collector() for name, collector in _collectors.items()}
@@ -1,17 +1,143 @@
 """Модели проекта yacut."""
 
 from datetime import datetime, timezone
+from hashlib import blake2b
 
-from .constants import LINK, SHORT_LINK_MAX
+from sqlalchemy import event
+
+from .constants import LINK, SHORT_LINK_MAX, URL_DIGEST_SIZE
 from yacut import db
 
 
+def url_digest(url: str) -> bytes:
+    """Хеш фиксированной длины для индексирования исходной ссылки."""
+    return blake2b(url.encode(), digest_size=URL_DIGEST_SIZE).digest()
+
+
+def original_digest(context) -> bytes:
+    """Значение по умолчанию для URLMap.original_hash."""
+    return url_digest(context.get_current_parameters()['original'])
+
+
 class URLMap(db.Model):
     """Модель для хранения ссылок в базе данных."""
 
+    # AUTOINCREMENT в SQLite не выдает повторно id удаленных записей:
+    # по id ссылки из архива возвращаются в url_map и хранятся агрегаты.
+    __table_args__ = {'sqlite_autoincrement': True}
+
     id = db.Column(db.Integer, primary_key=True)
-    original = db.Column(db.String(LINK), nullable=False, index=True)
+    original = db.Column(db.String(LINK), nullable=False)
+    # При вставке хеш считается по умолчанию, при изменении original
+    # через ORM - обработчиком sync_original_hash. UPDATE через Core,
+    # меняющий original, должен сам передать новый original_hash.
+    original_hash = db.Column(
+        db.LargeBinary(URL_DIGEST_SIZE),
+        nullable=False,
+        index=True,
+        default=original_digest
+    )
     short = db.Column(db.String(SHORT_LINK_MAX), nullable=False, unique=True)
+    # None - используется политика перенаправления по умолчанию из Config.
+    permanent = db.Column(db.Boolean, nullable=True)
+    timestamp = db.Column(
+        db.DateTime,
+        default=lambda: datetime.now(timezone.utc)
+    )
+    # Время UTC, после которого ссылка перестает работать; None - бессрочно.
+    expires_at = db.Column(db.DateTime, nullable=True, index=True)
+    # Путь к загруженному файлу на ЯндексДиске. Задается только сервером
+    # при загрузке: переход по такой ссылке ведет на ссылку на скачивание.
+    disk_location = db.Column(db.String(LINK), nullable=True)
+
+
+@event.listens_for(URLMap.original, 'set')
+def sync_original_hash(target: URLMap, value: str, oldvalue, initiator):
+    """Пересчет хеша при изменении исходной ссылки через ORM."""
+    target.original_hash = url_digest(value)
+
+
+class URLMapArchive(db.Model):
+    """Архив ссылок, к которым давно не обращались.
+
+    Хранит записи url_map с исходными id. Индекс есть только
+    у поля short, по которому ссылка ищется при промахе в url_map.
+    """
+
+    __tablename__ = 'url_map_archive'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    original = db.Column(db.String(LINK), nullable=False)
+    short = db.Column(db.String(SHORT_LINK_MAX), nullable=False, unique=True)
+    permanent = db.Column(db.Boolean, nullable=True)
+    timestamp = db.Column(db.DateTime)
+    expires_at = db.Column(db.DateTime, nullable=True)
+    disk_location = db.Column(db.String(LINK), nullable=True)
+    archived_at = db.Column(
+        db.DateTime,
+        nullable=False,
+        default=lambda: datetime.now(timezone.utc)
+    )
+
+
+class ShortIDCounter(db.Model):
+    """Счетчик для последовательной генерации коротких ссылок."""
+
+    name = db.Column(db.String(SHORT_LINK_MAX), primary_key=True)
+    value = db.Column(db.BigInteger, nullable=False, default=0)
+
+
+class ClickStats(db.Model):
+    """Счетчик переходов по короткой ссылке.
+
+    Заполняется пакетами из буфера в памяти, а не при каждом переходе.
+    """
+
+    short = db.Column(db.String(SHORT_LINK_MAX), primary_key=True)
+    clicks = db.Column(db.BigInteger, nullable=False, default=0)
+    last_click = db.Column(db.DateTime, nullable=True)
+
+
+class ClickHourly(db.Model):
+    """Число переходов по ссылке за час, начинающийся в bucket (UTC)."""
+
+    # Без внешнего ключа: статистика сохраняется при переносе ссылки
+    # в архив url_map_archive с тем же id.
+    link_id = db.Column(db.Integer, primary_key=True)
+    # Индекс для удаления устаревших агрегатов (compact-stats).
+    bucket = db.Column(db.DateTime, primary_key=True, index=True)
+    clicks = db.Column(db.BigInteger, nullable=False, default=0)
+
+
+class ClickDaily(db.Model):
+    """Число переходов по ссылке за сутки, начинающиеся в bucket (UTC)."""
+
+    # Без внешнего ключа: статистика сохраняется при переносе ссылки
+    # в архив url_map_archive с тем же id.
+    link_id = db.Column(db.Integer, primary_key=True)
+    # Индекс для удаления устаревших агрегатов (compact-stats).
+    bucket = db.Column(db.DateTime, primary_key=True, index=True)
+    clicks = db.Column(db.BigInteger, nullable=False, default=0)
+
+
+class UploadedFile(db.Model):
+    """Файл, загруженный на ЯндексДиск, и короткая ссылка на него.
+
+    Повторная загрузка файла с тем же содержимым (digest и size)
+    возвращает существующую ссылку без обращений к API Диска.
+    """
+
+    __tablename__ = 'uploaded_file'
+    __table_args__ = (db.UniqueConstraint('digest', 'size'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    # SHA-256 всего содержимого файла.
+    digest = db.Column(db.String(64), nullable=False)
+    size = db.Column(db.BigInteger, nullable=False)
+    # SHA-256 первых DEDUP_PREFIX_SIZE байт для отбора кандидатов.
+    prefix = db.Column(db.String(64), nullable=False, index=True)
+    location = db.Column(db.String(LINK), nullable=False)
+    short = db.Column(db.String(SHORT_LINK_MAX), nullable=False)
     timestamp = db.Column(
         db.DateTime,
         default=lambda: datetime.now(timezone.utc)
@@ -0,0 +1,74 @@
+"""Заранее собранные ответы-перенаправления по коротким ссылкам."""
+
+import time
+
+from flask import Response
+from http import HTTPStatus
+from markupsafe import escape
+from typing import List, Tuple
+from werkzeug.http import http_date
+from werkzeug.urls import iri_to_uri
+
+REDIRECT_BODY = (
+    '<!doctype html>\n'
+    '<html lang=en>\n'
+    '<title>Redirecting...</title>\n'
+    '<h1>Redirecting...</h1>\n'
+    '<p>You should be redirected automatically to the target URL: '
+    '<a href="{location}">{location}</a>. If not, click the link.\n'
+)
+
+
+class PrebuiltRedirect:
+    """Ответ-перенаправление, собранный один раз для короткой ссылки.
+
+    Тело и заголовки формируются при создании объекта и затем
+    переиспользуются; на каждый запрос вычисляется только заголовок
+    Expires, если включено кэширование.
+    """
+
+    __slots__ = ('status', 'body', 'headers', 'max_age', '_asgi_headers')
+
+    def __init__(self, location: str, permanent: bool, max_age: int):
+        """Сборка ответа по адресу и политике перенаправления."""
+        self.status = (
+            HTTPStatus.MOVED_PERMANENTLY if permanent else HTTPStatus.FOUND
+        )
+        self.max_age = max_age
+        if not location.isascii():
+            location = iri_to_uri(location)
+        self.body = REDIRECT_BODY.format(
+            location=escape(location)
+        ).encode()
+        self.headers = [
+            ('Content-Type', 'text/html; charset=utf-8'),
+            ('Content-Length', str(len(self.body))),
+            ('Location', location),
+        ]
+        if max_age > 0:
+            self.headers.append(
+                ('Cache-Control', f'public, max-age={max_age}')
+            )
+        self._asgi_headers = [
+            (name.lower().encode('latin-1'), value.encode('latin-1'))
+            for name, value in self.headers
+        ]
+
+    def _expires(self) -> List[Tuple[str, str]]:
+        """Заголовок Expires относительно текущего момента."""
+        if self.max_age <= 0:
+            return []
+        return [('Expires', http_date(time.time() + self.max_age))]
+
+    def to_response(self) -> Response:
+        """Ответ Flask для view-функции."""
+        return Response(
+            self.body, self.status, self.headers + self._expires()
+        )
+
+    def asgi_headers(self) -> List[Tuple[bytes, bytes]]:
+        """Заголовки в формате ASGI."""
+        return self._asgi_headers + [
+            (name.lower().encode(), value.encode())
+            for name, value in self._expires()
+        ]
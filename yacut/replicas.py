@@ -0,0 +1,109 @@
+"""Маршрутизация чтения коротких ссылок на реплики БД.
+
+Адреса реплик задаются настройкой DATABASE_READ_URIS через запятую.
+Запросы на чтение распределяются между репликами по кругу, запись
+всегда идет в основную БД через db.session. Ссылки, созданные этим
+процессом за последние REPLICA_STICKINESS секунд, читаются из основной
+БД, чтобы не попасть на реплику, которая еще не получила запись.
+"""
+
+import itertools
+import threading
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Connection, Engine, Row
+from sqlalchemy.sql import Executable
+from typing import Any, Dict, List, Optional
+
+from . import app, db, metrics
+from .cache import TTLCache
+from .engine import configure_sqlite, engine_options
+
+# Сколько последних созданных ссылок помнить для чтения из основной БД.
+RECENT_WRITES_SIZE = 100000
+
+
+class ReadRouter:
+    """Выбор соединения для запросов на чтение."""
+
+    def __init__(self, urls: List[str], stickiness: float):
+        """Создание движков реплик; соединения открываются при запросах."""
+        self.engines: List[Engine] = []
+        for url in urls:
+            engine = create_engine(url, **engine_options(app.config, url))
+            configure_sqlite(engine, app.config)
+            self.engines.append(engine)
+        self.replica_reads = 0
+        self.primary_reads = 0
+        self.replica_misses = 0
+        self._recent = TTLCache(RECENT_WRITES_SIZE, stickiness)
+        self._cycle = itertools.cycle(self.engines)
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """Настроена ли хотя бы одна реплика."""
+        return bool(self.engines)
+
+    def mark_written(self, short_id: str):
+        """Учет ссылки, только что созданной в основной БД."""
+        if self.enabled:
+            self._recent.set(short_id, True)
+
+    def _replica(self) -> Connection:
+        """Соединение сессии со следующей по кругу репликой."""
+        with self._lock:
+            engine = next(self._cycle)
+        return db.session.connection(bind_arguments={'bind': engine})
+
+    def scalar(self, statement: Executable) -> Any:
+        """Значение запроса, не связанного с конкретной ссылкой.
+
+        Выполняется на реплике, если они настроены.
+        """
+        if not self.enabled:
+            self.primary_reads += 1
+            return db.session.connection().execute(statement).scalar()
+        self.replica_reads += 1
+        return self._replica().execute(statement).scalar()
+
+    def first(
+            self,
+            statement: Executable,
+            params: Dict[str, Any],
+            short_id: str
+    ) -> Optional[Row]:
+        """Первая строка результата запроса о короткой ссылке.
+
+        Недавно созданные ссылки читаются из основной БД. Если реплика
+        не нашла ссылку, запрос повторяется в основной БД: запись могла
+        еще не дойти до реплики.
+        """
+        if not self.enabled or self._recent.get(short_id):
+            self.primary_reads += 1
+            return db.session.connection().execute(statement, params).first()
+        self.replica_reads += 1
+        row = self._replica().execute(statement, params).first()
+        if row is None:
+            self.replica_misses += 1
+            row = db.session.connection().execute(statement, params).first()
+        return row
+
+    def clear(self):
+        """Сброс списка недавно созданных ссылок."""
+        self._recent.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Счетчики маршрутизации для метрик."""
+        return {
+            'replicas': len(self.engines),
+            'replica_reads': self.replica_reads,
+            'primary_reads': self.primary_reads,
+            'replica_misses': self.replica_misses,
+        }
+
+
+read_router = ReadRouter(
+    app.config['DATABASE_READ_URIS'], app.config['REPLICA_STICKINESS']
+)
+metrics.register('read_router', read_router.stats)
@@ -0,0 +1,229 @@
+"""Повторы запросов к API ЯндексДиска и автоматический выключатель.
+
+Временные ошибки (429, 5xx, обрыв соединения, таймаут) повторяются
+до DISK_RETRY_ATTEMPTS раз с экспоненциальной задержкой со случайным
+разбросом; если ответ содержит Retry-After, пауза берется из него. Подряд
+идущие временные ошибки размыкают выключатель: пока API нездоров,
+запросы сразу завершаются ошибкой DiskUnavailableError, а после
+DISK_BREAKER_RESET секунд один пробный запрос проверяет, восстановился
+ли API. Все обращения выполняются в цикле событий общего HTTP-клиента.
+"""
+
+import asyncio
+import random
+import time
+
+from aiohttp import ClientConnectionError, ClientPayloadError, ClientResponse
+from datetime import datetime, timezone
+from http import HTTPStatus
+from typing import Any, Awaitable, Callable, Dict, Optional
+from werkzeug.http import parse_date
+
+from . import app, metrics
+from .error_handlers import DiskUnavailableError
+
+
+class TransientError(Exception):
+    """Временная ошибка API, после которой запрос стоит повторить."""
+
+    def __init__(self, status: int, retry_after: Optional[float] = None):
+        """Сохранение статуса ответа и задержки из Retry-After."""
+        super().__init__(f'Временная ошибка API: {status}')
+        self.status = status
+        self.retry_after = retry_after
+
+
+# Ошибки, после которых запрос повторяется.
+TRANSIENT_ERRORS = (
+    TransientError,
+    ClientConnectionError,
+    ClientPayloadError,
+    asyncio.TimeoutError,
+)
+
+
+def retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Задержка из заголовка Retry-After (секунды или HTTP-дата)."""
+    if not value:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    date = parse_date(value)
+    if date is None:
+        return None
+    return max((date - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+def check_response(response: ClientResponse):
+    """Исключение TransientError для ответов 429 и 5xx."""
+    if (response.status == HTTPStatus.TOO_MANY_REQUESTS
+            or response.status >= HTTPStatus.INTERNAL_SERVER_ERROR):
+        raise TransientError(
+            response.status,
+            retry_after_seconds(response.headers.get('Retry-After'))
+        )
+
+
+class CircuitBreaker:
+    """Выключатель: размыкается после threshold ошибок подряд."""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(
+            self,
+            threshold: int,
+            reset_timeout: float,
+            clock: Callable[[], float] = time.monotonic
+    ):
+        """Инициализация замкнутого выключателя."""
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened = 0
+        self._opened_at = 0.0
+        self._probe_started_at = 0.0
+
+    def allow(self) -> bool:
+        """Можно ли отправить запрос.
+
+        В полуоткрытом состоянии пропускается один пробный запрос,
+        остальные отклоняются до его результата. Если результата нет
+        дольше reset_timeout (пробный запрос отменен), пропускается
+        новый пробный запрос.
+        """
+        if self.state == self.CLOSED:
+            return True
+        now = self.clock()
+        started_at = (
+            self._opened_at if self.state == self.OPEN
+            else self._probe_started_at
+        )
+        if now - started_at >= self.reset_timeout:
+            self.state = self.HALF_OPEN
+            self._probe_started_at = now
+            return True
+        return False
+
+    def success(self):
+        """Учет успешного ответа API."""
+        self.state = self.CLOSED
+        self.failures = 0
+
+    def failure(self):
+        """Учет временной ошибки API."""
+        self.failures += 1
+        if (self.state == self.HALF_OPEN
+                or self.threshold and self.failures >= self.threshold):
+            self.state = self.OPEN
+            self.opened += 1
+            self._opened_at = self.clock()
+
+    def stats(self) -> Dict[str, Any]:
+        """Состояние выключателя для метрик."""
+        return {
+            'state': self.state,
+            'consecutive_failures': self.failures,
+            'opened': self.opened,
+        }
+
+
+class RetryPolicy:
+    """Выполнение запросов к API с повторами и выключателем."""
+
+    def __init__(
+            self,
+            attempts: int,
+            base_delay: float,
+            max_delay: float,
+            breaker: CircuitBreaker
+    ):
+        """Инициализация политики повторов."""
+        self.attempts = max(attempts, 1)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker = breaker
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+        self.rejected = 0
+
+    def delay(
+            self, attempt: int, retry_after: Optional[float]
+    ) -> Optional[float]:
+        """Пауза перед повтором после попытки номер attempt.
+
+        Возвращает None, если Retry-After требует ждать дольше
+        max_delay: тогда повторять запрос нет смысла.
+        """
+        if retry_after is not None:
+            return retry_after if retry_after <= self.max_delay else None
+        return random.uniform(
+            0, min(self.max_delay, self.base_delay * 2 ** attempt)
+        )
+
+    async def call(
+            self, request: Callable[[], Awaitable[Any]], retry: bool = True
+    ) -> Any:
+        """Выполнение request() с повторами временных ошибок.
+
+        При retry=False (например, тело запроса нельзя отправить
+        повторно) делается одна попытка. Если выключатель разомкнут,
+        выбрасывается DiskUnavailableError.
+        """
+        self.calls += 1
+        attempts = self.attempts if retry else 1
+        for attempt in range(attempts):
+            if not self.breaker.allow():
+                self.rejected += 1
+                raise DiskUnavailableError
+            try:
+                result = await request()
+            except TRANSIENT_ERRORS as error:
+                self.breaker.failure()
+                delay = self.delay(
+                    attempt, getattr(error, 'retry_after', None)
+                )
+                if attempt + 1 == attempts or delay is None:
+                    self.failures += 1
+                    raise
+                self.retries += 1
+                await asyncio.sleep(delay)
+                continue
+            except Exception:
+                # API ответил, пусть и ошибкой клиента: он доступен.
+                self.breaker.success()
+                raise
+            self.breaker.success()
+            return result
+
+    def clear(self):
+        """Сброс счетчиков и замыкание выключателя."""
+        self.calls = self.retries = self.failures = self.rejected = 0
+        self.breaker.success()
+        self.breaker.opened = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Счетчики для метрик."""
+        return {
+            'calls': self.calls,
+            'retries': self.retries,
+            'failures': self.failures,
+            'rejected': self.rejected,
+            'breaker': self.breaker.stats(),
+        }
+
+
+disk_api = RetryPolicy(
+    app.config['DISK_RETRY_ATTEMPTS'],
+    app.config['DISK_RETRY_BASE_DELAY'],
+    app.config['DISK_RETRY_MAX_DELAY'],
+    CircuitBreaker(
+        app.config['DISK_BREAKER_THRESHOLD'],
+        app.config['DISK_BREAKER_RESET'],
+    ),
+)
+metrics.register('disk_api', disk_api.stats)
@@ -0,0 +1,124 @@
+"""Потоковый разбор тела запроса multipart/form-data.
+
+Файлы из формы не сохраняются целиком ни в памяти, ни во временных
+файлах: тело запроса читается блоками по мере того, как данные файла
+забирает получатель (см. utils.iter_chunks). В памяти одновременно
+находятся не больше memory_limit байт буфера разбора и значения
+обычных полей формы, поэтому потребление памяти не зависит
+от размера загружаемых файлов.
+"""
+
+from typing import BinaryIO, Dict, Optional
+
+from flask import Request
+from werkzeug.datastructures import FileStorage
+from werkzeug.exceptions import BadRequest, RequestEntityTooLarge
+from werkzeug.sansio.multipart import (
+    NEED_DATA, Epilogue, Event, Field, File, MultipartDecoder
+)
+
+
+class PartStream:
+    """Файлоподобный объект для чтения данных текущего файла формы."""
+
+    def __init__(self, reader: 'MultipartReader'):
+        """Инициализация потока части формы."""
+        self._reader = reader
+
+    def read(self, size: int = -1) -> bytes:
+        """Очередной блок данных файла; пустая строка в конце файла.
+
+        Размер блока определяется размером чтения тела запроса,
+        аргумент size оставлен для совместимости с файлами.
+        """
+        return self._reader.read_part() or b''
+
+
+class MultipartReader:
+    """Последовательное чтение полей и файлов из тела запроса."""
+
+    def __init__(
+            self,
+            stream: BinaryIO,
+            boundary: bytes,
+            chunk_size: int,
+            memory_limit: int
+    ):
+        """Инициализация разбора; тело запроса еще не читается."""
+        self.stream = stream
+        self.chunk_size = min(chunk_size, memory_limit)
+        self.memory_limit = memory_limit
+        self.fields: Dict[str, str] = {}
+        self._fields_size = 0
+        self._decoder = MultipartDecoder(boundary, memory_limit)
+        self._in_part = False
+
+    @classmethod
+    def from_request(
+            cls, request: Request, chunk_size: int, memory_limit: int
+    ) -> Optional['MultipartReader']:
+        """Разбор тела запроса или None, если оно не multipart."""
+        boundary = request.mimetype_params.get('boundary')
+        if request.mimetype != 'multipart/form-data' or not boundary:
+            return None
+        return cls(request.stream, boundary.encode(), chunk_size, memory_limit)
+
+    def _next_event(self) -> Event:
+        """Следующее событие разбора с дочитыванием тела запроса."""
+        while True:
+            try:
+                event = self._decoder.next_event()
+            except ValueError:
+                raise BadRequest('Некорректное тело запроса multipart.')
+            if event is not NEED_DATA:
+                return event
+            if self._decoder.complete:
+                raise BadRequest('Тело запроса multipart оборвано.')
+            chunk = self.stream.read(self.chunk_size)
+            self._decoder.receive_data(chunk or None)
+
+    def read_part(self) -> Optional[bytes]:
+        """Очередной блок данных текущей части; None в конце части."""
+        while self._in_part:
+            event = self._next_event()
+            self._in_part = event.more_data
+            if event.data:
+                return event.data
+        return None
+
+    def _read_field(self, name: str):
+        """Сохранение значения обычного поля формы."""
+        chunks = []
+        while (chunk := self.read_part()) is not None:
+            self._fields_size += len(chunk)
+            if self._fields_size > self.memory_limit:
+                raise RequestEntityTooLarge()
+            chunks.append(chunk)
+        self.fields[name] = b''.join(chunks).decode(errors='replace')
+
+    def next_file(self) -> Optional[FileStorage]:
+        """Переход к следующему файлу формы.
+
+        Непрочитанный остаток предыдущего файла пропускается, значения
+        встреченных по пути полей сохраняются в fields. Части файлов
+        без имени (файл не выбран) пропускаются. Возвращает None,
+        если файлов больше нет.
+        """
+        while True:
+            while self.read_part() is not None:
+                pass
+            event = self._next_event()
+            if isinstance(event, Epilogue):
+                return None
+            if not isinstance(event, (Field, File)):
+                continue
+            self._in_part = True
+            if isinstance(event, Field):
+                self._read_field(event.name)
+            elif event.filename:
+                return FileStorage(
+                    PartStream(self),
+                    filename=event.filename,
+                    name=event.name,
+                    headers=event.headers,
+                )
@@ -1,105 +1,414 @@
 """Вспомогательные функции для реализации работы yacut."""
 
-import aiohttp
 import asyncio
 import os
-import random
-import string
 import urllib.parse
+from uuid import uuid4
 
-from aiohttp import ClientSession
+from aiohttp import ClientSession, ClientTimeout
+from datetime import datetime, timezone
 from http import HTTPStatus
-from typing import Dict, List
+from sqlalchemy.exc import IntegrityError
+from typing import (
+    Any, AsyncIterator, BinaryIO, Dict, List, Optional, Tuple
+)
 from werkzeug.datastructures import FileStorage
 
-from . import db
+from . import app, db
+from .allocators import get_allocator
+from .async_db import async_db
 from .constants import (
     BAD_URL,
     CORRECT_SYMBOLS,
-    DOWNLOAD_LINK_URL,
+    DISK_LINK_PREFIX,
+    DISK_LOCATION_KEY,
+    EXPIRES_KEY,
+    LINK,
     OPTIONAL_KEY,
     OVERWRITE,
+    PERMANENT_KEY,
+    REUSE_KEY,
+    SHORT_ID_MAX_ATTEMPTS,
     SHORT_LINK_MAX,
-    RANDOM_STRING_LENGTH,
     REQUEST_UPLOAD_URL,
-    REQUIRED_KEY
+    REQUIRED_KEY,
+    TIMESTAMP_KEY
+)
+from .dedup import (
+    ContentHasher, check_duplicate, record_uploads, run_in_app_context
 )
 from .error_handlers import (
-    AsyncGetDownloadURLError,
     AsyncGetUploadURLError,
     AsyncUploadFileError,
+    DiskUnavailableError,
     ErrorInDBSave,
     ErrorInURLNaming,
     InvalidAPIUsage
 )
+from .http_client import disk_client
+from .lookup import (
+    existing_short_ids,
+    find_short_id,
+    invalidate,
+    is_archived,
+    register_inserted
+)
 from .models import URLMap
+from .resilience import check_response, disk_api
+from .streaming import MultipartReader
 from .validators import ShortURLValidator
 
 
-db_semaphore = asyncio.Semaphore(1)
-
-
-def validate_short_url(url: str) -> bool:
-    """Валидация введенной пользователем короткой ссылки."""
-    start = url.startswith(BAD_URL)
-    length = (len(url) == len(BAD_URL))
-    check = (URLMap.query.filter_by(short=url).first() is not None)
-    return False if (start and length) or check else True
-
-
-def generate_short_id() -> str:
-    """Создание случайной короткой ссылки с проверкой по базе."""
-    symbols = string.ascii_letters + string.digits
-    while True:
-        url = ''.join(random.choices(symbols, k=RANDOM_STRING_LENGTH))
-        if URLMap.query.filter_by(short=url).first() is not None:
-            continue
-        return url
+def is_reserved_short_url(url: str) -> bool:
+    """Проверка, занято ли имя короткой ссылки маршрутами сайта."""
+    return url == BAD_URL
 
 
-def get_unique_short_id(full_url: str, short_url: str = '') -> str:
+def get_unique_short_id(
+        full_url: str,
+        short_url: str = '',
+        permanent: Optional[bool] = None,
+        reuse: Optional[bool] = None,
+        expires_at: Optional[datetime] = None
+) -> str:
     """Проверка и возврат сохраненной короткой ссылки.
 
     Принимает на вход данные из полей формы: исходная ссылка и вариант
     короткой, если есть.
     Если короткая ссылка не задана, то возвращает созданное уникальное
     короткое имя в виде ссылки для вызова на текущем сервере.
-    Если короткая ссылка задана, то валидирует. При успешной валидации
-    возвращает ту же строку, в противном случае выбрасывает ошибку.
+    Если короткая ссылка задана, то возвращает ту же строку, а если
+    она уже занята - выбрасывает ошибку.
     В случае успешного создания ссылки, запись: длинная ссылка + короткая
     - сохраняются в базе.
+    Параметр permanent задает политику перенаправления для ссылки,
+    None - политика по умолчанию из настроек.
+    При reuse (по умолчанию - настройка REUSE_EXISTING_LINKS) и пустой
+    короткой ссылке возвращается уже существующая ссылка на тот же
+    адрес с той же политикой перенаправления, если она есть.
+    Параметр expires_at задает время UTC, после которого ссылка
+    перестает работать; ссылки со сроком действия не переиспользуются.
+
+    Занятость ссылки не проверяется отдельным запросом: запись сразу
+    вставляется в БД, а нарушение уникальности поля short означает
+    занятый вариант пользователя или повтор генерации для
+    сгенерированной ссылки.
+    """
+    if short_url and is_reserved_short_url(short_url):
+        raise ErrorInURLNaming
+
+    if reuse is None:
+        reuse = app.config['REUSE_EXISTING_LINKS']
+    if reuse and not short_url and expires_at is None:
+        existing = find_short_id(full_url, permanent)
+        if existing is not None:
+            return existing
+
+    return insert_link(full_url, short_url, permanent, expires_at)
+
+
+def insert_link(
+        full_url: str,
+        short_url: str = '',
+        permanent: Optional[bool] = None,
+        expires_at: Optional[datetime] = None
+) -> str:
+    """Оптимистичная вставка записи о ссылке в БД.
+
+    Для пустой short_url ссылка выделяется стратегией из настроек
+    и при конфликте вставка повторяется с новой ссылкой.
+    Пользовательский вариант, занятый ссылкой из архива, отклоняется.
     """
-    if not short_url:
-        short_url = generate_short_id()
-    if not validate_short_url(short_url):
+    custom = bool(short_url)
+    if custom and is_archived(short_url):
         raise ErrorInURLNaming
+    for _ in range(SHORT_ID_MAX_ATTEMPTS):
+        if not custom:
+            short_url = get_allocator().allocate()
+        try:
+            db.session.add(URLMap(
+                original=full_url,
+                short=short_url,
+                permanent=permanent,
+                expires_at=expires_at
+            ))
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            if custom:
+                raise ErrorInURLNaming
+            continue
+        except Exception:
+            db.session.rollback()
+            raise ErrorInDBSave
+        invalidate(short_url)
+        return short_url
+    raise ErrorInDBSave
+
+
+def find_custom_id_conflicts(
+        custom_ids: Dict[int, str]
+) -> Dict[int, str]:
+    """Поиск конфликтов среди пользовательских вариантов ссылок пакета.
+
+    Принимает словарь {номер элемента: вариант ссылки}. Возвращает
+    номера элементов, чьи варианты зарезервированы, уже есть в базе
+    или повторяют вариант из предыдущего элемента пакета.
+    Занятость в базе проверяется одним запросом для всего пакета.
+    """
+    taken = existing_short_ids(custom_ids.values())
+    seen = set()
+    conflicts = {}
+    for index, short in custom_ids.items():
+        if is_reserved_short_url(short) or short in taken or short in seen:
+            conflicts[index] = (
+                'Предложенный вариант короткой ссылки уже существует.'
+            )
+        seen.add(short)
+    return conflicts
+
+
+def insert_links_batch(rows: List[Dict[str, Any]]):
+    """Вставка пакета записей одним executemany в одной транзакции."""
+    if not rows:
+        return
     try:
-        new_link = URLMap(original=full_url, short=short_url)
-        db.session.add(new_link)
+        db.session.execute(URLMap.__table__.insert(), rows)
         db.session.commit()
-        return short_url
     except Exception:
         db.session.rollback()
-        raise ErrorInDBSave
+        raise
+    register_inserted(row['short'] for row in rows)
+
+
+def validate_server_fields(item: Dict):
+    """Проверка полей, которые задает сервер, в записи импорта."""
+    location = item.get(DISK_LOCATION_KEY)
+    if location is not None and (
+            not isinstance(location, str) or len(location) > LINK):
+        raise InvalidAPIUsage(
+            f'\"{DISK_LOCATION_KEY}\" должно быть строкой '
+            f'не длиннее {LINK} символов'
+        )
+    timestamp = item.get(TIMESTAMP_KEY)
+    if timestamp is not None:
+        if not isinstance(timestamp, str):
+            raise InvalidAPIUsage(
+                f'\"{TIMESTAMP_KEY}\" должно быть датой в формате ISO 8601'
+            )
+        parse_timestamp(timestamp)
+
+
+def validate_bulk_item(
+        item: Any, server_fields: bool = False
+) -> Optional[str]:
+    """Проверка элемента пакета, возвращает текст ошибки или None.
+
+    При server_fields элемент может содержать поля, которые задает
+    сервер (путь к файлу на Диске и время создания): так ссылки
+    восстанавливаются при импорте.
+    """
+    try:
+        if not isinstance(item, dict):
+            raise InvalidAPIUsage('Элемент пакета должен быть объектом')
+        if server_fields:
+            validate_server_fields(item)
+        validate_api_data(
+            item, server_fields and bool(item.get(DISK_LOCATION_KEY))
+        )
+    except InvalidAPIUsage as error:
+        return error.message
+    return None
+
+
+def build_link_rows(
+        items: Dict[int, Dict], server_fields: bool = False
+) -> Dict[int, Dict[str, Any]]:
+    """Подготовка строк для вставки с выделением недостающих ссылок."""
+    allocator = get_allocator()
+    rows = {
+        index: {
+            'original': item[REQUIRED_KEY],
+            'short': item.get(OPTIONAL_KEY) or allocator.allocate(),
+            'permanent': item.get(PERMANENT_KEY),
+            'expires_at': parse_expires_at(item.get(EXPIRES_KEY)),
+        }
+        for index, item in items.items()
+    }
+    if server_fields:
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        for index, item in items.items():
+            timestamp = item.get(TIMESTAMP_KEY)
+            rows[index].update({
+                'disk_location': item.get(DISK_LOCATION_KEY),
+                'timestamp': parse_timestamp(timestamp) if timestamp else now,
+            })
+    return rows
+
+
+def bulk_create_links(
+        items: List[Any], server_fields: bool = False
+) -> List[Dict[str, str]]:
+    """Пакетное создание коротких ссылок.
+
+    Каждый элемент проверяется так же, как тело запроса к '/api/id/'.
+    При server_fields (импорт из командной строки) сохраняются
+    и поля, которые задает сервер, см. validate_bulk_item.
+    Ссылки для всех корректных элементов вставляются одной транзакцией.
+    Если вставка нарушила уникальность из-за параллельной записи,
+    конфликты проверяются заново, а сгенерированные ссылки выделяются
+    повторно. Возвращает список результатов в порядке элементов:
+    {'url', 'short'} при успехе или {'url', 'error'} при ошибке.
+    """
+    results: List[Dict[str, str]] = []
+    pending = {}
+    for index, item in enumerate(items):
+        error = validate_bulk_item(item, server_fields)
+        url = item.get(REQUIRED_KEY) if isinstance(item, dict) else None
+        results.append({'url': url, 'error': error})
+        if error is None:
+            pending[index] = item
+
+    for _ in range(SHORT_ID_MAX_ATTEMPTS):
+        conflicts = find_custom_id_conflicts({
+            index: item[OPTIONAL_KEY]
+            for index, item in pending.items() if item.get(OPTIONAL_KEY)
+        })
+        for index, message in conflicts.items():
+            del pending[index]
+            results[index]['error'] = message
+
+        rows = build_link_rows(pending, server_fields)
+        try:
+            insert_links_batch(list(rows.values()))
+        except IntegrityError:
+            continue
+        except Exception:
+            break
+        for index, row in rows.items():
+            results[index] = {'url': row['original'], 'short': row['short']}
+        return results
+
+    for index in pending:
+        results[index]['error'] = 'Ошибка сохранения записи в БД.'
+    return results
+
+
+def insert_links(
+        full_urls: List[str], locations: Optional[List[str]] = None
+) -> List[str]:
+    """Вставка пакета ссылок с сгенерированными короткими вариантами.
+
+    Все записи сохраняются одной транзакцией. При конфликте
+    ссылки пакета выделяются заново и вставка повторяется целиком.
+    locations - пути к загруженным файлам на Диске для каждой ссылки.
+    """
+    allocator = get_allocator()
+    locations = locations or [None] * len(full_urls)
+    for _ in range(SHORT_ID_MAX_ATTEMPTS):
+        shorts = [allocator.allocate() for _ in full_urls]
+        try:
+            insert_links_batch([
+                {'original': full_url, 'short': short,
+                 'disk_location': location}
+                for full_url, short, location
+                in zip(full_urls, shorts, locations)
+            ])
+        except IntegrityError:
+            continue
+        except Exception:
+            raise ErrorInDBSave
+        return shorts
+    raise ErrorInDBSave
+
+
+def insert_links_in_new_context(
+        full_urls: List[str], locations: Optional[List[str]] = None
+) -> List[str]:
+    """Вставка пакета ссылок в собственном контексте приложения.
+
+    У каждого контекста своя сессия Flask-SQLAlchemy, поэтому вызовы
+    из разных потоков не делят одну сессию и не требуют блокировки.
+    """
+    with app.app_context():
+        return insert_links(full_urls, locations)
+
+
+async def create_links_async(
+        full_urls: List[str], locations: Optional[List[str]] = None
+) -> List[str]:
+    """Создание коротких ссылок для пакета адресов из корутины.
+
+    Через асинхронный движок, если для БД есть асинхронный драйвер,
+    иначе - в потоке с собственной сессией.
+    """
+    if not full_urls:
+        return []
+    if async_db.available:
+        return await async_db.insert_links(full_urls, locations)
+    return await asyncio.to_thread(
+        insert_links_in_new_context, full_urls, locations
+    )
+
+
+def api_timeout() -> ClientTimeout:
+    """Таймаут одного запроса к API Диска."""
+    return ClientTimeout(total=app.config['DISK_API_TIMEOUT'])
+
+
+def upload_timeout() -> ClientTimeout:
+    """Таймауты загрузки файла: без общего предела на время передачи."""
+    return ClientTimeout(
+        total=None,
+        sock_connect=app.config['DISK_API_TIMEOUT'],
+        sock_read=app.config['DISK_UPLOAD_TIMEOUT']
+    )
+
+
+def upload_path(filename: str) -> str:
+    """Уникальный путь для загрузки файла в папку приложения.
+
+    Имя дополняется случайным префиксом: загруженный позже файл
+    с тем же именем не заменит прежний, на который ведут ссылки.
+    """
+    return f'app:/{uuid4().hex}_{filename}'
 
 
 async def get_upload_url(session: ClientSession, file: FileStorage) -> str:
-    """Получение ссылки на загрузку файла."""
+    """Получение ссылки на загрузку файла.
+
+    Временные ошибки API повторяются (см. resilience).
+    """
     payload = {
-        'path': f'app:/{file.filename}',
+        'path': upload_path(file.filename),
         'overwrite': f'{OVERWRITE}'
     }
-    try:
+
+    async def request() -> str:
         async with session.get(
             headers={"Authorization": f'OAuth {os.getenv("DISK_TOKEN")}'},
             params=payload,
-            url=REQUEST_UPLOAD_URL
+            url=REQUEST_UPLOAD_URL,
+            timeout=api_timeout()
         ) as response:
+            check_response(response)
             data = await response.json()
-            upload_url = data['href']
+            return data['href']
+
+    try:
+        return await disk_api.call(request)
+    except DiskUnavailableError:
+        raise
     except Exception:
         raise AsyncGetUploadURLError
-    return upload_url
+
+
+async def iter_chunks(
+        stream: BinaryIO, chunk_size: int
+) -> AsyncIterator[bytes]:
+    """Чтение файла блоками по chunk_size байт без блокировки цикла."""
+    while chunk := await asyncio.to_thread(stream.read, chunk_size):
+        yield chunk
 
 
 async def upload_file(
@@ -107,67 +416,189 @@ async def upload_file(
 ) -> str:
     """Загрузка файла на ЯндексДиск.
 
+    Файл передается блоками, без чтения в память целиком.
+    Повторить загрузку после временной ошибки можно, только если
+    поток файла поддерживает перемещение: тело запроса, читаемое
+    при передаче, второй раз не прочитать.
     Возвращает короткий путь к файлу на ЯндексДиске.
     """
-    try:
-        #content = file.read()
-        #file.seek(0)
-        content = file.stream
-        async with session.put(data=content, url=upload_url, ) as response:
+    stream = file.stream
+    start = None
+    if getattr(stream, 'seekable', lambda: False)():
+        start = stream.tell()
+
+    async def request() -> str:
+        if start is not None:
+            stream.seek(start)
+        content = iter_chunks(stream, app.config['DISK_STREAM_CHUNK_SIZE'])
+        async with session.put(
+            data=content, url=upload_url, timeout=upload_timeout()
+        ) as response:
+            check_response(response)
             if response.status not in (HTTPStatus.OK, HTTPStatus.CREATED):
                 raise AsyncUploadFileError
 
             data = response.headers['Location']
             location = urllib.parse.unquote(data)
-            location = location.replace('/disk', '')
-    except Exception:
-        raise AsyncUploadFileError
-    return location
-
+            return location.replace('/disk', '')
 
-async def get_download_url(session: ClientSession, location: str) -> str:
-    """Получение ссылки на загрузку файла по короткому пути на ЯндексДиске."""
     try:
-        async with session.get(
-            headers={"Authorization": f'OAuth {os.getenv("DISK_TOKEN")}'},
-            url=DOWNLOAD_LINK_URL,
-            params={'path': location}
-        ) as response:
-            data = await response.json()
-            link = data['href']
+        return await disk_api.call(request, retry=start is not None)
+    except DiskUnavailableError:
+        raise
     except Exception:
-        raise AsyncGetDownloadURLError
-    return link
+        raise AsyncUploadFileError
 
 
-async def upload_file_and_get_url(
-        session: ClientSession, file: FileStorage
-) -> Dict[str, str]:
-    """Загрузка одного файла на ЯндексДиск и получение ссылки на скачивание.
+async def find_duplicate(
+        file: FileStorage
+) -> Tuple[FileStorage, Optional[ContentHasher], Optional[str]]:
+    """Поиск уже загруженного файла с тем же содержимым.
+
+    Возвращает файл для загрузки (его содержимое хешируется при чтении),
+    дайджест и короткую ссылку на найденный дубликат или None.
+    """
+    if not app.config['UPLOAD_DEDUP']:
+        return file, None, None
+    hasher = ContentHasher(app.config['DEDUP_PREFIX_SIZE'])
+    stream, short = await asyncio.to_thread(
+        check_duplicate,
+        file.stream,
+        hasher,
+        app.config['DISK_STREAM_CHUNK_SIZE'],
+        app.config['DISK_STREAM_MEMORY_LIMIT']
+    )
+    return FileStorage(stream, file.filename, file.name), hasher, short
+
+
+async def upload_file_and_get_link(
+        session: ClientSession, file: FileStorage, upload_limit: str = 'upload'
+) -> Dict[str, Any]:
+    """Загрузка одного файла на ЯндексДиск.
 
     Принимает на вход текущую сессию aiohttp и файл, который нужно загрузить.
-    Возвращает словарь из имени файла, короткой ссылки на него.
+    Выполняется в цикле общего клиента: число файлов в обработке и число
+    одновременных запросов на каждом этапе ограничены настройками DISK_*.
+    Загрузка идет под ограничением upload_limit: файлы из тела запроса
+    передаются со скоростью клиента и учитываются отдельно
+    (stream_upload), чтобы медленные клиенты не занимали места
+    загрузок уже полученных файлов.
+    Возвращает словарь из имени файла, ссылки, пути к файлу на Диске
+    и ошибки. Ссылка - это путь с префиксом DISK_LINK_PREFIX для
+    отображения; ссылка на скачивание запрашивается при переходе
+    по пути из location (см. disk_links).
+    Короткая ссылка создается позже, сразу для всех загруженных файлов;
+    для уже загружавшегося содержимого ее сразу содержит ключ short.
     """
     try:
-        upload_url = await get_upload_url(session, file)
-        location = await upload_file(session, upload_url, file)
-        link = await get_download_url(session, location)
-        # Добавлена регулировка потоков записи в базу, так как переодически
-        # наблюдались ошибки в БД из параллельных обращений.
-        async with db_semaphore:
-            url = await asyncio.to_thread(get_unique_short_id, link)
-        return {'name': file.filename, 'url': url, 'error': ''}
+        async with disk_client.limiter('files'):
+            file, hasher, short = await find_duplicate(file)
+            if short is not None:
+                return {'name': file.filename, 'link': '', 'short': short,
+                        'error': ''}
+            async with disk_client.limiter('upload_url'):
+                upload_url = await get_upload_url(session, file)
+            async with disk_client.limiter(upload_limit):
+                location = await upload_file(session, upload_url, file)
+        return {'name': file.filename, 'link': DISK_LINK_PREFIX + location,
+                'error': '', 'location': location,
+                'content': hasher.record(location) if hasher else None}
     except AsyncGetUploadURLError:
         message = 'Не удалось получить ссылку для загрузки на диск.'
     except AsyncUploadFileError:
         message = 'Не удалось загрузить файл на диск'
-    except AsyncGetDownloadURLError:
-        message = 'Не удалось получить ссылку для скачивания.'
-    except ErrorInDBSave:
-        message = 'Не удалось создать запись в БД.'
+    except DiskUnavailableError:
+        message = 'ЯндексДиск временно недоступен, попробуйте позже.'
     except Exception as e:
         message = f'Непредвиденная ошибка: {str(e)}'
-    return {'name': file.filename, 'url': '', 'error': message}
+    return {'name': file.filename, 'link': '', 'error': message}
+
+
+async def upload_files(
+        session: ClientSession, files: List[FileStorage]
+) -> List[Dict[str, str]]:
+    """Параллельная загрузка файлов на ЯндексДиск через общую сессию."""
+    return await asyncio.gather(
+        *(upload_file_and_get_link(session, file) for file in files)
+    )
+
+
+async def save_uploaded_links(
+        uploaded_files: List[Dict[str, Any]]
+) -> List[Dict[str, str]]:
+    """Создание коротких ссылок для всех загруженных файлов.
+
+    Ссылки выделяются вместе и сохраняются одной транзакцией.
+    Возвращает словари: имя файла, короткая ссылка, ошибка, если была.
+    """
+    results = [
+        {'name': file['name'], 'url': file.get('short', ''),
+         'error': file['error']}
+        for file in uploaded_files
+    ]
+    saved = [
+        index for index, file in enumerate(uploaded_files) if file['link']
+    ]
+    try:
+        shorts = await create_links_async(
+            [uploaded_files[index]['link'] for index in saved],
+            [uploaded_files[index].get('location') for index in saved]
+        )
+    except ErrorInDBSave:
+        for index in saved:
+            results[index]['error'] = 'Не удалось создать запись в БД.'
+    else:
+        for index, short in zip(saved, shorts):
+            results[index]['url'] = short
+    await record_uploaded_files(uploaded_files, results)
+    return results
+
+
+async def record_uploaded_files(
+        uploaded_files: List[Dict[str, Any]], results: List[Dict[str, str]]
+):
+    """Сохранение содержимого загруженных файлов для дедупликации.
+
+    Пути всех загруженных файлов передаются, даже если дедупликация
+    выключена: записи о прежнем содержимом по этим путям устарели.
+    """
+    rows = [
+        {**file['content'], 'short': result['url']}
+        for file, result in zip(uploaded_files, results)
+        if file.get('content') and result['url']
+    ]
+    locations = [
+        file['location'] for file in uploaded_files if file.get('location')
+    ]
+    if locations:
+        await asyncio.to_thread(
+            run_in_app_context, record_uploads, rows, locations
+        )
+
+
+async def upload_stream(
+        session: ClientSession, reader: MultipartReader, file: FileStorage
+) -> List[Dict[str, str]]:
+    """Загрузка файлов по очереди по мере чтения тела запроса."""
+    uploaded_files = []
+    while file is not None:
+        uploaded_files.append(
+            await upload_file_and_get_link(session, file, 'stream_upload')
+        )
+        file = await asyncio.to_thread(reader.next_file)
+    return uploaded_files
+
+
+async def stream_files_to_yadisc(
+        reader: MultipartReader, file: FileStorage
+) -> List[Dict[str, str]]:
+    """Загрузка на ЯндексДиск файлов прямо из тела запроса.
+
+    Принимает разбор тела запроса и его первый файл. Возвращает
+    тот же список словарей, что и async_upload_files_to_yadisc.
+    """
+    uploaded_files = await disk_client.run(upload_stream, reader, file)
+    return await save_uploaded_links(uploaded_files)
 
 
 async def async_upload_files_to_yadisc(
@@ -181,25 +612,68 @@ async def async_upload_files_to_yadisc(
     if not files:
         return []
 
-    async with aiohttp.ClientSession() as session:
-        tasks = list(
-            upload_file_and_get_url(session, file) for file in files
-        )
-        uploaded_files = await asyncio.gather(*tasks)
-    return uploaded_files
+    uploaded_files = await disk_client.run(upload_files, files)
+    return await save_uploaded_links(uploaded_files)
 
 
-def validate_api_data(data: Dict):
-    """Валидация данных, принятых через API по '/api/id/'."""
+def validate_api_data(data: Dict, allow_disk_links: bool = False):
+    """Валидация данных, принятых через API по '/api/id/'.
+
+    Ссылки с префиксом DISK_LINK_PREFIX создает только сервер,
+    allow_disk_links разрешает их при импорте.
+    """
     if not data:
         raise InvalidAPIUsage('Отсутствует тело запроса')
 
     if REQUIRED_KEY not in data:
         raise InvalidAPIUsage('\"url\" является обязательным полем!')
 
+    url = data[REQUIRED_KEY]
+    if not isinstance(url, str) or len(url) > LINK:
+        raise InvalidAPIUsage(
+            f'\"url\" должно быть строкой не длиннее {LINK} символов'
+        )
+    if not allow_disk_links and url.lower().startswith(DISK_LINK_PREFIX):
+        raise InvalidAPIUsage(
+            'Ссылки на файлы ЯндексДиска создаются только при загрузке'
+        )
+
     validator = ShortURLValidator.create(data.get(OPTIONAL_KEY))
 
     if validator and not validator.check_all(SHORT_LINK_MAX, CORRECT_SYMBOLS):
         raise InvalidAPIUsage(
             'Указано недопустимое имя для короткой ссылки'
         )
+
+    for key in (PERMANENT_KEY, REUSE_KEY):
+        if not isinstance(data.get(key), (bool, type(None))):
+            raise InvalidAPIUsage(
+                f'\"{key}\" должно быть логическим значением'
+            )
+
+    parse_expires_at(data.get(EXPIRES_KEY))
+
+
+def parse_timestamp(value: str) -> datetime:
+    """Разбор даты ISO 8601 в наивное время UTC."""
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise InvalidAPIUsage(f'Некорректная дата: {value}')
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def parse_expires_at(value: Any) -> Optional[datetime]:
+    """Проверка и разбор срока действия ссылки из данных API."""
+    if value is None:
+        return None
+    if not isinstance(value, str):
+        raise InvalidAPIUsage(
+            f'\"{EXPIRES_KEY}\" должно быть датой в формате ISO 8601'
+        )
+    expires_at = parse_timestamp(value)
+    if expires_at <= datetime.now(timezone.utc).replace(tzinfo=None):
+        raise InvalidAPIUsage(f'\"{EXPIRES_KEY}\" должно быть в будущем')
+    return expires_at
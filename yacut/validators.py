@@ -2,6 +2,7 @@
 
 import re
 
+from datetime import datetime, timezone
 from typing import Any, Optional
 from wtforms import Form, Field
 from wtforms.validators import ValidationError
@@ -84,3 +85,17 @@ class ValidateShortURL():
                 raise ValidationError(
                     'Можно использовать только латинские буквы и цифры'
                 )
+
+
+class ValidateFutureDate():
+    """Валидатор даты, которая должна быть в будущем (UTC)."""
+
+    def __init__(self, message: Optional[str] = None):
+        """Инициализация класса валидатора."""
+        self.message = message or 'Дата должна быть в будущем.'
+
+    def __call__(self, _: Form, field: Field):
+        """Проверка условия и возврат ошибки."""
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        if field.data is not None and field.data <= now:
+            raise ValidationError(self.message)
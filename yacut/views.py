@@ -1,12 +1,21 @@
 """View-функции для сайта yacut."""
 
-from flask import flash, redirect, render_template
+from flask import abort, flash, render_template, request
+from flask_wtf.csrf import validate_csrf
+from http import HTTPStatus
+from wtforms import ValidationError
 
 from . import app
-from .error_handlers import ErrorInDBSave, ErrorInURLNaming
+from .clicks import click_counter
+from .error_handlers import (
+    AsyncGetDownloadURLError, ErrorInDBSave, ErrorInURLNaming
+)
 from .forms import FileUploadForm, URLForm
-from .models import URLMap
-from .utils import async_upload_files_to_yadisc, get_unique_short_id
+from .lookup import get_link
+from .streaming import MultipartReader
+from .utils import (
+    async_upload_files_to_yadisc, get_unique_short_id, stream_files_to_yadisc
+)
 
 
 @app.route('/', methods=['GET', 'POST'])
@@ -18,7 +27,9 @@ def index():
     if form.validate_on_submit():
         try:
             url = get_unique_short_id(
-                form.original_link.data, form.custom_id.data
+                form.original_link.data,
+                form.custom_id.data,
+                expires_at=form.expires_at.data
             )
         except ErrorInURLNaming:
             flash('Предложенный вариант короткой ссылки уже существует.')
@@ -31,8 +42,15 @@ def index():
 @app.route('/<short_id>')
 def link_redirect(short_id):
     """Перенаправление с короткой ссылки на основной путь."""
-    link = URLMap.query.filter_by(short=short_id).first_or_404()
-    return redirect(link.original)
+    target = get_link(short_id)
+    if target is None:
+        abort(HTTPStatus.NOT_FOUND)
+    try:
+        redirect = target.redirect
+    except AsyncGetDownloadURLError:
+        abort(HTTPStatus.BAD_GATEWAY)
+    click_counter.record(short_id)
+    return redirect.to_response()
 
 
 @app.route('/files', methods=['GET', 'POST'])
@@ -44,12 +62,50 @@ async def upload_files_view():
     короткой ссылкой для скачивания и пустым полем ошибка.
     Если в процессе загрузки произойдет ошибка, то поле url
     в словаре будет пустым, а в ключе error указан этап, на котором
-    произошла ошибка.
+    произошла ошибка. При DISK_STREAM_UPLOADS файлы из multipart-формы
+    передаются на диск по очереди по мере чтения тела запроса, иначе
+    форма читается целиком и файлы загружаются параллельно.
     """
-    form = FileUploadForm()
-    files = []
+    reader = None
+    if request.method == 'POST' and app.config['DISK_STREAM_UPLOADS']:
+        reader = MultipartReader.from_request(
+            request,
+            app.config['DISK_STREAM_CHUNK_SIZE'],
+            app.config['DISK_STREAM_MEMORY_LIMIT']
+        )
+    if reader is None:
+        form = FileUploadForm()
+        files = []
+        if form.validate_on_submit():
+            files = await async_upload_files_to_yadisc(form.files.data)
+        return render_template('upload_files.html', form=form, files=files)
+    return await stream_upload_files(reader)
+
+
+def csrf_token_valid(form: FileUploadForm, fields: dict) -> bool:
+    """Проверка CSRF-токена из полей, прочитанных до первого файла."""
+    if not form.meta.csrf:
+        return True
+    try:
+        validate_csrf(fields.get(form.meta.csrf_field_name))
+    except ValidationError:
+        return False
+    return True
 
-    if form.validate_on_submit():
-        files = await async_upload_files_to_yadisc(form.files.data)
 
+async def stream_upload_files(reader: MultipartReader):
+    """Загрузка файлов формы на Яндекс диск без буферизации тела запроса.
+
+    Поле CSRF-токена в форме идет перед файлами, поэтому проверяется
+    до начала загрузки первого файла.
+    """
+    form = FileUploadForm(formdata=None)
+    files = []
+    file = reader.next_file()
+    if not csrf_token_valid(form, reader.fields):
+        form.csrf_token.errors = ['Некорректный CSRF-токен.']
+    elif file is None:
+        form.files.errors = [form.files.validators[0].message]
+    else:
+        files = await stream_files_to_yadisc(reader, file)
     return render_template('upload_files.html', form=form, files=files)